@@ -20,12 +20,20 @@ class APIManager:
         """
         return self._program_manager.get_legal_moves_positions_by_position(position)
 
+    def generate_legal_moves(self, color: 'Color') -> dict[tuple[int, int], set[tuple[int, int]]]:
+        """
+        Returns the legal moves of all pieces of the specified color, as final positions by current position.
+        """
+        return self._program_manager.generate_legal_moves(color)
+
     def execute_move_by_position(self, piece_current_position: tuple[int, int],
-                                 piece_final_position: tuple[int, int]) -> None:
+                                 piece_final_position: tuple[int, int]) -> list[tuple[int, int]]:
         """
         Executes a move on the board, given the current position of the piece and the wanted final position.
+        Returns the change-set of the move: the positions of the squares whose content changed,
+        so that clients may redraw only these squares.
         """
-        self._program_manager.execute_move_by_position(piece_current_position, piece_final_position)
+        return self._program_manager.execute_move_by_position(piece_current_position, piece_final_position)
 
     def get_game_status(self) -> 'GameStatus':
         """
@@ -45,3 +53,30 @@ class APIManager:
         """
         return self._program_manager.get_check_status()
 
+    def get_checking_positions(self) -> list[tuple[int, int]]:
+        """
+        Returns the positions of the pieces checking the current player; two of them in a double check.
+        """
+        return self._program_manager.get_checking_positions()
+
+    def get_position_hash(self) -> int:
+        """
+        Returns the 64-bit Zobrist key of the current position.
+        Equal positions (pieces, side to move and castling rights) have equal keys.
+        """
+        return self._program_manager.get_position_hash()
+
+    def get_book_move(self) -> tuple[tuple[int, int], tuple[int, int]] or None:
+        """
+        Returns the most played opening book move of the current position, as the current and final positions
+        of the piece to move, or None if the game has no opening book or the position is not in it.
+        """
+        return self._program_manager.get_book_move()
+
+    def get_best_move(self, time_ms: int) -> tuple[tuple[int, int], tuple[int, int]] or None:
+        """
+        Returns the best move for the current player: the opening book or tablebase move if there is one,
+        without searching, otherwise the best move the engine finds within 'time_ms' milliseconds,
+        as the current and final positions of the piece to move, or None if there is no legal move.
+        """
+        return self._program_manager.get_best_move(time_ms)
@@ -0,0 +1,102 @@
+# attack_map.py
+"""
+Per-color attack counts of every square, kept up to date as pieces are placed on and removed from the board.
+"""
+from config import *
+from square import Square
+from attack_tables import ALL_POSITIONS, DIRECTION_RAYS, PAWN_ATTACKS
+from typing import Collection
+
+
+def is_sliding_along(piece: 'ChessPiece', direction: tuple[int, int]) -> bool:
+    """
+    Returns True if the piece attacks along lines of the specified direction.
+    """
+    if piece.piece_type is PieceType.QUEEN:
+        return True
+    if piece.piece_type is PieceType.ROOK:
+        return direction in ROOK_DIRECTIONS
+    if piece.piece_type is PieceType.BISHOP:
+        return direction in BISHOP_DIRECTIONS
+    return False
+
+
+class AttackMap:
+    """
+    Counts, for each color and square, the number of pieces of that color attacking the square.
+    Occupied squares are counted too, so an attacked friendly piece is a defended one.
+
+    A change on a square only alters the attacks of the piece placed or removed there,
+    and of the sliders whose lines pass through that square; all other attacks are left untouched.
+    """
+
+    def __init__(self, board: list[list[Square]]):
+        self.board = board
+        # Color -> attack count of each square, indexed row by row as 'row * BOARD_SIZE + col'
+        self.counts: dict[Color, list[int]] = {color: [0] * (BOARD_SIZE * BOARD_SIZE) for color in Color}
+        # Piece -> positions it currently attacks, to be subtracted once its attacks change.
+        # Leapers and pawns refer to the shared attack tables, only slider attacks are allocated per piece
+        self._piece_attacks: dict['ChessPiece', Collection[tuple[int, int]]] = {}
+
+        for row, col in ALL_POSITIONS:
+            occupant = board[row][col].occupant
+            if occupant is not None:
+                self._add_piece_attacks(occupant)
+
+    def get_count(self, position: tuple[int, int], by_color: Color) -> int:
+        return self.counts[by_color][position[0] * BOARD_SIZE + position[1]]
+
+    def get_attacked_positions(self, piece: 'ChessPiece') -> Collection[tuple[int, int]]:
+        return self._piece_attacks[piece]
+
+    def on_piece_set(self, piece: 'ChessPiece', square: Square) -> None:
+        self._refresh_sliders_through(square.position)
+        self._add_piece_attacks(piece)
+
+    def on_piece_removed(self, piece: 'ChessPiece', square: Square) -> None:
+        self._remove_piece_attacks(piece)
+        self._refresh_sliders_through(square.position)
+
+    def _compute_piece_attacks(self, piece: 'ChessPiece') -> Collection[tuple[int, int]]:
+        """
+        Returns the positions attacked by the piece, each slider ray stopping at its first occupied square.
+        """
+        position = piece.square.position
+        if piece.piece_type is PieceType.PAWN:
+            return PAWN_ATTACKS[piece.color][position]
+        if piece.piece_type in (PieceType.KNIGHT, PieceType.KING):
+            return piece.get_hypothetical_moves_final_positions()
+
+        attacks = []
+        for ray in piece.get_hypothetical_moves_rays():
+            for position in ray:
+                attacks.append(position)
+                if self.board[position[0]][position[1]].occupant is not None:
+                    break
+        return tuple(attacks)
+
+    def _add_piece_attacks(self, piece: 'ChessPiece') -> None:
+        attacks = self._compute_piece_attacks(piece)
+        counts = self.counts[piece.color]
+        for row, col in attacks:
+            counts[row * BOARD_SIZE + col] += 1
+        self._piece_attacks[piece] = attacks
+
+    def _remove_piece_attacks(self, piece: 'ChessPiece') -> None:
+        counts = self.counts[piece.color]
+        for row, col in self._piece_attacks.pop(piece):
+            counts[row * BOARD_SIZE + col] -= 1
+
+    def _refresh_sliders_through(self, position: tuple[int, int]) -> None:
+        """
+        Recomputes the attacks of the sliders aiming at the position, whose lines are cut or extended there.
+        """
+        for direction in ROOK_DIRECTIONS + BISHOP_DIRECTIONS:
+            for row, col in DIRECTION_RAYS[position][direction]:
+                occupant = self.board[row][col].occupant
+                if occupant is None:
+                    continue
+                if is_sliding_along(occupant, (-direction[0], -direction[1])):
+                    self._remove_piece_attacks(occupant)
+                    self._add_piece_attacks(occupant)
+                break
@@ -0,0 +1,104 @@
+# attack_tables.py
+"""
+Precomputed, import-time tables mapping each square to the on-board squares a piece standing on it may move to.
+Targets are grouped in rays ordered outwards from the square, so walking a ray can stop at the first blocker.
+Leapers (knight, king) and pawn captures have one single-square ray per target.
+"""
+from config import *
+
+
+class SquareRays:
+    """
+    The ordered rays of a piece type standing on a single square, and the set of all their positions.
+    """
+    def __init__(self, rays: tuple[tuple[tuple[int, int], ...], ...]):
+        self.rays = rays
+        self.positions: frozenset[tuple[int, int]] = frozenset(position for ray in rays for position in ray)
+
+
+ALL_POSITIONS = tuple((row, col) for row in range(BOARD_SIZE) for col in range(BOARD_SIZE))
+
+
+def _is_on_board(row: int, col: int) -> bool:
+    return 0 <= row < BOARD_SIZE and 0 <= col < BOARD_SIZE
+
+
+def _build_direction_ray(position: tuple[int, int], direction: tuple[int, int],
+                         deltas: set[tuple[int, int]]) -> tuple[tuple[int, int], ...]:
+    """
+    Returns the on-board positions reachable by the deltas along a direction, ordered outwards from the position.
+    """
+    row, col = position
+    d_row, d_col = direction
+    ray = []
+    for distance in range(1, BOARD_SIZE):
+        delta = (d_row * distance, d_col * distance)
+        row_f, col_f = row + delta[0], col + delta[1]
+        if delta not in deltas or not _is_on_board(row_f, col_f):
+            break
+        ray.append((row_f, col_f))
+    return tuple(ray)
+
+
+def _build_leaper_table(deltas: set[tuple[int, int]]) -> dict[tuple[int, int], SquareRays]:
+    table = {}
+    for row, col in ALL_POSITIONS:
+        targets = sorted((row + d_row, col + d_col) for d_row, d_col in deltas
+                         if _is_on_board(row + d_row, col + d_col))
+        table[(row, col)] = SquareRays(tuple((target,) for target in targets))
+    return table
+
+
+def _build_slider_table(deltas: set[tuple[int, int]],
+                        directions: tuple[tuple[int, int], ...]) -> dict[tuple[int, int], SquareRays]:
+    table = {}
+    for position in ALL_POSITIONS:
+        rays = (_build_direction_ray(position, direction, deltas) for direction in directions)
+        table[position] = SquareRays(tuple(ray for ray in rays if ray))
+    return table
+
+
+def _build_pawn_table(color: Color) -> dict[tuple[int, int], SquareRays]:
+    """
+    A pawn has a forward push ray (of two squares on its start row) and a single-square ray per diagonal capture.
+    """
+    if color is Color.WHITE:
+        start_row, forward = 1, 1
+        deltas, start_deltas = HypotheticalPositionDeltas.PAWN_WHITE, HypotheticalPositionDeltas.PAWN_WHITE_START
+    else:
+        start_row, forward = 6, -1
+        deltas, start_deltas = HypotheticalPositionDeltas.PAWN_BLACK, HypotheticalPositionDeltas.PAWN_BLACK_START
+
+    table = {}
+    for row, col in ALL_POSITIONS:
+        pawn_deltas = start_deltas.value if row == start_row else deltas.value
+        push_ray = _build_direction_ray((row, col), (forward, 0), pawn_deltas)
+        capture_rays = tuple(((row + d_row, col + d_col),) for d_row, d_col in sorted(pawn_deltas)
+                             if d_col != 0 and _is_on_board(row + d_row, col + d_col))
+        table[(row, col)] = SquareRays(((push_ray,) if push_ray else ()) + capture_rays)
+    return table
+
+
+KNIGHT_RAYS = _build_leaper_table(HypotheticalPositionDeltas.KNIGHT.value)
+KING_RAYS = _build_leaper_table(HypotheticalPositionDeltas.KING.value)
+BISHOP_RAYS = _build_slider_table(HypotheticalPositionDeltas.BISHOP.value, BISHOP_DIRECTIONS)
+ROOK_RAYS = _build_slider_table(HypotheticalPositionDeltas.ROOK.value, ROOK_DIRECTIONS)
+QUEEN_RAYS = _build_slider_table(HypotheticalPositionDeltas.QUEEN.value, ROOK_DIRECTIONS + BISHOP_DIRECTIONS)
+PAWN_RAYS = {color: _build_pawn_table(color) for color in Color}
+
+# Squares a pawn of a color attacks from each square (captures only, no pushes)
+PAWN_ATTACKS = {color: {position: tuple(ray[0] for ray in square_rays.rays if ray[0][1] != position[1])
+                        for position, square_rays in PAWN_RAYS[color].items()}
+                for color in Color}
+
+# Ordered ray per square and per line direction, from the square (exclusive) up to the board edge
+DIRECTION_RAYS = {position: {direction: _build_direction_ray(position, direction,
+                                                             HypotheticalPositionDeltas.QUEEN.value)
+                             for direction in ROOK_DIRECTIONS + BISHOP_DIRECTIONS}
+                  for position in ALL_POSITIONS}
+
+# (from position, to position) -> direction of the line walking from one to the other, for positions sharing a line
+LINE_DIRECTIONS = {(position, target): direction
+                   for position, rays in DIRECTION_RAYS.items()
+                   for direction, ray in rays.items()
+                   for target in ray}
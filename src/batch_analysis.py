@@ -0,0 +1,119 @@
+# batch_analysis.py
+"""
+A streaming pipeline analysing every position of PGN games or FEN lists: the games are replayed and
+validated with 'GameManager', and the results are written out in CSV chunks.
+Files are read lazily and results are not accumulated beyond a chunk, so memory stays constant
+whatever the size of the input. Run through main.py: python main.py --help
+"""
+import csv
+from itertools import islice
+from typing import Iterable, Iterator, Optional, TextIO
+from game_manager import GameManager
+from pgn import PgnGame, read_pgn_games, find_move_by_san
+from config import *
+
+ANALYSIS_FIELDS = ('game', 'ply', 'fen', 'legal_moves', 'check_status', 'game_status', 'error')
+
+
+class PositionAnalysis:
+    """
+    The analysis of a single position, or the error met while reaching it.
+    """
+    __slots__ = ANALYSIS_FIELDS
+
+    def __init__(self, game: int, ply: int, fen: str, legal_moves: Optional[int] = None,
+                 check_status: Optional[CheckStatus] = None, game_status: Optional[GameStatus] = None,
+                 error: Optional[str] = None):
+        self.game = game  # index of the game, or of the line of a FEN list, from 1
+        self.ply = ply  # number of moves replayed from the start of the game
+        self.fen = fen
+        self.legal_moves = legal_moves
+        self.check_status = check_status
+        self.game_status = game_status
+        self.error = error
+
+    def to_row(self) -> list:
+        return [self.game, self.ply, self.fen, '' if self.legal_moves is None else self.legal_moves,
+                self.check_status.name if self.check_status else '', self.game_status.name if self.game_status else '',
+                self.error or '']
+
+
+def analyze_position(game_manager: GameManager, game: int, ply: int) -> PositionAnalysis:
+    legal_moves = len(game_manager.controller.generate_legal_moves(game_manager.current_player_color))
+    return PositionAnalysis(game, ply, game_manager.to_fen(), legal_moves, game_manager.check_status,
+                            game_manager.get_game_status())
+
+
+def analyze_pgn_game(pgn_game: PgnGame, game: int) -> Iterator[PositionAnalysis]:
+    """
+    Yields the analysis of every position of a game, from its starting position on.
+    A move that cannot be resolved or played ends the game with an error.
+    """
+    try:
+        game_manager = GameManager(fen=pgn_game.fen)
+    except ValueError as e:
+        yield PositionAnalysis(game, 0, pgn_game.fen or '', error=str(e))
+        return
+
+    yield analyze_position(game_manager, game, 0)
+    for ply, san in enumerate(pgn_game.moves, start=1):
+        try:
+            move = find_move_by_san(game_manager.controller, game_manager.current_player_color, san)
+            game_manager.execute_update_validate_on_move(move)
+        except ValueError as e:
+            yield PositionAnalysis(game, ply, game_manager.to_fen(), error=f"{san}: {e}")
+            return
+        yield analyze_position(game_manager, game, ply)
+
+
+def analyze_pgn(lines: Iterable[str]) -> Iterator[PositionAnalysis]:
+    for game, pgn_game in enumerate(read_pgn_games(lines), start=1):
+        yield from analyze_pgn_game(pgn_game, game)
+
+
+def analyze_fens(lines: Iterable[str]) -> Iterator[PositionAnalysis]:
+    """
+    Yields the analysis of each FEN of a list, one per line. Blank lines and '#' comments are skipped.
+    """
+    for line_number, line in enumerate(lines, start=1):
+        fen = line.strip()
+        if not fen or fen.startswith('#'):
+            continue
+        try:
+            game_manager = GameManager(fen=fen)
+        except ValueError as e:
+            yield PositionAnalysis(line_number, 0, fen, error=str(e))
+            continue
+        yield analyze_position(game_manager, line_number, 0)
+
+
+def write_in_chunks(analyses: Iterable[PositionAnalysis], output: TextIO, chunk_size: int = 1000) -> int:
+    """
+    Writes the analyses as CSV rows, a chunk at a time, and returns the number of rows written.
+    """
+    writer = csv.writer(output)
+    writer.writerow(ANALYSIS_FIELDS)
+    analyses = iter(analyses)
+    rows_written = 0
+    while chunk := [analysis.to_row() for analysis in islice(analyses, chunk_size)]:
+        writer.writerows(chunk)
+        output.flush()
+        rows_written += len(chunk)
+    return rows_written
+
+
+def detect_input_format(path: str) -> str:
+    return 'fen' if path.lower().endswith(('.fen', '.epd', '.txt')) else 'pgn'
+
+
+def run_batch(input_file: TextIO, output: TextIO, input_format: str = 'pgn', chunk_size: int = 1000) -> int:
+    """
+    Analyses every position of a PGN file or of a FEN list, and returns the number of rows written.
+    """
+    if input_format == 'pgn':
+        analyses = analyze_pgn(input_file)
+    elif input_format == 'fen':
+        analyses = analyze_fens(input_file)
+    else:
+        raise ValueError(f"Invalid input format: '{input_format}'")
+    return write_in_chunks(analyses, output, chunk_size)
@@ -0,0 +1,259 @@
+# batch_movegen.py
+"""
+Vectorized legal move generation over batches of positions, for training data generation. Requires NumPy.
+
+A batch is an (N, 8, 8) array of signed piece codes, 'piece_type.order + 1' for white pieces and its negative
+for black ones (0 for an empty square), or an (N, 12, 64) array of piece planes, 'color.value * 6 + order'
+indexing the plane. Square indices run row by row, 'row * BOARD_SIZE + col', as in the compact move codes.
+
+Every step works on whole arrays: pseudo-legal moves are generated for all positions at once, then each one is
+made on a copy of its board and kept if the king of the side to move is not attacked afterwards.
+The rules are those of 'GameController': no castling nor en passant, and promotions to queens only.
+"""
+import numpy as np
+from typing import Iterable, Optional
+from attack_tables import ALL_POSITIONS, KNIGHT_RAYS, KING_RAYS, PAWN_ATTACKS, DIRECTION_RAYS
+from fen import parse_fen
+from config import *
+
+SQUARE_COUNT = BOARD_SIZE * BOARD_SIZE
+PLANE_COUNT = 2 * len(PieceType)
+EMPTY_SQUARE_INDEX = SQUARE_COUNT  # an always empty square appended to the boards, to pad the ray tables
+
+PAWN_CODE, KNIGHT_CODE, BISHOP_CODE, ROOK_CODE, QUEEN_CODE, KING_CODE = \
+    (piece_type.order + 1 for piece_type in
+     (PieceType.PAWN, PieceType.KNIGHT, PieceType.BISHOP, PieceType.ROOK, PieceType.QUEEN, PieceType.KING))
+DIRECTIONS = ROOK_DIRECTIONS + BISHOP_DIRECTIONS
+
+
+def _index(position: tuple[int, int]) -> int:
+    return position[0] * BOARD_SIZE + position[1]
+
+
+def _build_target_table(targets_by_position: dict[tuple[int, int], Iterable[tuple[int, int]]]) -> np.ndarray:
+    """
+    Returns a (64, 64) boolean table, true at [from, to] for each target of a piece standing on 'from'.
+    """
+    table = np.zeros((SQUARE_COUNT, SQUARE_COUNT), dtype=bool)
+    for position, targets in targets_by_position.items():
+        for target in targets:
+            table[_index(position), _index(target)] = True
+    return table
+
+
+def _build_ray_table() -> np.ndarray:
+    """
+    Returns a (64, 8, 7) table of the squares along each direction from each square, ordered outwards,
+    padded with the always empty square past the edge of the board.
+    """
+    table = np.full((SQUARE_COUNT, len(DIRECTIONS), BOARD_SIZE - 1), EMPTY_SQUARE_INDEX, dtype=np.intp)
+    for position in ALL_POSITIONS:
+        for direction_index, direction in enumerate(DIRECTIONS):
+            for step, target in enumerate(DIRECTION_RAYS[position][direction]):
+                table[_index(position), direction_index, step] = _index(target)
+    return table
+
+
+KNIGHT_TARGETS = _build_target_table({position: rays.positions for position, rays in KNIGHT_RAYS.items()})
+KING_TARGETS = _build_target_table({position: rays.positions for position, rays in KING_RAYS.items()})
+PAWN_ATTACK_TARGETS = {color: _build_target_table(PAWN_ATTACKS[color]) for color in Color}
+RAYS = _build_ray_table()
+# Per direction, the codes of the pieces sliding along it
+SLIDER_CODES = [(ROOK_CODE, QUEEN_CODE) if direction in ROOK_DIRECTIONS else (BISHOP_CODE, QUEEN_CODE)
+                for direction in DIRECTIONS]
+PAWN_FORWARD = {Color.WHITE: BOARD_SIZE, Color.BLACK: -BOARD_SIZE}
+PAWN_START_ROW = {Color.WHITE: 1, Color.BLACK: BOARD_SIZE - 2}
+PROMOTION_ROW = {Color.WHITE: BOARD_SIZE - 1, Color.BLACK: 0}
+
+
+class BatchMoves:
+    """
+    The legal moves and check flags of a batch of positions.
+    """
+    def __init__(self, legal_move_masks: np.ndarray, check_flags: np.ndarray):
+        self.legal_move_masks = legal_move_masks  # (N, 64, 64) booleans, true at [n, from, to] for a legal move
+        self.check_flags = check_flags  # (N,) booleans, true if the side to move is under check
+
+    @property
+    def legal_move_counts(self) -> np.ndarray:
+        return self.legal_move_masks.sum(axis=(1, 2))
+
+
+def planes_to_boards(planes: np.ndarray) -> np.ndarray:
+    """
+    Converts (N, 12, 64) piece planes to (N, 8, 8) signed piece codes.
+    """
+    plane_codes = np.array([(piece_type.order + 1) * (1 if color is Color.WHITE else -1)
+                            for color in Color for piece_type in sorted(PieceType, key=lambda p: p.order)],
+                           dtype=np.int8)
+    codes = (planes.astype(np.int8) * plane_codes[None, :, None]).sum(axis=1, dtype=np.int8)
+    return codes.reshape(-1, BOARD_SIZE, BOARD_SIZE)
+
+
+def fens_to_boards(fens: Iterable[str]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the (N, 8, 8) signed piece codes of FEN positions, and whether white is to move in each of them.
+    """
+    boards, white_to_move = [], []
+    for fen in fens:
+        fen_position = parse_fen(fen)
+        board = np.zeros((BOARD_SIZE, BOARD_SIZE), dtype=np.int8)
+        for piece_type, color, positions in fen_position.layout:
+            for row, col in positions:
+                board[row, col] = (piece_type.order + 1) * (1 if color is Color.WHITE else -1)
+        boards.append(board)
+        white_to_move.append(fen_position.side_to_move is Color.WHITE)
+    return np.array(boards, dtype=np.int8).reshape(-1, BOARD_SIZE, BOARD_SIZE), np.array(white_to_move, dtype=bool)
+
+
+def _relative_boards(boards: np.ndarray, white_to_move: np.ndarray) -> np.ndarray:
+    """
+    Returns (N, 65) piece codes signed from the point of view of the side to move (positive for its pieces),
+    with the always empty square appended.
+    """
+    signs = np.where(white_to_move, 1, -1).astype(np.int8)
+    flat = boards.reshape(len(boards), SQUARE_COUNT) * signs[:, None]
+    return np.concatenate([flat, np.zeros((len(boards), 1), dtype=np.int8)], axis=1)
+
+
+def _first_occupants(relative: np.ndarray, squares: np.ndarray) -> np.ndarray:
+    """
+    Returns (M, 8) codes of the first piece met along each direction from one square per board, 0 if none.
+    """
+    ray_squares = RAYS[squares].reshape(len(squares), len(DIRECTIONS) * (BOARD_SIZE - 1))
+    ray_codes = np.take_along_axis(relative, ray_squares, axis=1)
+    ray_codes = ray_codes.reshape(len(squares), len(DIRECTIONS), BOARD_SIZE - 1)
+    first_steps = np.argmax(ray_codes != 0, axis=2)  # 0 if the ray is empty, where the code is 0 anyway
+    return np.take_along_axis(ray_codes, first_steps[:, :, None], axis=2)[:, :, 0]
+
+
+def _are_attacked_by_opponent(relative: np.ndarray, squares: np.ndarray, white_to_move: np.ndarray) -> np.ndarray:
+    """
+    Returns (M,) booleans, true if a square per board is attacked by the pieces of the side not to move,
+    which have negative codes on the relative boards.
+    """
+    opponent_at = [relative[:, :SQUARE_COUNT] == -code
+                   for code in (PAWN_CODE, KNIGHT_CODE, BISHOP_CODE, ROOK_CODE, QUEEN_CODE, KING_CODE)]
+    attacked = (KNIGHT_TARGETS[squares] & opponent_at[KNIGHT_CODE - 1]).any(axis=1)
+    attacked |= (KING_TARGETS[squares] & opponent_at[KING_CODE - 1]).any(axis=1)
+
+    # Pawn attacks are symmetric to the attacks of a pawn of the side to move standing on the square
+    pawn_sources = np.where(white_to_move[:, None], PAWN_ATTACK_TARGETS[Color.WHITE][squares],
+                            PAWN_ATTACK_TARGETS[Color.BLACK][squares])
+    attacked |= (pawn_sources & opponent_at[PAWN_CODE - 1]).any(axis=1)
+
+    first_occupants = _first_occupants(relative, squares)
+    for direction_index, codes in enumerate(SLIDER_CODES):
+        attacked |= np.isin(first_occupants[:, direction_index], [-code for code in codes])
+    return attacked
+
+
+def _king_squares(relative: np.ndarray) -> np.ndarray:
+    """
+    Returns the square of the king of the side to move on each board. Each board must have exactly one.
+    """
+    is_king = relative[:, :SQUARE_COUNT] == KING_CODE
+    if not (is_king.sum(axis=1) == 1).all():
+        raise ValueError("Every position must have exactly one king of the side to move.")
+    return np.argmax(is_king, axis=1)
+
+
+def _pseudo_legal_masks(relative: np.ndarray, white_to_move: np.ndarray) -> np.ndarray:
+    """
+    Returns (N, 64, 64) booleans, true at [n, from, to] for a move of the side to move that may leave its king
+    under check. Moves landing on a friendly piece are excluded.
+    """
+    count = len(relative)
+    squares = relative[:, :SQUARE_COUNT]
+    own, empty, enemy = squares > 0, squares == 0, squares < 0
+    masks = np.zeros((count, SQUARE_COUNT, SQUARE_COUNT), dtype=bool)
+
+    masks |= (squares == KNIGHT_CODE)[:, :, None] & KNIGHT_TARGETS[None]
+    masks |= (squares == KING_CODE)[:, :, None] & KING_TARGETS[None]
+
+    # Sliders walk each direction from all squares at once, while the previous square is empty
+    batch_index = np.arange(count)[:, None]
+    from_squares = np.arange(SQUARE_COUNT)[None, :]
+    for direction_index, codes in enumerate(SLIDER_CODES):
+        walking = np.isin(squares, codes)
+        for step in range(BOARD_SIZE - 1):
+            targets = RAYS[:, direction_index, step]
+            walking = walking & (targets != EMPTY_SQUARE_INDEX)[None, :]
+            batch, origin = np.nonzero(walking)
+            masks[batch, origin, targets[origin]] = True
+            walking = walking & (relative[batch_index, targets[None, :]] == 0)
+
+    # Pawns step forward onto empty squares, twice from their start row, and capture diagonally
+    for color, side in ((Color.WHITE, white_to_move), (Color.BLACK, ~white_to_move)):
+        pawns = (squares == PAWN_CODE) & side[:, None]
+        forward = PAWN_FORWARD[color]
+        rows = from_squares[0] // BOARD_SIZE
+        can_step = (rows != PROMOTION_ROW[color])[None, :] & pawns
+        batch, origin = np.nonzero(can_step)
+        one_step = origin + forward
+        is_free = empty[batch, one_step]
+        masks[batch[is_free], origin[is_free], one_step[is_free]] = True
+
+        is_start = (rows[origin] == PAWN_START_ROW[color]) & is_free
+        batch, origin = batch[is_start], origin[is_start]
+        two_steps = origin + 2 * forward
+        is_free = empty[batch, two_steps]
+        masks[batch[is_free], origin[is_free], two_steps[is_free]] = True
+
+        masks |= pawns[:, :, None] & PAWN_ATTACK_TARGETS[color][None] & enemy[:, None, :]
+
+    return masks & ~own[:, None, :]
+
+
+def generate_batch_moves(positions: np.ndarray, white_to_move: Optional[np.ndarray] = None) -> BatchMoves:
+    """
+    Returns the legal moves and check flags of a batch of (N, 8, 8) signed piece codes or (N, 12, 64) planes.
+    'white_to_move' holds (N,) booleans, white is to move in every position by default.
+    """
+    positions = np.asarray(positions)
+    boards = planes_to_boards(positions) if positions.shape[1:] == (PLANE_COUNT, SQUARE_COUNT) \
+        else positions.reshape(-1, BOARD_SIZE, BOARD_SIZE).astype(np.int8)
+    count = len(boards)
+    white_to_move = np.ones(count, dtype=bool) if white_to_move is None else np.asarray(white_to_move, dtype=bool)
+
+    relative = _relative_boards(boards, white_to_move)
+    king_squares = _king_squares(relative)
+    check_flags = _are_attacked_by_opponent(relative, king_squares, white_to_move)
+
+    masks = _pseudo_legal_masks(relative, white_to_move)
+
+    # Make every pseudo-legal move on a copy of its board, promoting pawns reaching the last row to queens
+    batch, origin, target = np.nonzero(masks)
+    made = relative[batch].copy()
+    moved_codes = made[np.arange(len(batch)), origin]
+    is_promotion = (moved_codes == PAWN_CODE) & np.isin(target // BOARD_SIZE, [0, BOARD_SIZE - 1])
+    made[np.arange(len(batch)), target] = np.where(is_promotion, QUEEN_CODE, moved_codes)
+    made[np.arange(len(batch)), origin] = 0
+
+    moved_king_squares = np.where(moved_codes == KING_CODE, target, king_squares[batch])
+    is_legal = ~_are_attacked_by_opponent(made, moved_king_squares, white_to_move[batch])
+
+    legal_move_masks = np.zeros_like(masks)
+    legal_move_masks[batch[is_legal], origin[is_legal], target[is_legal]] = True
+    return BatchMoves(legal_move_masks, check_flags)
+
+
+def validate_against_game_controller(fens: list[str]) -> list[str]:
+    """
+    Compares the batch results on FEN positions with 'GameController', position by position.
+    Returns the FENs of the positions on which they differ.
+    """
+    from perft import create_controller
+
+    boards, white_to_move = fens_to_boards(fens)
+    batch_moves = generate_batch_moves(boards, white_to_move)
+
+    mismatches = []
+    for index, fen in enumerate(fens):
+        controller, color = create_controller(fen)
+        expected = {(_index(move.square_initial.position), _index(move.square_final.position))
+                    for move in controller.generate_legal_moves(color)}
+        found = {(int(origin), int(target)) for origin, target in np.argwhere(batch_moves.legal_move_masks[index])}
+        if found != expected or bool(batch_moves.check_flags[index]) != controller.is_king_threatened(color):
+            mismatches.append(fen)
+    return mismatches
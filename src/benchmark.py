@@ -0,0 +1,187 @@
+# benchmark.py
+"""
+Micro benchmarks for the hot paths of the game logic.
+Run directly: python benchmark.py
+"""
+from copy import deepcopy
+from timeit import timeit
+import inspect
+import tracemalloc
+from random import Random
+import search
+from game_manager import GameManager
+from game_controller import GameController
+from move import Move
+from session_manager import SessionManager
+from config import *
+
+
+def _create_checked_game() -> GameManager:
+    """
+    Returns a game in which white is to move while under check (1. e4 f5 2. Qh5+ ... with colors reversed).
+    """
+    game_manager = GameManager()
+    for position_initial, position_final in (((1, 5), (2, 5)), ((6, 4), (4, 4)), ((1, 0), (2, 0)),
+                                             ((7, 3), (3, 7))):
+        piece = game_manager.board_manager.get_square(*position_initial).occupant
+        move = game_manager.controller.move_factory.create(piece, position_final)
+        game_manager.execute_update_validate_on_move(move)
+    assert game_manager.check_status is CheckStatus.WHITE_UNDER_CHECK
+    return game_manager
+
+
+def _deepcopy_is_unchecking_king(controller: GameController, move: Move) -> bool:
+    """
+    The former implementation of 'GameManager._is_unchecking_king', kept as a baseline for comparison.
+    """
+    controller_copy = deepcopy(controller)
+    piece_copy = controller_copy.board_manager.get_square(*move.piece.square.position).occupant
+    move_copy = controller_copy.move_factory.create(piece=piece_copy, position_final=move.square_final.position)
+    controller_copy.initiate_move_and_related_methods(move_copy)
+
+    my_king_copy = controller_copy.white_king if piece_copy.color is Color.WHITE else controller_copy.black_king
+    opponent_pieces_copy = controller_copy.board_manager.black_pieces if piece_copy.color is Color.WHITE \
+        else controller_copy.board_manager.white_pieces
+
+    for piece in opponent_pieces_copy:
+        if my_king_copy.square in controller_copy.get_threatened_squares(piece):
+            return False
+
+    return True
+
+
+def benchmark_unchecking_king(repetitions: int = 200) -> dict[str, float]:
+    """
+    Times the check resolution of a single move, by deep copying vs. make/unmake on the live board.
+    Returns the mean cost per move in microseconds for each approach.
+    """
+    game_manager = _create_checked_game()
+    controller = game_manager.controller
+    pawn = controller.board_manager.get_square(1, 6).occupant
+    move = controller.move_factory.create(pawn, (2, 6))  # blocks the check
+
+    assert _deepcopy_is_unchecking_king(controller, move) == controller.is_leaving_king_safe(move)
+
+    return {
+        'deepcopy': timeit(lambda: _deepcopy_is_unchecking_king(controller, move), number=repetitions)
+        / repetitions * 1e6,
+        'make_unmake': timeit(lambda: controller.is_leaving_king_safe(move), number=repetitions)
+        / repetitions * 1e6,
+    }
+
+
+def benchmark_board_backends(repetitions: int = 20) -> dict[str, float]:
+    """
+    Times listing the legal moves of every piece plus a king threat query, from the initial position.
+    Returns the mean cost per position in microseconds for each board backend.
+    """
+    results = {}
+    for backend_type in BoardBackendType:
+        controller = GameController(backend_type)
+        pieces = list(controller.board_manager.white_pieces | controller.board_manager.black_pieces)
+
+        def run():
+            for piece in pieces:
+                controller.get_legal_moves(piece)
+            controller.is_king_threatened(Color.WHITE)
+
+        results[backend_type.name.lower()] = timeit(run, number=repetitions) / repetitions * 1e6
+    return results
+
+
+def benchmark_legal_move_generation(repetitions: int = 20) -> dict[str, float]:
+    """
+    Times getting every legal move of the side under check, piece by piece vs. in one bulk pass.
+    Returns the mean cost per position in microseconds for each approach.
+    """
+    controller = _create_checked_game().controller
+    pieces = list(controller.board_manager.white_pieces)
+
+    def per_piece():
+        return [move for piece in pieces for moves in controller.get_legal_moves(piece).values() for move in moves
+                if controller.is_leaving_king_safe(move)]
+
+    assert len(per_piece()) == len(controller.generate_legal_moves(Color.WHITE))
+
+    return {
+        'per_piece': timeit(per_piece, number=repetitions) / repetitions * 1e6,
+        'bulk': timeit(lambda: controller.generate_legal_moves(Color.WHITE), number=repetitions) / repetitions * 1e6,
+    }
+
+
+def measure_memory_per_game(games: int = 100) -> float:
+    """
+    Measures the memory held by live games in the initial position, as hosted by a server process.
+    Returns the mean memory per game in kibibytes.
+    """
+    GameManager()  # imports and import-time tables are not accounted to the games
+    tracemalloc.start()
+    try:
+        live_games = [GameManager() for _ in range(games)]
+        memory = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    assert len(live_games) == games
+    return memory / games / 1024
+
+
+def _get_table_store_line() -> int:
+    """
+    Returns the line of 'TranspositionTable.store' allocating the entries of the table.
+    """
+    lines, first_line = inspect.getsourcelines(search.TranspositionTable.store)
+    return first_line + next(index for index, line in enumerate(lines) if 'self.entries[index] =' in line)
+
+
+def measure_memory_per_session(sessions: int = 20, plies: int = 40) -> float:
+    """
+    Measures the memory held by hosted games after random plies, their legal moves queried on every ply and
+    a short search on every fourth. The entries of the transposition table shared by the sessions are not
+    accounted to them, the searchers and the rest of the memory of the searches are.
+    Returns the mean memory per game in kibibytes.
+    """
+    session_manager = SessionManager(max_sessions=sessions)
+    warm_up_session = session_manager.create_session()  # imports and import-time tables are not accounted
+    session_manager.get_api_manager(warm_up_session).get_best_move(1)
+    session_manager.close_session(warm_up_session)
+
+    table_entries = tracemalloc.Filter(False, search.__file__, _get_table_store_line())
+    rng = Random(0)
+    tracemalloc.start()
+    try:
+        for _ in range(sessions):
+            api_manager = session_manager.get_api_manager(session_manager.create_session())
+            for ply in range(plies):
+                legal_moves = api_manager.generate_legal_moves(api_manager.get_current_player())
+                if not legal_moves:
+                    break
+                if ply % 4 == 0:
+                    api_manager.get_best_move(20)
+                position = rng.choice(sorted(legal_moves))
+                api_manager.execute_move_by_position(position, rng.choice(sorted(legal_moves[position])))
+        snapshot = tracemalloc.take_snapshot().filter_traces([table_entries])
+    finally:
+        tracemalloc.stop()
+    assert len(session_manager) == sessions
+    return sum(statistic.size for statistic in snapshot.statistics('filename')) / sessions / 1024
+
+
+def _print_results(title: str, results: dict[str, float]) -> None:
+    print(title)
+    for name, microseconds in results.items():
+        print(f"\t{name:>12}: {microseconds:10.1f} us")
+
+
+def main():
+    results = benchmark_unchecking_king()
+    _print_results("Check resolution per move:", results)
+    print(f"\t{'speedup':>12}: {results['deepcopy'] / results['make_unmake']:10.1f}x")
+
+    _print_results("Legal moves of all pieces per position:", benchmark_board_backends())
+    _print_results("Legal moves of the side under check:", benchmark_legal_move_generation())
+    print(f"Memory per live game: {measure_memory_per_game():.1f} KiB")
+    print(f"Memory per hosted game, searched: {measure_memory_per_session():.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
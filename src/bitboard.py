@@ -0,0 +1,82 @@
+# bitboard.py
+"""
+A bitboard board backend. The position is kept as 64-bit occupancy masks, one per color and one for both,
+so that occupancy and line queries become a handful of integer operations.
+Bit index of a square is row * BOARD_SIZE + col.
+"""
+from config import *
+from square import Square
+from board_backend import BoardBackend
+from attack_tables import DIRECTION_RAYS
+
+
+def square_index(row: int, col: int) -> int:
+    return row * BOARD_SIZE + col
+
+
+def _build_step_masks(targets_table: dict[tuple[int, int], tuple[tuple[int, int], ...]]) -> list[int]:
+    """
+    Returns a mask per square of the targets of a leaper standing on it.
+    """
+    masks = [0] * BOARD_SIZE ** 2
+    for position, targets in targets_table.items():
+        for target in targets:
+            masks[square_index(*position)] |= 1 << square_index(*target)
+    return masks
+
+
+RAY_MASKS = {direction: _build_step_masks({position: rays[direction] for position, rays in DIRECTION_RAYS.items()})
+             for direction in ROOK_DIRECTIONS + BISHOP_DIRECTIONS}
+
+
+def _build_between_masks() -> list[list[int]]:
+    """
+    Returns a mask per pair of squares of the squares strictly between them, if they share a line, otherwise 0.
+    """
+    between = [[0] * BOARD_SIZE ** 2 for _ in range(BOARD_SIZE ** 2)]
+    for direction, masks in RAY_MASKS.items():
+        opposite_masks = RAY_MASKS[(-direction[0], -direction[1])]
+        for index1 in range(BOARD_SIZE ** 2):
+            ray = masks[index1]
+            while ray:
+                index2 = (ray & -ray).bit_length() - 1
+                between[index1][index2] = masks[index1] & opposite_masks[index2]
+                ray &= ray - 1
+    return between
+
+
+BETWEEN_MASKS = _build_between_masks()
+
+
+class BitboardBackend(BoardBackend):
+    def __init__(self, board: list[list[Square]]):
+        self.color_masks: dict[Color, int] = {Color.WHITE: 0, Color.BLACK: 0}
+        self.occupancy = 0
+
+        # Sync with the pieces already placed on the board
+        for row in board:
+            for square in row:
+                if square.occupant is not None:
+                    self.on_piece_set(square.occupant, square)
+
+    def on_piece_set(self, piece: 'ChessPiece', square: Square) -> None:
+        bit = 1 << square_index(*square.position)
+        self.color_masks[piece.color] |= bit
+        self.occupancy |= bit
+
+    def on_piece_removed(self, piece: 'ChessPiece', square: Square) -> None:
+        bit = ~(1 << square_index(*square.position))
+        self.color_masks[piece.color] &= bit
+        self.occupancy &= bit
+
+    def is_occupied(self, row: int, col: int) -> bool:
+        return (self.occupancy >> square_index(row, col)) & 1 == 1
+
+    def is_clean_line(self, position1: tuple[int, int], position2: tuple[int, int]) -> bool:
+        return BETWEEN_MASKS[square_index(*position1)][square_index(*position2)] & self.occupancy == 0
+
+    def get_occupancy_mask(self, color: Color = None) -> int:
+        """
+        Returns the occupancy of the specified color, or of both colors if no color is specified.
+        """
+        return self.occupancy if color is None else self.color_masks[color]
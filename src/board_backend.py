@@ -0,0 +1,70 @@
+# board_backend.py
+"""
+Storage engines sitting behind the 'BoardManager' queries.
+"""
+from abc import ABC, abstractmethod
+from config import *
+from square import Square
+
+
+class BoardBackend(ABC):
+    """
+    A board backend answers occupancy and line queries for the 'BoardManager',
+    and is notified of every piece placed on or removed from a square.
+    """
+
+    @abstractmethod
+    def on_piece_set(self, piece: 'ChessPiece', square: Square) -> None:
+        pass
+
+    @abstractmethod
+    def on_piece_removed(self, piece: 'ChessPiece', square: Square) -> None:
+        pass
+
+    @abstractmethod
+    def is_occupied(self, row: int, col: int) -> bool:
+        pass
+
+    @abstractmethod
+    def is_clean_line(self, position1: tuple[int, int], position2: tuple[int, int]) -> bool:
+        """
+        Returns true if all squares between two positions sharing a line are unoccupied.
+        """
+        pass
+
+
+class SquareListBackend(BoardBackend):
+    """
+    The default backend, answering every query by walking the list of squares.
+    """
+
+    def __init__(self, board: list[list[Square]]):
+        self.board = board
+
+    def on_piece_set(self, piece: 'ChessPiece', square: Square) -> None:
+        pass  # the squares themselves hold the state
+
+    def on_piece_removed(self, piece: 'ChessPiece', square: Square) -> None:
+        pass  # the squares themselves hold the state
+
+    def is_occupied(self, row: int, col: int) -> bool:
+        return self.board[row][col].occupant is not None
+
+    def is_clean_line(self, position1: tuple[int, int], position2: tuple[int, int]) -> bool:
+        row1, col1 = position1
+        row2, col2 = position2
+
+        row_step = (row2 > row1) - (row2 < row1)
+        col_step = (col2 > col1) - (col2 < col1)
+
+        curr_row, curr_col = row1 + row_step, col1 + col_step
+
+        # Iterate through squares between the two positions
+        while (curr_row, curr_col) != (row2, col2):
+            if self.board[curr_row][curr_col].occupant is not None:
+                return False
+
+            curr_row += row_step
+            curr_col += col_step
+
+        return True
@@ -2,28 +2,121 @@
 from config import *
 from chess_piece import ChessPiece, ChessPieceFactory, King
 from square import Square
-from typing import Callable
+from board_backend import BoardBackend, SquareListBackend
+from bitboard import BitboardBackend
+from attack_map import AttackMap
+from typing import Callable, Collection, Iterable, Optional
+
+# A board layout lists the pieces to place as (piece type, color, positions), like the values of 'InitPiece'
+Layout = Iterable[tuple[PieceType, Color, list[tuple[int, int]]]]
 
 
 class BoardManager:
-    def __init__(self, callback_initialize_piece_on_board_setup: Callable[[ChessPiece, Square, 'BoardSetup'], None]):
-        self.board_setup = BoardSetup(callback_initialize_piece_on_board_setup)
+    def __init__(self, callback_initialize_piece_on_board_setup: Callable[[ChessPiece, Square, 'BoardSetup'], None],
+                 backend_type: BoardBackendType = BoardBackendType.SQUARE_LIST, layout: Optional[Layout] = None):
+        self.board_setup = BoardSetup(callback_initialize_piece_on_board_setup, layout)
         self.board: list[list[Square]] = self.board_setup.board
         self.white_pieces: set[ChessPiece] = self.board_setup.white_pieces
         self.black_pieces: set[ChessPiece] = self.board_setup.black_pieces
-        self.white_king: King = next(piece for piece in self.white_pieces if isinstance(piece, King))
-        self.black_king: King = next(piece for piece in self.black_pieces if isinstance(piece, King))
+        self.white_king: King = self._find_single_king(self.white_pieces)
+        self.black_king: King = self._find_single_king(self.black_pieces)
+        self.backend: BoardBackend = self._create_backend(backend_type)
+        self.attack_map = AttackMap(self.board)
+        self.version = 0  # incremented on every change of the board, to invalidate position-dependent caches
+
+    @staticmethod
+    def _find_single_king(pieces: set[ChessPiece]) -> King:
+        kings = [piece for piece in pieces if isinstance(piece, King)]
+        if len(kings) != 1:
+            raise ValueError("A board layout must place exactly one king of each color.")
+        return kings[0]
+
+    def _create_backend(self, backend_type: BoardBackendType) -> BoardBackend:
+        if backend_type is BoardBackendType.SQUARE_LIST:
+            return SquareListBackend(self.board)
+        elif backend_type is BoardBackendType.BITBOARD:
+            return BitboardBackend(self.board)
+        else:
+            raise ValueError("Invalid board backend type")
 
     def get_square(self, row, col) -> Square:
         return self.board[row][col]
 
     def is_occupied(self, row, col):
-        return self.get_square(row, col).occupant is not None
+        return self.backend.is_occupied(row, col)
+
+    def is_clean_line(self, position1: tuple[int, int], position2: tuple[int, int]) -> bool:
+        """
+        Returns true if all squares between two positions sharing a line are unoccupied.
+        """
+        return self.backend.is_clean_line(position1, position2)
+
+    def is_square_attacked(self, position: tuple[int, int], by_color: Color) -> bool:
+        """
+        Returns true if any piece of 'by_color' attacks the square at the specified position.
+        """
+        return self.attack_map.get_count(position, by_color) > 0
+
+    def get_attack_count(self, position: tuple[int, int], by_color: Color) -> int:
+        """
+        Returns the number of pieces of 'by_color' attacking the square at the specified position.
+        """
+        return self.attack_map.get_count(position, by_color)
+
+    def get_attacked_positions(self, piece: ChessPiece) -> Collection[tuple[int, int]]:
+        """
+        Returns the positions attacked by a piece on the board, whether or not it may legally move there.
+        """
+        return self.attack_map.get_attacked_positions(piece)
+
+    @staticmethod
+    def link_piece(piece: ChessPiece, square: Square) -> None:
+        """
+        Links a piece and a square to each other, without notifying the backend.
+        """
+        if piece.square is not None:
+            raise ValueError("Piece must be removed from its current square before being placed on another.")
+
+        if square.occupant is not None:
+            raise ValueError("Square must be void before placing a piece on it.")
+
+        piece.square = square
+        square.occupant = piece
+
+    @staticmethod
+    def unlink_piece(piece: ChessPiece, square: Square) -> None:
+        """
+        Unlinks a piece and the square it occupies, without notifying the backend.
+        """
+        assert square.occupant is piece, "'square.occupant' must refer to the specified 'piece' to be removed."
+        assert piece.square is square, "'piece.square' must refer to the specified 'square' to be removed from."
+        piece.square = None
+        square.occupant = None
+
+    def set_piece(self, piece: ChessPiece, square: Square) -> None:
+        """
+        Place a piece on a square, keeping the backend and the attack map in sync.
+        """
+        self.link_piece(piece, square)
+        self.backend.on_piece_set(piece, square)
+        self.attack_map.on_piece_set(piece, square)
+        self.version += 1
+
+    def remove_piece(self, piece: ChessPiece, square: Square) -> None:
+        """
+        Remove the piece occupying the square, keeping the backend and the attack map in sync.
+        """
+        self.unlink_piece(piece, square)
+        self.backend.on_piece_removed(piece, square)
+        self.attack_map.on_piece_removed(piece, square)
+        self.version += 1
 
 
 class BoardSetup:
-    def __init__(self, callback_initialize_piece_on_board_setup: Callable[[ChessPiece, Square, 'BoardSetup'], None]):
+    def __init__(self, callback_initialize_piece_on_board_setup: Callable[[ChessPiece, Square, 'BoardSetup'], None],
+                 layout: Optional[Layout] = None):
         self.callback_initialize_piece_on_board_setup = callback_initialize_piece_on_board_setup
+        self.layout: Layout = layout if layout is not None else [init_piece.value for init_piece in InitPiece]
         self.board: list[list[Square]] = self._create_blank_board()
         self.chess_piece_factory = ChessPieceFactory()
         self.white_pieces = set()
@@ -50,7 +143,6 @@ class BoardSetup:
         self.callback_initialize_piece_on_board_setup(piece, square, self)
 
     def _place_all_pieces(self):
-        for init_piece in InitPiece:
-            piece_type, color, positions = init_piece.value
+        for piece_type, color, positions in self.layout:
             for pose in positions:
                 self._place_single_piece(piece_type, color, pose)
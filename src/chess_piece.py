@@ -2,102 +2,96 @@
 from abc import ABC, abstractmethod
 from square import Square
 from config import *
+from attack_tables import SquareRays, PAWN_RAYS, KNIGHT_RAYS, BISHOP_RAYS, ROOK_RAYS, QUEEN_RAYS, KING_RAYS
 
 
 class ChessPiece(ABC):
+    __slots__ = ('piece_type', 'color', 'square')
+
     def __init__(self, piece_type: PieceType, color: Color):
         self.piece_type = piece_type
         self.color = color
         self.square = None
 
     @abstractmethod
-    def _hypothetical_move_deltas(self) -> set[tuple[int, int]]:
+    def _get_square_rays(self) -> SquareRays:
         """
-        Generates all potential moves deltas for a piece of that type.
-        Coordinates represents the delta in position of which it might move to.
+        Returns the precomputed rays of a piece of that type standing on its current square.
+        Only board-constrained positions are included, ordered outwards from the square along each ray.
         """
         pass
 
-    def _position_delta_to_final_position(self, delta: tuple[int, int]) -> tuple[int, int]:
-        """
-        Returns the position of the square that is delta away from the current square.
-        """
-        row, col = self.square.position
-        d_row, d_col = delta
-        row_f, col_f = row + d_row, col + d_col
-        return row_f, col_f
-
-    def _delta_set_to_final_position_set(self, deltas: set[tuple[int, int]]) -> set[tuple[int, int]]:
+    def get_hypothetical_moves_rays(self) -> tuple[tuple[tuple[int, int], ...], ...]:
         """
-        Returns the set of positions that are delta away from the current square.
+        Returns the ordered rays of positions that this piece can step to.
         """
-        return {self._position_delta_to_final_position(delta) for delta in deltas}
+        return self._get_square_rays().rays
 
-    def get_hypothetical_moves_final_positions(self) -> set[tuple[int, int]]:
+    def get_hypothetical_moves_final_positions(self) -> frozenset[tuple[int, int]]:
         """
         Returns the set of positions that this piece can step to.
         """
-        return self._delta_set_to_final_position_set(self._hypothetical_move_deltas())
+        return self._get_square_rays().positions
 
 
 class Pawn(ChessPiece):
+    __slots__ = ()
+
     def __init__(self, color: Color):
         super().__init__(piece_type=PieceType.PAWN, color=color)
 
-    def _hypothetical_move_deltas(self) -> set[tuple[int, int]]:
-
-        if self.color == Color.WHITE:
-            steps = HypotheticalPositionDeltas.PAWN_WHITE
-
-            if self.square.position[0] == 1:
-                steps = HypotheticalPositionDeltas.PAWN_WHITE_START
-        else:
-            steps = HypotheticalPositionDeltas.PAWN_BLACK
-
-            if self.square.position[0] == 6:
-                steps = HypotheticalPositionDeltas.PAWN_BLACK_START
-
-        return steps.value
+    def _get_square_rays(self) -> SquareRays:
+        return PAWN_RAYS[self.color][self.square.position]
 
 
 class Knight(ChessPiece):
+    __slots__ = ()
+
     def __init__(self, color: Color):
         super().__init__(piece_type=PieceType.KNIGHT, color=color)
 
-    def _hypothetical_move_deltas(self) -> set[tuple[int, int]]:
-        return HypotheticalPositionDeltas.KNIGHT.value
+    def _get_square_rays(self) -> SquareRays:
+        return KNIGHT_RAYS[self.square.position]
 
 
 class Bishop(ChessPiece):
+    __slots__ = ()
+
     def __init__(self, color: Color):
         super().__init__(piece_type=PieceType.BISHOP, color=color)
 
-    def _hypothetical_move_deltas(self) -> set[tuple[int, int]]:
-        return HypotheticalPositionDeltas.BISHOP.value
+    def _get_square_rays(self) -> SquareRays:
+        return BISHOP_RAYS[self.square.position]
 
 
 class Rook(ChessPiece):
+    __slots__ = ()
+
     def __init__(self, color: Color):
         super().__init__(piece_type=PieceType.ROOK, color=color)
 
-    def _hypothetical_move_deltas(self) -> set[tuple[int, int]]:
-        return HypotheticalPositionDeltas.ROOK.value
+    def _get_square_rays(self) -> SquareRays:
+        return ROOK_RAYS[self.square.position]
 
 
 class Queen(ChessPiece):
+    __slots__ = ()
+
     def __init__(self, color: Color):
         super().__init__(piece_type=PieceType.QUEEN, color=color)
 
-    def _hypothetical_move_deltas(self) -> set[tuple[int, int]]:
-        return HypotheticalPositionDeltas.QUEEN.value
+    def _get_square_rays(self) -> SquareRays:
+        return QUEEN_RAYS[self.square.position]
 
 
 class King(ChessPiece):
+    __slots__ = ()
+
     def __init__(self, color: Color):
         super().__init__(piece_type=PieceType.KING, color=color)
 
-    def _hypothetical_move_deltas(self) -> set[tuple[int, int]]:
-        return HypotheticalPositionDeltas.KING.value
+    def _get_square_rays(self) -> SquareRays:
+        return KING_RAYS[self.square.position]
 
 
 class ChessPieceFactory:
@@ -2,6 +2,8 @@
 from enum import Enum
 
 BOARD_SIZE = 8
+FIFTY_MOVE_RULE_PLIES = 100  # a draw once this many plies passed without a capture or a pawn move
+REPETITION_DRAW_COUNT = 3  # a draw once the same position occurred this many times
 
 
 class Color(Enum):
@@ -34,6 +36,22 @@ class HistoryTag(Enum):
     PROMOTION = 3
 
 
+class CastlingRight(Enum):
+    """
+    Enum representing the castling rights of a game, with the initial position of the castling rook.
+    Note that castling moves themselves are not implemented yet, rights are tracked for the position's notation.
+    """
+    WHITE_KINGSIDE = 'K', Color.WHITE, (0, 7)
+    WHITE_QUEENSIDE = 'Q', Color.WHITE, (0, 0)
+    BLACK_KINGSIDE = 'k', Color.BLACK, (7, 7)
+    BLACK_QUEENSIDE = 'q', Color.BLACK, (7, 0)
+
+    def __init__(self, symbol, color, rook_position):
+        self.symbol = symbol
+        self.color = color
+        self.rook_position = rook_position
+
+
 class InitPiece(Enum):
     """
     Enum representing the initial information of a chess piece
@@ -88,7 +106,8 @@ class MoveScope(Enum):
 
     LEGAL = 3
     """
-    Legal Move: Includes Unobstructed Moves that don't reveal the king to a check and don't land on a friendly piece.
+    Legal Move: Includes Unobstructed Moves that don't leave or put the own king under check
+    and don't land on a friendly piece.
     """
 
     STEP = 4
@@ -125,6 +144,18 @@ class LineType(Enum):
     KNIGHT_MOVE = 4
 
 
+ROOK_DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+BISHOP_DIRECTIONS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+
+
+class BoardBackendType(Enum):
+    """
+    Enum representing the available storage engines behind the 'BoardManager'.
+    """
+    SQUARE_LIST = 0
+    BITBOARD = 1
+
+
 class HypotheticalPositionDeltas(Enum):
     """
     Hypothetical Position Deltas: Represents all conceivable deltas in position a piece can make,
@@ -139,10 +170,10 @@ class HypotheticalPositionDeltas(Enum):
 
     # Deltas for class MajorChessPiece (of which steps and captures are the same)
     KNIGHT = {(2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2)}
-    BISHOP = {(i, j) for i in (range(-BOARD_SIZE + 1, BOARD_SIZE - 1)) for j in (i, -i) if i != 0}
-    ROOK = {(i, j) for k in (range(-BOARD_SIZE + 1, BOARD_SIZE - 1)) for i, j in ((k, 0), (0, k)) if k != 0}
-    QUEEN = {(i, j) for i in (range(-BOARD_SIZE + 1, BOARD_SIZE - 1)) for j in (i, -i) if i != 0}.union(
-        {(i, j) for k in (range(-BOARD_SIZE + 1, BOARD_SIZE - 1)) for i, j in ((k, 0), (0, k)) if k != 0})
+    BISHOP = {(i, j) for i in (range(-BOARD_SIZE + 1, BOARD_SIZE)) for j in (i, -i) if i != 0}
+    ROOK = {(i, j) for k in (range(-BOARD_SIZE + 1, BOARD_SIZE)) for i, j in ((k, 0), (0, k)) if k != 0}
+    QUEEN = {(i, j) for i in (range(-BOARD_SIZE + 1, BOARD_SIZE)) for j in (i, -i) if i != 0}.union(
+        {(i, j) for k in (range(-BOARD_SIZE + 1, BOARD_SIZE)) for i, j in ((k, 0), (0, k)) if k != 0})
     KING = {(i, j) for i in (-1, 0, 1) for j in (-1, 0, 1) if (i, j) != (0, 0)}
 
 
@@ -154,6 +185,8 @@ class GameStatus(Enum):
     WHITE_WIN = 1
     BLACK_WIN = 2
     STALEMATE = 3
+    FIFTY_MOVE_DRAW = 4
+    THREEFOLD_REPETITION = 5
 
 
 class CheckStatus(Enum):
@@ -0,0 +1,133 @@
+# fen.py
+"""
+Forsyth-Edwards Notation (FEN) support.
+Ranks are listed from the 8th to the 1st, so FEN rank 8 maps to board row 7 and file 'a' to column 0.
+"""
+from config import *
+from square import Square
+from typing import Optional
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+FEN_PIECE_TYPES = {'p': PieceType.PAWN, 'n': PieceType.KNIGHT, 'b': PieceType.BISHOP,
+                   'r': PieceType.ROOK, 'q': PieceType.QUEEN, 'k': PieceType.KING}
+FEN_PIECE_SYMBOLS = {piece_type: symbol for symbol, piece_type in FEN_PIECE_TYPES.items()}
+FEN_COLORS = {'w': Color.WHITE, 'b': Color.BLACK}
+FILES = 'abcdefgh'
+
+
+class FenPosition:
+    """
+    The fields of a FEN string.
+    """
+    def __init__(self, layout: list[tuple[PieceType, Color, list[tuple[int, int]]]], side_to_move: Color,
+                 castling_rights: frozenset[CastlingRight], en_passant_position: Optional[tuple[int, int]],
+                 halfmove_clock: int, fullmove_number: int):
+        self.layout = layout
+        self.side_to_move = side_to_move
+        self.castling_rights = castling_rights
+        self.en_passant_position = en_passant_position
+        self.halfmove_clock = halfmove_clock
+        self.fullmove_number = fullmove_number
+
+
+def position_to_algebraic(position: tuple[int, int]) -> str:
+    row, col = position
+    return f"{FILES[col]}{row + 1}"
+
+
+def algebraic_to_position(square_name: str) -> tuple[int, int]:
+    if len(square_name) != 2 or square_name[0] not in FILES or square_name[1] not in '12345678':
+        raise ValueError(f"Invalid square name: '{square_name}'")
+    return int(square_name[1]) - 1, FILES.index(square_name[0])
+
+
+def parse_fen_placement(placement: str) -> list[tuple[PieceType, Color, list[tuple[int, int]]]]:
+    """
+    Parses the piece placement field of a FEN string into a board layout.
+    """
+    ranks = placement.split('/')
+    if len(ranks) != BOARD_SIZE:
+        raise ValueError(f"Invalid FEN placement, expected {BOARD_SIZE} ranks: '{placement}'")
+
+    positions: dict[tuple[PieceType, Color], list[tuple[int, int]]] = {}
+    for rank_index, rank in enumerate(ranks):
+        row, col = BOARD_SIZE - 1 - rank_index, 0
+        for symbol in rank:
+            if symbol.isdigit():
+                col += int(symbol)
+                continue
+            if symbol.lower() not in FEN_PIECE_TYPES or col >= BOARD_SIZE:
+                raise ValueError(f"Invalid FEN placement rank: '{rank}'")
+            piece_type = FEN_PIECE_TYPES[symbol.lower()]
+            if piece_type is PieceType.PAWN and row in (0, BOARD_SIZE - 1):
+                raise ValueError(f"Invalid FEN placement, pawn on the first or last rank: '{rank}'")
+            color = Color.WHITE if symbol.isupper() else Color.BLACK
+            positions.setdefault((piece_type, color), []).append((row, col))
+            col += 1
+        if col != BOARD_SIZE:
+            raise ValueError(f"Invalid FEN placement rank: '{rank}'")
+
+    return [(piece_type, color, piece_positions) for (piece_type, color), piece_positions in positions.items()]
+
+
+def _parse_castling_rights(field: str) -> frozenset[CastlingRight]:
+    if field == '-':
+        return frozenset()
+    rights_by_symbol = {right.symbol: right for right in CastlingRight}
+    if any(symbol not in rights_by_symbol for symbol in field):
+        raise ValueError(f"Invalid FEN castling rights: '{field}'")
+    return frozenset(rights_by_symbol[symbol] for symbol in field)
+
+
+def parse_fen(fen: str) -> FenPosition:
+    """
+    Parses a FEN string. The side to move, castling, en passant and clock fields may be omitted,
+    in which case white is to move, with no castling rights, no en passant square and fresh clocks.
+    """
+    fields = fen.split()
+    if not 1 <= len(fields) <= 6:
+        raise ValueError(f"Invalid FEN, expected 1 to 6 fields: '{fen}'")
+    placement, side, castling, en_passant, halfmove, fullmove = fields + ['w', '-', '-', '0', '1'][len(fields) - 1:]
+
+    if side not in FEN_COLORS:
+        raise ValueError(f"Invalid FEN side to move: '{side}'")
+    if not (halfmove.isdigit() and fullmove.isdigit()):
+        raise ValueError(f"Invalid FEN clocks: '{halfmove} {fullmove}'")
+
+    return FenPosition(layout=parse_fen_placement(placement),
+                       side_to_move=FEN_COLORS[side],
+                       castling_rights=_parse_castling_rights(castling),
+                       en_passant_position=None if en_passant == '-' else algebraic_to_position(en_passant),
+                       halfmove_clock=int(halfmove),
+                       fullmove_number=int(fullmove))
+
+
+def format_fen_placement(board: list[list[Square]]) -> str:
+    """
+    Returns the piece placement field of a FEN string for a board of squares.
+    """
+    ranks = []
+    for row in range(BOARD_SIZE - 1, -1, -1):
+        rank, empty_count = '', 0
+        for square in board[row]:
+            if square.occupant is None:
+                empty_count += 1
+                continue
+            if empty_count:
+                rank, empty_count = rank + str(empty_count), 0
+            symbol = FEN_PIECE_SYMBOLS[square.occupant.piece_type]
+            rank += symbol.upper() if square.occupant.color is Color.WHITE else symbol
+        ranks.append(rank + (str(empty_count) if empty_count else ''))
+    return '/'.join(ranks)
+
+
+def format_fen(board: list[list[Square]], side_to_move: Color, castling_rights: frozenset[CastlingRight],
+               en_passant_position: Optional[tuple[int, int]], halfmove_clock: int, fullmove_number: int) -> str:
+    """
+    Returns the FEN string of a position.
+    """
+    castling = ''.join(right.symbol for right in CastlingRight if right in castling_rights) or '-'
+    en_passant = position_to_algebraic(en_passant_position) if en_passant_position is not None else '-'
+    side = 'w' if side_to_move is Color.WHITE else 'b'
+    return f"{format_fen_placement(board)} {side} {castling} {en_passant} {halfmove_clock} {fullmove_number}"
@@ -0,0 +1,171 @@
+# game_archive.py
+"""
+A compact binary archive of finished games, and a memory-mapped reader seeking to any game and ply
+without loading the archive.
+
+Layout, all integers little-endian:
+    header      magic 'CHGA', format version (u16), padding (u16), game count (u64), index offset (u64)
+    records     one per game, back to back:
+                    move count (u32), game status (u8), starting FEN length in bytes (u16, 0 for the
+                    initial position), the starting FEN, then one u16 compact move code per ply,
+                    see 'move.encode_move', which holds the squares, the history tag and a capture flag
+    index       the offset of each record (u64), written when the writer is closed
+
+A game costs 7 bytes, plus 8 in the index, plus 2 per ply.
+"""
+import mmap
+import struct
+from typing import Iterable, Optional
+from game_manager import GameManager
+from move import decode_move_history_tag
+from config import *
+
+ARCHIVE_MAGIC = b'CHGA'
+ARCHIVE_VERSION = 1
+ARCHIVE_HEADER = struct.Struct('<4sHHQQ')
+RECORD_HEADER = struct.Struct('<IBH')
+INDEX_ENTRY = struct.Struct('<Q')
+MOVE_CODE = struct.Struct('<H')
+
+
+class GameArchiveWriter:
+    """
+    Appends finished games to a new archive file. The archive is readable once the writer is closed.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'wb')
+        self._file.write(ARCHIVE_HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION, 0, 0, 0))
+        self._offsets: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def write_record(self, move_codes: list[int], initial_fen: Optional[str] = None,
+                     status: GameStatus = GameStatus.ACTIVE) -> None:
+        """
+        Appends a game given by its compact move codes and its starting FEN, None for the initial position.
+        """
+        fen_bytes = initial_fen.encode('ascii') if initial_fen is not None else b''
+        self._offsets.append(self._file.tell())
+        self._file.write(RECORD_HEADER.pack(len(move_codes), status.value, len(fen_bytes)))
+        self._file.write(fen_bytes)
+        self._file.write(struct.pack(f'<{len(move_codes)}H', *move_codes))
+
+    def write_game(self, game_manager: GameManager, status: Optional[GameStatus] = None) -> None:
+        """
+        Appends a game. Its status is found from its current position unless given.
+        """
+        status = status if status is not None else game_manager.get_game_status()
+        self.write_record(game_manager.history, game_manager.initial_fen, status)
+
+    def close(self) -> None:
+        """
+        Writes the index and completes the header. The writer may not be used afterwards.
+        """
+        if self._file.closed:
+            return
+        index_offset = self._file.tell()
+        self._file.write(struct.pack(f'<{len(self._offsets)}Q', *self._offsets))
+        self._file.seek(0)
+        self._file.write(ARCHIVE_HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION, 0, len(self._offsets), index_offset))
+        self._file.close()
+
+    def __enter__(self) -> 'GameArchiveWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class GameArchiveReader:
+    """
+    Reads an archive through a memory map: only the pages of the games and plies accessed are loaded.
+    Games are numbered from 0 in the order they were written, and plies from 0 within a game.
+    """
+    def __init__(self, path: str):
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self.game_count, self._index_offset = ARCHIVE_HEADER.unpack_from(self._map, 0)
+        if magic != ARCHIVE_MAGIC:
+            raise ValueError(f"'{path}' is not a game archive.")
+        if version != ARCHIVE_VERSION:
+            raise ValueError(f"Unsupported game archive version {version}.")
+
+    def __len__(self) -> int:
+        return self.game_count
+
+    def _get_record_offset(self, game_index: int) -> int:
+        if not 0 <= game_index < self.game_count:
+            raise IndexError(f"Game {game_index} is out of range of the {self.game_count} games of the archive.")
+        return INDEX_ENTRY.unpack_from(self._map, self._index_offset + game_index * INDEX_ENTRY.size)[0]
+
+    def _get_record_header(self, game_index: int) -> tuple[int, int, int, int]:
+        """
+        Returns the move count, status value and FEN length of a game, and the offset of its FEN.
+        """
+        offset = self._get_record_offset(game_index)
+        return RECORD_HEADER.unpack_from(self._map, offset) + (offset + RECORD_HEADER.size,)
+
+    def get_move_count(self, game_index: int) -> int:
+        return self._get_record_header(game_index)[0]
+
+    def get_status(self, game_index: int) -> GameStatus:
+        return GameStatus(self._get_record_header(game_index)[1])
+
+    def get_initial_fen(self, game_index: int) -> Optional[str]:
+        """
+        Returns the starting FEN of a game, or None if it starts from the initial position.
+        """
+        _, _, fen_length, fen_offset = self._get_record_header(game_index)
+        return self._map[fen_offset:fen_offset + fen_length].decode('ascii') if fen_length else None
+
+    def get_move_code(self, game_index: int, ply: int) -> int:
+        """
+        Returns the compact code of a single move, reading two bytes of the archive.
+        """
+        move_count, _, fen_length, fen_offset = self._get_record_header(game_index)
+        if not 0 <= ply < move_count:
+            raise IndexError(f"Ply {ply} is out of range of the {move_count} plies of game {game_index}.")
+        return MOVE_CODE.unpack_from(self._map, fen_offset + fen_length + ply * MOVE_CODE.size)[0]
+
+    def get_move_codes(self, game_index: int, stop_ply: Optional[int] = None) -> tuple[int, ...]:
+        """
+        Returns the compact codes of the moves of a game, or of its first 'stop_ply' moves.
+        """
+        move_count, _, fen_length, fen_offset = self._get_record_header(game_index)
+        count = move_count if stop_ply is None else max(0, min(stop_ply, move_count))
+        return struct.unpack_from(f'<{count}H', self._map, fen_offset + fen_length)
+
+    def get_history_tags(self, game_index: int) -> list[HistoryTag]:
+        return [decode_move_history_tag(code) for code in self.get_move_codes(game_index)]
+
+    def replay(self, game_index: int, ply: Optional[int] = None) -> GameManager:
+        """
+        Returns a game replayed from its starting position up to, but excluding, move 'ply',
+        to the end of the game if not specified.
+        """
+        game_manager = GameManager(fen=self.get_initial_fen(game_index))
+        for code in self.get_move_codes(game_index, ply):
+            game_manager.execute_update_validate_on_move(game_manager.controller.move_factory.create_from_code(code))
+        return game_manager
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> 'GameArchiveReader':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def write_archive(path: str, game_managers: Iterable[GameManager]) -> int:
+    """
+    Writes games to a new archive, e.g. streamed from a generator. Returns the number of games written.
+    """
+    with GameArchiveWriter(path) as writer:
+        for game_manager in game_managers:
+            writer.write_game(game_manager)
+        return len(writer)
@@ -1,55 +1,168 @@
 # game_controller.py
-from board_manager import BoardManager, BoardSetup
+from board_manager import BoardManager, BoardSetup, Layout
 from square import Square
 from move import Move, MoveFactory
 from chess_piece import ChessPiece, King, Pawn, ChessPieceFactory
 from config import *
+from attack_tables import DIRECTION_RAYS, LINE_DIRECTIONS, PAWN_ATTACKS
+from attack_map import is_sliding_along
+from zobrist import compute_zobrist_key, get_piece_key, get_castling_key, BLACK_TO_MOVE_KEY
+from typing import Iterator, Optional
+
+
+class MoveUndo:
+    """
+    A record of a move made on the live board by 'GameController.make_move'.
+    It holds everything needed by 'GameController.unmake_move' to restore the board exactly.
+    """
+    __slots__ = ('move', 'history_tag', 'captured_piece', 'promoted_piece', 'castling_rights', 'en_passant_position',
+                 'zobrist_key')
+
+    def __init__(self, move: Move, history_tag: HistoryTag, captured_piece: Optional[ChessPiece],
+                 promoted_piece: Optional[ChessPiece], castling_rights: frozenset[CastlingRight],
+                 en_passant_position: Optional[tuple[int, int]], zobrist_key: int):
+        self.move = move
+        self.history_tag = history_tag
+        self.captured_piece = captured_piece
+        self.promoted_piece = promoted_piece
+        # The position state before the move
+        self.castling_rights = castling_rights
+        self.en_passant_position = en_passant_position
+        self.zobrist_key = zobrist_key
 
 
 class GameController:
-    def __init__(self):
-        self.board_manager = BoardManager(self._initialize_piece_on_board_setup)  # callback method in class signature
+    def __init__(self, backend_type: BoardBackendType = BoardBackendType.SQUARE_LIST, layout: Optional[Layout] = None):
+        # callback method in class signature
+        self.board_manager = BoardManager(self._initialize_piece_on_board_setup, backend_type, layout)
         self.move_factory = MoveFactory(self.board_manager)
         self.white_king: King = self.board_manager.white_king
         self.black_king: King = self.board_manager.black_king
+        self.castling_rights: frozenset[CastlingRight] = self._get_home_castling_rights()
+        # The square passed over by a pawn's double step on the last move, as in the FEN notation
+        self.en_passant_position: Optional[tuple[int, int]] = None
+        # Zobrist key of the position, updated incrementally on every move. Assumes white to move until refreshed
+        self.zobrist_key: int = 0
+        self.refresh_zobrist_key(Color.WHITE)
+
+    def refresh_zobrist_key(self, side_to_move: Color) -> None:
+        """
+        Recomputes the Zobrist key of the position from scratch.
+        Must be called whenever the position state is set other than by making moves, e.g. when loading a FEN.
+        """
+        self.zobrist_key = compute_zobrist_key(self.board_manager.board, side_to_move, self.castling_rights)
+
+    def _get_home_castling_rights(self) -> frozenset[CastlingRight]:
+        """
+        Returns the castling rights of which the king and the rook still stand on their initial squares.
+        """
+        rights = set()
+        for right in CastlingRight:
+            king_init_piece = InitPiece.KING_WHITE if right.color is Color.WHITE else InitPiece.KING_BLACK
+            king = self.white_king if right.color is Color.WHITE else self.black_king
+            rook = self.board_manager.get_square(*right.rook_position).occupant
+            if king.square.position == king_init_piece.positions[0] \
+                    and rook is not None and rook.piece_type is PieceType.ROOK and rook.color is right.color:
+                rights.add(right)
+        return frozenset(rights)
 
     def get_check_status(self, last_move: Move) -> CheckStatus:
         """
         Returns the check status of the game.
         """
         moved_piece = last_move.square_final.occupant
-        opponent_king_square = self.white_king.square if moved_piece.color is Color.BLACK else self.black_king.square
 
-        # Get the threatened squares of the moved piece
-        moved_piece_threatened_squares = self.get_threatened_squares(moved_piece)
-
-        if opponent_king_square in moved_piece_threatened_squares:
+        if self.get_checkers(last_move):
             return CheckStatus.WHITE_UNDER_CHECK if moved_piece.color is Color.BLACK else CheckStatus.BLACK_UNDER_CHECK
 
         return CheckStatus.NO_CHECK
 
-    def _get_moves(self, piece: ChessPiece, legal: bool) -> dict[MoveScope, set['Move']]:
+    def get_checkers(self, last_move: Move) -> list[ChessPiece]:
         """
-        TODO: write this
-
-        Note: ChessPiece.legal_moves: dict[MoveScope, set['Move']]
+        Returns the pieces checking the opponent king after the last move; two of them in a double check.
+        Only the moved piece (a direct check) and the line from the king through the vacated initial square
+        (a discovered check) are examined, so the cost does not depend on the number of pieces on the board.
+        """
+        moved_piece = last_move.square_final.occupant  # the new piece, if promoted
+        opponent_king = self.white_king if moved_piece.color is Color.BLACK else self.black_king
+        king_position = opponent_king.square.position
+        checkers = []
+
+        if self._is_attacking(moved_piece, king_position):
+            checkers.append(moved_piece)
+
+        direction = LINE_DIRECTIONS.get((king_position, last_move.square_initial.position))
+        if direction is not None:
+            for position in DIRECTION_RAYS[king_position][direction]:
+                occupant = self.board_manager.get_square(*position).occupant
+                if occupant is None:
+                    continue
+                if occupant is not moved_piece and occupant.color is moved_piece.color \
+                        and is_sliding_along(occupant, direction):
+                    checkers.append(occupant)
+                break
+
+        return checkers
+
+    def _is_attacking(self, piece: ChessPiece, target_position: tuple[int, int]) -> bool:
         """
+        Returns True if the piece attacks the target position on the current board.
+        """
+        piece_position = piece.square.position
+        if piece.piece_type is PieceType.PAWN:
+            return target_position in PAWN_ATTACKS[piece.color][piece_position]
+        if piece.piece_type in (PieceType.KNIGHT, PieceType.KING):
+            return target_position in piece.get_hypothetical_moves_final_positions()
+
+        direction = LINE_DIRECTIONS.get((piece_position, target_position))
+        return direction is not None and is_sliding_along(piece, direction) \
+            and self.board_manager.is_clean_line(piece_position, target_position)
 
+    def _iter_moves(self, piece: ChessPiece, legal: bool) -> Iterator[Move]:
+        """
+        Yields the valid moves of this piece in the order of its rays, so that callers may stop at any move.
+        Each ray is walked up to its first occupied square, positions beyond it are obstructed.
+        """
         if piece is None:
             raise ValueError("'piece' must not be None.")
 
-        collected_moves: dict[MoveScope, set['Move']] = {MoveScope.STEP: set(), MoveScope.CAPTURE: set()}
-
-        hypothetical_moves_final_positions = piece.get_hypothetical_moves_final_positions()
+        board = self.board_manager.board
+        is_pawn = piece.piece_type is PieceType.PAWN
+        col_i = piece.square.position[1]
 
         foo = self.move_factory.create if legal else self.move_factory.create_threatening_move
-        for final_position in hypothetical_moves_final_positions:
-            move = foo(piece, final_position)
+        for ray in piece.get_hypothetical_moves_rays():
+            for final_position in ray:
+                # Moves known to be invalid are not created: a step of a pawn onto a piece, a capture of a pawn
+                # on an empty square and, unless threats are collected, a capture of a friendly piece
+                occupant = board[final_position[0]][final_position[1]].occupant
+                if is_pawn and (final_position[1] != col_i) is (occupant is None):
+                    break
+                if legal and occupant is not None and occupant.color is piece.color:
+                    break
+
+                move = foo(piece, final_position)
 
-            # None is returned when final position is not board-constrained
-            if move is None or move.scope is MoveScope.INVALID:
-                continue
+                if move.scope is not MoveScope.INVALID:
+                    yield move
 
+                if move.captured_piece is not None:
+                    break
+
+    def _walk_moves(self, piece: ChessPiece, legal: bool) -> list[Move]:
+        """
+        Returns the valid moves of this piece in the order of its rays.
+        """
+        return list(self._iter_moves(piece, legal))
+
+    def _get_moves(self, piece: ChessPiece, legal: bool) -> dict[MoveScope, set['Move']]:
+        """
+        Returns the valid moves of this piece grouped by their final scope, STEP or CAPTURE.
+        If 'legal' is False, moves of a pinned piece and moves landing on a friendly piece are included too.
+        """
+        collected_moves: dict[MoveScope, set['Move']] = {MoveScope.STEP: set(), MoveScope.CAPTURE: set()}
+
+        for move in self._walk_moves(piece, legal):
             collected_moves[move.scope].add(move)
 
         return collected_moves
@@ -60,28 +173,56 @@ class GameController:
         """
         return self._get_moves(piece, legal=True)
 
+    def generate_legal_moves(self, color: Color) -> list[Move]:
+        """
+        Returns all legal moves of the specified color, in one pass over its pieces.
+        Check and pin information is computed once for the position and shared by all candidate moves.
+        """
+        my_king = self.white_king if color is Color.WHITE else self.black_king
+
+        # Only the king may move out of a double check
+        if len(self.move_factory.validation.get_king_safety(color).checkers) > 1:
+            return self._walk_moves(my_king, legal=True)
+
+        return [move for piece in sorted(self._get_pieces(color), key=lambda p: p.square.position)
+                for move in self._walk_moves(piece, legal=True)]
+
+    def has_legal_move(self, color: Color) -> bool:
+        """
+        Returns True if the specified color has at least one legal move, stopping at the first one found.
+        King moves are tried first, then under check the moves of the pieces attacking the single checker,
+        as they are the likeliest to resolve it.
+        """
+        my_king = self.white_king if color is Color.WHITE else self.black_king
+        if next(self._iter_moves(my_king, legal=True), None) is not None:
+            return True
+
+        checkers = self.move_factory.validation.get_king_safety(color).checkers
+        if len(checkers) > 1:
+            return False  # only the king may move out of a double check
+
+        pieces = [piece for piece in self._get_pieces(color) if piece is not my_king]
+        if checkers:
+            checker_position = checkers[0].square.position
+            pieces.sort(key=lambda piece: checker_position not in self.board_manager.get_attacked_positions(piece))
+
+        return any(next(self._iter_moves(piece, legal=True), None) is not None for piece in pieces)
+
     def get_threatened_squares(self, piece: ChessPiece) -> set[Square]:
         """
         Returns the set of squares that are threatened by the specified color.
         This is different from the legal moves as a piece might threaten a square without being able to move to it.
-        For example, when a piece is pinned.
+        For example, when a piece is pinned, or when it defends a friendly piece.
+        It is read from the attack map kept by the board manager, a pawn's forward steps are not threats.
         """
-        threatening_moves = self._get_moves(piece, legal=False)
-        return {move.square_final for move_scope_set in threatening_moves.values() for move in move_scope_set}
+        attacked_positions = self.board_manager.get_attacked_positions(piece)
+        return {self.board_manager.get_square(*position) for position in attacked_positions}
 
-    @staticmethod
-    def _set_piece(piece: ChessPiece, square: Square):
+    def _set_piece(self, piece: ChessPiece, square: Square):
         """
         Place a piece on this square.
         """
-        if piece.square is not None:
-            raise ValueError("Piece must be removed from its current square before being placed on another.")
-
-        if square.occupant is not None:
-            raise ValueError("Square must be void before placing a piece on it.")
-
-        piece.square = square
-        square.occupant = piece
+        self.board_manager.set_piece(piece, square)
 
     def _initialize_piece_on_board_setup(self, piece: ChessPiece, square: Square, caller: BoardSetup):
         """
@@ -90,17 +231,14 @@ class GameController:
         """
         assert isinstance(caller, BoardSetup), "'caller' must be of type 'BoardSetup'."
 
-        self._set_piece(piece, square)
+        # The board manager is still being constructed, its backend is synced once the setup is done
+        BoardManager.link_piece(piece, square)
 
-    @staticmethod
-    def _remove_piece(piece: ChessPiece, square: Square):
+    def _remove_piece(self, piece: ChessPiece, square: Square):
         """
         Remove the piece occupying the square.
         """
-        assert square.occupant is piece, "'square.occupant' must refer to the specified 'piece' to be removed."
-        assert piece.square is square, "'piece.square' must refer to the specified 'square' to be removed from."
-        piece.square = None
-        square.occupant = None
+        self.board_manager.remove_piece(piece, square)
 
     def _initiate_step_move(self, move: Move) -> None:
         """
@@ -114,10 +252,16 @@ class GameController:
         self._remove_piece(piece, square_i)
         self._set_piece(piece, square_f)
 
-    def _promote_pawn_to_chosen_piece(self, pawn: ChessPiece, choice=PieceType.QUEEN) -> None:
+    def _get_pieces(self, color: Color) -> set[ChessPiece]:
+        """
+        Returns the set of pieces of the specified color.
+        """
+        return self.board_manager.white_pieces if color is Color.WHITE else self.board_manager.black_pieces
+
+    def _promote_pawn_to_chosen_piece(self, pawn: ChessPiece, choice=PieceType.QUEEN) -> ChessPiece:
         """
         This method called when a pawn reaches the end of the board.
-        It replaces the pawn with the player's choice of piece.
+        It replaces the pawn with the player's choice of piece, and returns the new piece.
         For now the default choice is a queen.
         """
 
@@ -127,9 +271,10 @@ class GameController:
         self._set_piece(new_piece, square)
 
         # Replace references
-        my_pieces = self.board_manager.white_pieces if pawn.color is Color.WHITE else self.board_manager.black_pieces
+        my_pieces = self._get_pieces(pawn.color)
         my_pieces.remove(pawn)
         my_pieces.add(new_piece)
+        return new_piece
 
     def _initiate_capture_move(self, move: Move) -> None:
         """
@@ -155,18 +300,109 @@ class GameController:
         else:
             raise ValueError(f"Invalid move scope: {move.scope}")
 
-    def initiate_move_and_related_methods(self, move: Move) -> HistoryTag:
+    def make_move(self, move: Move) -> MoveUndo:
         """
-        initiates a move while supporting private related operations.
-        Returns the history tag of the move.
+        Makes a move on the live board, including captures and promotions.
+        Returns an undo record to be passed to 'unmake_move' in order to restore the board exactly.
         """
         self._initiate_move(move)
         history_tag = HistoryTag.NORMAL
+
+        captured_piece = move.captured_piece if move.scope is MoveScope.CAPTURE else None
+        if captured_piece is not None:
+            self._get_pieces(captured_piece.color).remove(captured_piece)
+
         # check if a pawn reach the end of the board
-        if isinstance(move.piece, Pawn) and move.square_final.position[0] in (0, 7):
-            self._promote_pawn_to_chosen_piece(move.piece)
+        promoted_piece = None
+        if move.is_promotion:
+            promoted_piece = self._promote_pawn_to_chosen_piece(move.piece)
             history_tag = HistoryTag.PROMOTION
 
-        # Add more related methods here
+        undo = MoveUndo(move, history_tag, captured_piece, promoted_piece,
+                        self.castling_rights, self.en_passant_position, self.zobrist_key)
+        self._update_position_state(move)
+        self._update_zobrist_key(undo)
+        return undo
 
-        return history_tag
+    def _update_position_state(self, move: Move) -> None:
+        """
+        Updates the castling rights and the en passant square after a move.
+        A castling right is lost once its king or rook moves, or once its rook is captured.
+        """
+        moved_king_color = move.piece.color if isinstance(move.piece, King) else None
+        touched_positions = (move.square_initial.position, move.square_final.position)
+        if self.castling_rights:
+            self.castling_rights = frozenset(
+                right for right in self.castling_rights
+                if right.color is not moved_king_color and right.rook_position not in touched_positions)
+
+        row_i, col_i = move.square_initial.position
+        row_f, _ = move.square_final.position
+        is_double_step = isinstance(move.piece, Pawn) and abs(row_f - row_i) == 2
+        self.en_passant_position = ((row_i + row_f) // 2, col_i) if is_double_step else None
+
+    def _update_zobrist_key(self, undo: MoveUndo) -> None:
+        """
+        Updates the Zobrist key after a move by XOR-ing out the features it changed and XOR-ing in the new ones.
+        """
+        move = undo.move
+        placed_piece = undo.promoted_piece if undo.promoted_piece is not None else move.piece
+        key = self.zobrist_key ^ BLACK_TO_MOVE_KEY
+        key ^= get_piece_key(move.piece, move.square_initial.position)
+        key ^= get_piece_key(placed_piece, move.square_final.position)
+        if undo.captured_piece is not None:
+            key ^= get_piece_key(undo.captured_piece, move.square_final.position)
+        if undo.castling_rights != self.castling_rights:
+            key ^= get_castling_key(undo.castling_rights) ^ get_castling_key(self.castling_rights)
+        self.zobrist_key = key
+
+    def unmake_move(self, undo: MoveUndo) -> None:
+        """
+        Takes back a move made by 'make_move', restoring pieces, squares and piece sets.
+        Moves must be unmade in the reverse order of which they were made.
+        """
+        move = undo.move
+        piece = move.piece
+
+        if undo.promoted_piece is not None:
+            my_pieces = self._get_pieces(piece.color)
+            self._remove_piece(undo.promoted_piece, move.square_final)
+            my_pieces.remove(undo.promoted_piece)
+            my_pieces.add(piece)
+        else:
+            self._remove_piece(piece, move.square_final)
+
+        self._set_piece(piece, move.square_initial)
+
+        if undo.captured_piece is not None:
+            self._set_piece(undo.captured_piece, move.square_final)
+            self._get_pieces(undo.captured_piece.color).add(undo.captured_piece)
+
+        self.castling_rights = undo.castling_rights
+        self.en_passant_position = undo.en_passant_position
+        self.zobrist_key = undo.zobrist_key
+
+    def is_king_threatened(self, color: Color) -> bool:
+        """
+        Returns True if the king of the specified color is threatened by any of the opponent pieces.
+        """
+        my_king = self.white_king if color is Color.WHITE else self.black_king
+        opponent_color = Color.BLACK if color is Color.WHITE else Color.WHITE
+        return self.board_manager.is_square_attacked(my_king.square.position, opponent_color)
+
+    def is_leaving_king_safe(self, move: Move) -> bool:
+        """
+        Returns True if the king of the moving piece is not threatened after the move is made.
+        The move is made and unmade in place, so the board is left exactly as it was found.
+        """
+        undo = self.make_move(move)
+        is_safe = not self.is_king_threatened(move.piece.color)
+        self.unmake_move(undo)
+        return is_safe
+
+    def initiate_move_and_related_methods(self, move: Move) -> HistoryTag:
+        """
+        initiates a move while supporting private related operations.
+        Returns the history tag of the move.
+        """
+        return self.make_move(move).history_tag
@@ -4,34 +4,112 @@ Manages a single game logic, including move processing, game state maintenance,
 """
 from config import *
 from game_controller import GameController
-from move import Move
-from chess_piece import ChessPiece, King
-from copy import deepcopy
+from move import Move, encode_move
+from chess_piece import ChessPiece, King, Pawn
+from fen import FenPosition, parse_fen, format_fen
+from tablebase import Tablebase, TablebaseResult, MAX_TABLEBASE_PIECES
+from typing import Optional
+
+# The entries of the board of piece types, shared by all games instead of building a tuple per square and move
+PIECE_TYPE_BOARD_ENTRIES = {piece_type: {color: (piece_type, color) for color in Color} for piece_type in PieceType}
+EMPTY_BOARD_ENTRY = (None, None)
 
 
 class GameManager:
-    def __init__(self):
-        self.controller = GameController()
+    def __init__(self, backend_type: BoardBackendType = BoardBackendType.SQUARE_LIST, fen: Optional[str] = None,
+                 tablebase: Optional[Tablebase] = None):
+        """
+        Starts a game from the initial position, or from the position of a FEN string if specified.
+        The tablebase, if any, is probed once few pieces are left, and may be shared by games.
+        """
+        self.tablebase = tablebase
+        fen_position = parse_fen(fen) if fen is not None else None
+        self.controller = GameController(backend_type, fen_position.layout if fen_position else None)
         self.board_manager = self.controller.board_manager
-        self.history: list[tuple[Move, HistoryTag]] = []
+        self.initial_fen = fen  # None for the initial position
+        self.history: list[int] = []  # the compact codes of the moves played, see 'move.encode_move'
         self.current_player_color = Color.WHITE
+        self.halfmove_clock = 0  # plies since the last capture or pawn move
+        self.fullmove_number = 1
+        if fen_position is not None:
+            self._load_fen_position_state(fen_position)
+        # Zobrist key -> number of occurrences of the position since the last capture or pawn move
+        self.position_counts: dict[int, int] = {self.controller.zobrist_key: 1}
         self.piece_type_board_state = None
         self._update_piece_type_board_state()
-        self.check_status: CheckStatus = CheckStatus.NO_CHECK
         self.white_king: King = self.board_manager.white_king
         self.black_king: King = self.board_manager.black_king
+        self.checkers: list[ChessPiece] = self._get_initial_checkers()  # the pieces checking the current player
+        self.check_status: CheckStatus = self._get_check_status_by_checkers()
+
+    def _load_fen_position_state(self, fen_position: FenPosition) -> None:
+        """
+        Loads the side to move, castling rights, en passant square and clocks of a FEN position.
+        """
+        self.current_player_color = fen_position.side_to_move
+        self.controller.castling_rights = fen_position.castling_rights
+        self.controller.en_passant_position = fen_position.en_passant_position
+        self.halfmove_clock = fen_position.halfmove_clock
+        self.fullmove_number = fen_position.fullmove_number
+        self.controller.refresh_zobrist_key(self.current_player_color)
+
+    def _get_initial_checkers(self) -> list[ChessPiece]:
+        """
+        Returns the pieces checking the current player in the starting position, in which only they may be checked.
+        """
+        waiting_player_color = Color.BLACK if self.current_player_color is Color.WHITE else Color.WHITE
+        if self.controller.is_king_threatened(waiting_player_color):
+            raise ValueError("The player waiting for their turn must not be under check.")
+
+        return list(self.controller.move_factory.validation.get_king_safety(self.current_player_color).checkers)
+
+    def _get_check_status_by_checkers(self) -> CheckStatus:
+        if not self.checkers:
+            return CheckStatus.NO_CHECK
+        return CheckStatus.WHITE_UNDER_CHECK if self.current_player_color is Color.WHITE \
+            else CheckStatus.BLACK_UNDER_CHECK
+
+    def to_fen(self) -> str:
+        """
+        Returns the FEN string of the current position.
+        """
+        return format_fen(self.board_manager.board, self.current_player_color, self.controller.castling_rights,
+                          self.controller.en_passant_position, self.halfmove_clock, self.fullmove_number)
+
+    def _update_clocks(self, move: Move) -> None:
+        """
+        Updates the halfmove clock and the fullmove number.
+        """
+        is_resetting = isinstance(move.piece, Pawn) or move.captured_piece is not None
+        self.halfmove_clock = 0 if is_resetting else self.halfmove_clock + 1
+        if move.piece.color is Color.BLACK:
+            self.fullmove_number += 1
+
+    def _update_position_counts(self) -> None:
+        """
+        Counts the occurrence of the current position.
+        Positions before a capture or a pawn move can never occur again, so they are forgotten.
+        Must be called after the clocks are updated.
+        """
+        if self.halfmove_clock == 0:
+            self.position_counts.clear()
+        key = self.controller.zobrist_key
+        self.position_counts[key] = self.position_counts.get(key, 0) + 1
 
     def _update_check_status(self, move: Move) -> None:
         """
-        Updates the check status of the game.
+        Updates the check status of the game, and the pieces checking the current player.
+        Must be called after the current player is updated.
         """
-        self.check_status = self.controller.get_check_status(move)
+        self.checkers = self.controller.get_checkers(move)
+        self.check_status = self._get_check_status_by_checkers()
 
     def _update_history(self, move: Move, tag: HistoryTag) -> None:
         """
         Updates the history of moves.
         """
-        self.history.append((move, tag))
+        self.history.append(encode_move(move.square_initial.position, move.square_final.position, tag,
+                                        move.captured_piece is not None))
 
     def _update_current_player(self) -> None:
         """
@@ -39,14 +117,27 @@ class GameManager:
         """
         self.current_player_color = Color.WHITE if self.current_player_color == Color.BLACK else Color.BLACK
 
-    def _update_on_move(self, move: Move, history_tag: HistoryTag) -> None:
+    def _update_on_move(self, move: Move, history_tag: HistoryTag) -> list[tuple[int, int]]:
         """
         Updates the game state after a move has been made.
+        Returns the positions of the squares changed by the move.
         """
+        changed_positions = self._get_changed_positions(move)
         self._update_history(move, history_tag)
+        self._update_clocks(move)
+        self._update_position_counts()
         self._update_current_player()
-        self._update_piece_type_board_state()
+        self._patch_piece_type_board_state(changed_positions)
         self._update_check_status(move)
+        return changed_positions
+
+    @staticmethod
+    def _get_changed_positions(move: Move) -> list[tuple[int, int]]:
+        """
+        Returns the positions of the squares whose occupant was changed by a made move.
+        A promotion replaces the piece on the final square, so it is covered as well.
+        """
+        return [move.square_initial.position, move.square_final.position]
 
     def _validate_on_move(self, move: Move) -> None:
         """
@@ -61,48 +152,63 @@ class GameManager:
     def _is_unchecking_king(self, move: Move) -> bool:
         """
         Returns True if the specified move unchecks the king.
-        This method is computationally expensive, and should be used only when the current player is under check.
+        The move is tested in place on the live board by the controller's make/unmake methods.
         """
-        # get a deep copy of the game controller and the move
-        controller_copy = deepcopy(self.controller)
-
-        # create a same move copy for the copy (It must hold references of the new environment objects)
-        piece_position = move.piece.square.position
-        move_final_position: tuple[int, int] = move.square_final.position
-        piece_copy = controller_copy.board_manager.get_square(*piece_position).occupant
-
-        move_copy = controller_copy.move_factory.create(piece=piece_copy, position_final=move_final_position)
-
-        # initiate the move copy in the copy
-        controller_copy.initiate_move_and_related_methods(move_copy)
-
-        # check if any of the opponent pieces is threatening the king in the copy
-        my_color = move_copy.piece.color
-        my_king_copy = controller_copy.white_king if my_color is Color.WHITE else controller_copy.black_king
-        opponent_pieces_copy = controller_copy.board_manager.white_pieces if my_color is Color.BLACK \
-            else controller_copy.board_manager.black_pieces
-
-        for piece in opponent_pieces_copy:
-            if my_king_copy.square in controller_copy.get_threatened_squares(piece):
-                return False
+        return self.controller.is_leaving_king_safe(move)
 
-        return True
-
-    def execute_update_validate_on_move(self, move: Move) -> None:
+    def execute_update_validate_on_move(self, move: Move) -> list[tuple[int, int]]:
         """
         Executes a move.
+        Returns the change-set of the move: the positions of the squares it changed.
         """
         self._validate_on_move(move)
         history_tag = self.controller.initiate_move_and_related_methods(move)
-        self._update_on_move(move, history_tag)
+        return self._update_on_move(move, history_tag)
 
     def get_game_status(self) -> GameStatus:
         """
         Returns the current status of the game (e.g., in-progress, checkmate, stalemate).
+        The search for a legal move of the current player stops at the first one found,
+        and a checkmate takes precedence over the fifty-move and the threefold repetition draws.
         """
-        # TODO
+        if not self.controller.has_legal_move(self.current_player_color):
+            if not self.checkers:
+                return GameStatus.STALEMATE
+            return GameStatus.WHITE_WIN if self.current_player_color is Color.BLACK else GameStatus.BLACK_WIN
+
+        if self.halfmove_clock >= FIFTY_MOVE_RULE_PLIES:
+            return GameStatus.FIFTY_MOVE_DRAW
+
+        if self.position_counts.get(self.controller.zobrist_key, 0) >= REPETITION_DRAW_COUNT:
+            return GameStatus.THREEFOLD_REPETITION
+
         return GameStatus.ACTIVE
 
+    def _get_tablebase_pieces(self) -> Optional[list[tuple[PieceType, Color, tuple[int, int]]]]:
+        """
+        Returns the pieces on the board as (piece type, color, position), or None if the tablebase cannot hold them.
+        """
+        pieces = self.board_manager.white_pieces | self.board_manager.black_pieces
+        if self.tablebase is None or len(pieces) > MAX_TABLEBASE_PIECES:
+            return None
+        return [(piece.piece_type, piece.color, piece.square.position) for piece in pieces]
+
+    def probe_tablebase(self) -> Optional[TablebaseResult]:
+        """
+        Returns the result of the current position with best play for the current player, and the plies to mate,
+        or None if there is no tablebase or it does not hold the position.
+        """
+        pieces = self._get_tablebase_pieces()
+        return self.tablebase.probe(pieces, self.current_player_color) if pieces is not None else None
+
+    def get_tablebase_move(self) -> Optional[tuple[tuple[int, int], tuple[int, int]]]:
+        """
+        Returns a move of the current player keeping the tablebase result of the position, as (current, final)
+        positions, or None if there is no tablebase or it does not hold the position.
+        """
+        pieces = self._get_tablebase_pieces()
+        return self.tablebase.get_best_move(pieces, self.current_player_color) if pieces is not None else None
+
     def _update_piece_type_board_state(self) -> None:
         """
         This method creates and updates a board of piece types from the board of squares.
@@ -111,14 +217,22 @@ class GameManager:
         """
         board_of_squares = self.board_manager.board
 
-        board_of_piece_types = [[(None, None) for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
+        board_of_piece_types = [[EMPTY_BOARD_ENTRY for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
 
         for row in range(BOARD_SIZE):
             for col in range(BOARD_SIZE):
                 square = board_of_squares[row][col]
                 if square.occupant:
-                    board_of_piece_types[row][col] = square.occupant.piece_type, square.occupant.color
-                else:
-                    board_of_piece_types[row][col] = None, None
+                    board_of_piece_types[row][col] = PIECE_TYPE_BOARD_ENTRIES[square.occupant.piece_type][
+                        square.occupant.color]
 
         self.piece_type_board_state = board_of_piece_types
+
+    def _patch_piece_type_board_state(self, positions: list[tuple[int, int]]) -> None:
+        """
+        Updates the board of piece types only at the specified positions, in place.
+        """
+        for row, col in positions:
+            occupant = self.board_manager.get_square(row, col).occupant
+            self.piece_type_board_state[row][col] = PIECE_TYPE_BOARD_ENTRIES[occupant.piece_type][occupant.color] \
+                if occupant else EMPTY_BOARD_ENTRY
@@ -1,19 +1,24 @@
 # gui.py
 import tkinter as tk
+from argparse import ArgumentParser
+from typing import Optional
 from api_manager import APIManager
 from program_manager import ProgramManager
 from config import BOARD_SIZE, Color, PieceType, CheckStatus
 
 
 class ChessGUI:
-    def __init__(self, service: APIManager):
+    def __init__(self, service: APIManager, bot_color: Optional[Color] = None, bot_time_ms: int = 1000):
         self.api_manager = service
+        self.bot_color = bot_color  # the color played by the engine, if any
+        self.bot_time_ms = bot_time_ms
         self.root = tk.Tk()
         self.root.title("Chess Game")
         self.buttons = [[None for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]  # 8x8 chess board
         self.create_graphic_board()
         self.piece_to_move_selected_position = None
         self.cache_highlighted_squares: set[tuple[int, int]] = set()
+        self.schedule_bot_move()
 
     """api methods:"""
     @property
@@ -40,15 +45,36 @@ class ChessGUI:
     def get_legal_moves_positions_by_position(self, position: tuple[int, int]) -> set[tuple[int, int]]:
         return self.api_manager.get_legal_moves_positions_by_position(position)
 
+    def get_best_move(self) -> tuple[tuple[int, int], tuple[int, int]] or None:
+        return self.api_manager.get_best_move(self.bot_time_ms)
+
     def execute_move(self, start_position: tuple[int, int], end_position: tuple[int, int]) -> None:
         print(f"\t-> Attempting move")
         try:
-            self.api_manager.execute_move_by_position(start_position, end_position)
+            changed_positions = self.api_manager.execute_move_by_position(start_position, end_position)
             print("\t-> \033[92mAttempt executed successfully.\033[0m")
-            self.update_graphic_board()  # Refresh the board
+            self.update_graphic_squares(changed_positions)  # Refresh the changed squares only
+            self.schedule_bot_move()
         except Exception as e:
             print(f"\t-> \033[91mError executing move: {e}\033[0m")
 
+    """bot methods:"""
+
+    def schedule_bot_move(self) -> None:
+        """
+        Lets the engine reply once the board is redrawn, if it is the bot's turn.
+        """
+        if self.bot_color is not None and self.current_player == self.bot_color:
+            self.root.after(1, self.play_bot_move)
+
+    def play_bot_move(self) -> None:
+        print("# State: BOT MOVE")
+        best_move = self.get_best_move()
+        if best_move is None:
+            print("\t-> The bot has no legal move.")
+            return
+        self.execute_move(*best_move)
+
     """gui methods:"""
 
     def create_graphic_board(self) -> None:
@@ -61,11 +87,17 @@ class ChessGUI:
         self.update_graphic_board()
 
     def update_graphic_board(self) -> None:
-        for row in range(BOARD_SIZE):
-            for col in range(BOARD_SIZE):
-                piece_type, piece_color = self.board[row][col]
-                text = self.get_piece_symbol(piece_type, piece_color) if piece_type else ""
-                self.buttons[row][col].config(text=text)
+        self.update_graphic_squares([(row, col) for row in range(BOARD_SIZE) for col in range(BOARD_SIZE)])
+
+    def update_graphic_squares(self, positions: list[tuple[int, int]]) -> None:
+        """
+        Redraws the squares at the specified positions only.
+        """
+        board = self.board  # fetched once per redraw
+        for row, col in positions:
+            piece_type, piece_color = board[row][col]
+            text = self.get_piece_symbol(piece_type, piece_color) if piece_type else ""
+            self.buttons[row][col].config(text=text)
         self.root.update_idletasks()  # Update the GUI
 
     @staticmethod
@@ -85,6 +117,11 @@ class ChessGUI:
         self.root.mainloop()
 
     def on_square_click(self, row, col) -> None:
+        # Ignore clicks while the bot is to move
+        if self.bot_color is not None and self.current_player == self.bot_color:
+            print("\t-> Waiting for the bot to move.")
+            return
+
         void = (None, None)
         prev_row, prev_col = self.piece_to_move_selected_position if self.piece_to_move_selected_position else void
         prev_selected_square_content = self.board[prev_row][prev_col] if self.piece_to_move_selected_position else void
@@ -168,7 +205,13 @@ class ChessGUI:
 
 
 if __name__ == "__main__":
+    parser = ArgumentParser(description="Plays chess on a graphic board.")
+    parser.add_argument('--bot', choices=['white', 'black'], default=None, help="color played by the engine")
+    parser.add_argument('--bot-time-ms', type=int, default=1000, help="time budget of the engine per move")
+    args = parser.parse_args()
+
     program_manager = ProgramManager()
     api_manager = APIManager(program_manager)
-    gui = ChessGUI(service=api_manager)
+    gui = ChessGUI(service=api_manager, bot_color=Color[args.bot.upper()] if args.bot else None,
+                   bot_time_ms=args.bot_time_ms)
     gui.run()
@@ -0,0 +1,164 @@
+# load_generator.py
+"""
+A load generator for 'server.py': plays many concurrent random games and reports requests per second
+and latency percentiles, overall and per game.
+Run directly: python load_generator.py --local --games 50
+(--local starts a server in the same process, otherwise a server must be listening on --host and --port)
+
+Every turn pipelines the board, check and game status queries with the legal moves of the side to move,
+then sends the move chosen at random among them.
+"""
+import asyncio
+import json
+import random
+from argparse import ArgumentParser
+from time import perf_counter
+from typing import Any, Optional
+from server import ChessServer, DEFAULT_PORT
+
+
+class RequestError(Exception):
+    """
+    Raised when the server answers a request with an error.
+    """
+    pass
+
+
+class GameClient:
+    """
+    A connection to the server on which requests are pipelined: each request is sent at once,
+    and its response is matched by ID by a background reader task.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.latencies: list[float] = []  # in seconds, of every answered request
+        self._next_id = 0
+        self._pending: dict[int, tuple[asyncio.Future, float]] = {}
+        self._reader_task = asyncio.create_task(self._read_responses())
+
+    @classmethod
+    async def connect(cls, host: str, port: int) -> 'GameClient':
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def _read_responses(self) -> None:
+        while line := await self.reader.readline():
+            response = json.loads(line)
+            future, sent_at = self._pending.pop(response['id'])
+            self.latencies.append(perf_counter() - sent_at)
+            if 'error' in response:
+                future.set_exception(RequestError(response['error']))
+            else:
+                future.set_result(response['result'])
+
+    def request(self, method: str, session: Optional[str] = None, **params) -> asyncio.Future:
+        """
+        Sends a request, and returns the future of its result.
+        """
+        self._next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[self._next_id] = (future, perf_counter())
+        request = {'id': self._next_id, 'method': method, 'session': session, 'params': params}
+        self.writer.write(json.dumps(request, separators=(',', ':')).encode() + b'\n')
+        return future
+
+    async def close(self) -> None:
+        self.writer.close()
+        await self.writer.wait_closed()
+        self._reader_task.cancel()
+
+
+async def play_random_game(client: GameClient, max_plies: int, rng: random.Random) -> int:
+    """
+    Plays a random game on its own session until it ends or 'max_plies' moves were made.
+    Returns the number of moves made.
+    """
+    session = await client.request('create_session')
+    color = 'WHITE'
+    plies = 0
+    while plies < max_plies:
+        _, _, game_status, legal_moves = await asyncio.gather(
+            client.request('get_board_state', session), client.request('get_check_status', session),
+            client.request('get_game_status', session), client.request('generate_legal_moves', session, color=color))
+        if game_status != 'ACTIVE':
+            break
+
+        piece_position, final_positions = rng.choice(legal_moves)
+        await asyncio.gather(
+            client.request('get_legal_moves_positions_by_position', session, position=piece_position),
+            client.request('execute_move_by_position', session, piece_current_position=piece_position,
+                           piece_final_position=rng.choice(final_positions)))
+        color = 'BLACK' if color == 'WHITE' else 'WHITE'
+        plies += 1
+
+    await client.request('close_session', session)
+    return plies
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def summarize(per_game_latencies: list[list[float]], seconds: float) -> dict[str, Any]:
+    """
+    Returns the throughput and the latency percentiles (in milliseconds) of a run.
+    """
+    latencies = sorted(latency for game_latencies in per_game_latencies for latency in game_latencies)
+    per_game_p99 = [_percentile(sorted(game_latencies), 0.99) for game_latencies in per_game_latencies]
+    return {
+        'requests': len(latencies),
+        'requests_per_second': len(latencies) / seconds,
+        'p50_ms': _percentile(latencies, 0.50) * 1000,
+        'p95_ms': _percentile(latencies, 0.95) * 1000,
+        'p99_ms': _percentile(latencies, 0.99) * 1000,
+        'worst_game_p99_ms': max(per_game_p99) * 1000,
+    }
+
+
+async def run_load(host: str, port: int, games: int, max_plies: int, seed: int = 0) -> dict[str, Any]:
+    """
+    Plays 'games' concurrent random games, one connection each, and returns the summary of the run.
+    """
+    clients = [await GameClient.connect(host, port) for _ in range(games)]
+    start = perf_counter()
+    await asyncio.gather(*(play_random_game(client, max_plies, random.Random(seed + index))
+                           for index, client in enumerate(clients)))
+    seconds = perf_counter() - start
+    for client in clients:
+        await client.close()
+    return summarize([client.latencies for client in clients], seconds)
+
+
+async def run_local_load(games: int, max_plies: int, seed: int = 0) -> dict[str, Any]:
+    """
+    Same as 'run_load', against a server started in this process on a free port.
+    """
+    server = await ChessServer().start('127.0.0.1', 0)
+    async with server:
+        port = server.sockets[0].getsockname()[1]
+        return await run_load('127.0.0.1', port, games, max_plies, seed)
+
+
+def main():
+    parser = ArgumentParser(description="Plays concurrent random games against the chess server.")
+    parser.add_argument('--local', action='store_true', help="start a server in this process")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--games', type=int, default=20, help="number of concurrent games")
+    parser.add_argument('--plies', type=int, default=60, help="maximum number of moves per game")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.local:
+        summary = asyncio.run(run_local_load(args.games, args.plies, args.seed))
+    else:
+        summary = asyncio.run(run_load(args.host, args.port, args.games, args.plies, args.seed))
+
+    for name, value in summary.items():
+        print(f"{name:>20}: {value:10.1f}" if isinstance(value, float) else f"{name:>20}: {value:10}")
+
+
+if __name__ == "__main__":
+    main()
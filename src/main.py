@@ -1,11 +1,33 @@
 # main.py
 """
 Initializes and starts the application, setting up necessary components.
+Analyses PGN games or FEN lists in batch: python main.py --help
 """
+import sys
+from argparse import ArgumentParser
+from batch_analysis import run_batch, detect_input_format
 
 
 def main():
-    pass
+    parser = ArgumentParser(description="Analyses every position of PGN games or of a FEN list, as CSV rows.")
+    parser.add_argument('input', help="PGN file, or FEN list with one position per line ('-' for standard input)")
+    parser.add_argument('--output', default='-', help="CSV file to write ('-' for standard output)")
+    parser.add_argument('--format', choices=['pgn', 'fen'], default=None,
+                        help="input format, guessed from the file extension by default")
+    parser.add_argument('--chunk-size', type=int, default=1000, help="number of rows written at a time")
+    args = parser.parse_args()
+
+    input_format = args.format or detect_input_format(args.input)
+    input_file = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', newline='', encoding='utf-8')
+    try:
+        rows_written = run_batch(input_file, output, input_format, args.chunk_size)
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output is not sys.stdout:
+            output.close()
+    print(f"{rows_written} positions analysed", file=sys.stderr)
 
 
 if __name__ == "__main__":
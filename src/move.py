@@ -2,10 +2,47 @@
 from config import *
 from chess_piece import *
 from square import Square
+from attack_tables import DIRECTION_RAYS, KNIGHT_RAYS, PAWN_ATTACKS
 from typing import Optional
 
 
+# A compact move code packs a move in a 16-bit integer, to be stored in bulk in place of 'Move' objects:
+# the initial square index (bits 0-5), the final square index (bits 6-11), the history tag (bits 12-13)
+# and a capture flag (bit 14). Square indices run row by row, 'row * BOARD_SIZE + col'.
+MOVE_CODE_SQUARES_MASK = (1 << 12) - 1
+MOVE_CODE_TAG_SHIFT = 12
+MOVE_CODE_CAPTURE_FLAG = 1 << 14
+
+
+def encode_move(position_initial: tuple[int, int], position_final: tuple[int, int],
+                history_tag: HistoryTag = HistoryTag.NORMAL, is_capture: bool = False) -> int:
+    """
+    Returns the compact code of a move.
+    """
+    code = position_initial[0] * BOARD_SIZE + position_initial[1]
+    code |= (position_final[0] * BOARD_SIZE + position_final[1]) << 6
+    code |= history_tag.value << MOVE_CODE_TAG_SHIFT
+    return code | MOVE_CODE_CAPTURE_FLAG if is_capture else code
+
+
+def decode_move_positions(code: int) -> tuple[tuple[int, int], tuple[int, int]]:
+    """
+    Returns the initial and final positions of a compact move code.
+    """
+    return divmod(code & 63, BOARD_SIZE), divmod((code >> 6) & 63, BOARD_SIZE)
+
+
+def decode_move_history_tag(code: int) -> HistoryTag:
+    return HistoryTag((code >> MOVE_CODE_TAG_SHIFT) & 3)
+
+
+def is_capture_code(code: int) -> bool:
+    return bool(code & MOVE_CODE_CAPTURE_FLAG)
+
+
 class Move:
+    __slots__ = ('piece', 'scope', 'square_initial', 'square_final', 'captured_piece')
+
     def __init__(self, piece: ChessPiece, move_scope: MoveScope, square_final: Square):
         self.piece = piece
         self.scope = move_scope
@@ -13,6 +50,19 @@ class Move:
         self.square_final = square_final
         self.captured_piece = square_final.occupant
 
+    @property
+    def is_promotion(self) -> bool:
+        return isinstance(self.piece, Pawn) and self.square_final.position[0] in (0, BOARD_SIZE - 1)
+
+    @property
+    def code(self) -> int:
+        """
+        Returns the compact code of the move, see 'encode_move'.
+        """
+        history_tag = HistoryTag.PROMOTION if self.is_promotion else HistoryTag.NORMAL
+        return encode_move(self.square_initial.position, self.square_final.position, history_tag,
+                           self.captured_piece is not None)
+
     @property
     def is_legal(self) -> bool:
         """
@@ -22,9 +72,28 @@ class Move:
         return self.scope is MoveScope.STEP or self.scope is MoveScope.CAPTURE
 
 
+class KingSafety:
+    """
+    The check and pin information of one color's king in a single position.
+    """
+    __slots__ = ('checkers', 'check_block_positions', 'pins', 'x_ray_positions')
+
+    def __init__(self, checkers: list[ChessPiece], check_block_positions: set[tuple[int, int]],
+                 pins: dict[ChessPiece, frozenset[tuple[int, int]]], x_ray_positions: set[tuple[int, int]]):
+        self.checkers = checkers
+        # Positions to which a piece other than the king may move to resolve a single check
+        self.check_block_positions = check_block_positions
+        # Pinned piece -> positions along its pin line it may still move to (up to and including the pinner)
+        self.pins = pins
+        # Positions right behind the king along the line of a sliding checker, attacked once the king steps there
+        self.x_ray_positions = x_ray_positions
+
+
 class MoveValidation:
     def __init__(self, board_manager: 'BoardManager'):
         self.board_manager = board_manager
+        # Color -> (board version, king safety), computed once per position and reused until the board changes
+        self._king_safety_cache: dict[Color, tuple[int, KingSafety]] = {}
 
     @staticmethod
     def _get_line_type(initial_position: tuple[int, int], final_position: tuple[int, int]) -> LineType:
@@ -113,55 +182,12 @@ class MoveValidation:
         row_f, col_f = move.square_final.position
         return self._is_board_constrained(row_f, col_f)
 
-    def _find_next_piece_in_line(self, king: King, piece: ChessPiece) -> Optional[ChessPiece]:
-        """
-        This method is a helper function to the _is_revealing_check method.
-        It finds the first piece on the common line of the king and a piece attempting a move,
-        after the piece attempting a move.
-        """
-
-        king_row, king_col = king.square.position
-        piece_row, piece_col = piece.square.position
-
-        row_step = self._get_step(king_row, piece_row)
-        col_step = self._get_step(king_col, piece_col)
-
-        # Already checked the line between the king and the piece, now starting from the piece onwards
-        curr_row, curr_col = piece_row + row_step, piece_col + col_step
-
-        # Iterate outwards from the piece up to the board edge
-        while self._is_board_constrained(curr_row, curr_col):
-            current_square = self.board_manager.get_square(curr_row, curr_col)
-            if current_square.occupant:
-                return current_square.occupant
-
-            curr_row += row_step
-            curr_col += col_step
-
-        return None
-
     def _is_clean_line_between_squares(self, square1: Square, square2: Square) -> bool:
         """
         Checks if all squares between two given squares are unoccupied and are in a straight line.
         """
 
-        row1, col1 = square1.position
-        row2, col2 = square2.position
-
-        row_step = self._get_step(row1, row2)
-        col_step = self._get_step(col1, col2)
-
-        curr_row, curr_col = row1 + row_step, col1 + col_step
-
-        # Iterate through squares between square1 and square2
-        while (curr_row, curr_col) != (row2, col2):
-            if self.board_manager.is_occupied(curr_row, curr_col):
-                return False
-
-            curr_row += row_step
-            curr_col += col_step
-
-        return True
+        return self.board_manager.is_clean_line(square1.position, square2.position)
 
     def _is_unobstructed(self, move: Move) -> bool:
         """
@@ -171,70 +197,112 @@ class MoveValidation:
         Includes moves up to the first obstructing piece.
         """
 
-        if isinstance(move.piece, (King, Knight, Pawn)):
-            return True  # Kings, Knights, and Pawns moves are always unobstructed
+        if isinstance(move.piece, (King, Knight)):
+            return True  # Kings and Knights moves are always unobstructed
 
         square_i, square_f = move.square_initial, move.square_final
         return self._is_clean_line_between_squares(square_i, square_f)
 
-    @staticmethod
-    def _get_step(start: int, end: int) -> int:
-        """
-        Returns the needed step is a line direction between two index values of two rows or columns.
-        """
-        return 1 if start < end else -1 if start > end else 0
-
     def _is_revealing_check(self, move: Move) -> bool:
         """
         Determines if a move exposes the king to a check.
-        It checks if the moving piece is in line with the king and
-        if removing it would open up a line of attack from an opposing piece.
+        A pinned piece may only move along its pin line, looked up in the position's pin map.
         """
+        if isinstance(move.piece, King):
+            return False  # The king's own moves do not uncover a line towards itself
 
-        my_color = move.piece.color
-        my_king_ref = self.board_manager.white_king if my_color is Color.WHITE \
-            else self.board_manager.black_king
-        common_line_type = self._get_line_type(move.square_initial.position, my_king_ref.square.position)
-
-        # Check if the king and the piece do not have a common line.
-        if common_line_type is LineType.INVALID:
-            return False
+        pin_positions = self.get_king_safety(move.piece.color).pins.get(move.piece)
+        return pin_positions is not None and move.square_final.position not in pin_positions
 
-        # Check if the piece moves along the common line with the king
-        if common_line_type == self._get_move_line_type(move):
+    def _is_ignoring_check(self, move: Move) -> bool:
+        """
+        Determines if a move of a piece other than the king leaves the king under check.
+        Such a move must capture or block a single checker, and under a double check only the king may move.
+        """
+        if isinstance(move.piece, King):
             return False
 
-        # Check if there is another piece between the king and the piece
-        square1, square2 = my_king_ref.square, move.square_initial  # Starting from the king may be more efficient
-        if not self._is_clean_line_between_squares(square1, square2):
+        king_safety = self.get_king_safety(move.piece.color)
+        if not king_safety.checkers:
             return False
 
-        # Find the first piece 'after' the piece (from the king perspective) along the line
-        next_piece_in_line = self._find_next_piece_in_line(my_king_ref, move.piece)
-
-        # If no next piece in line
-        if next_piece_in_line is None:
-            return False
+        return len(king_safety.checkers) > 1 or move.square_final.position not in king_safety.check_block_positions
 
-        # If next piece in line is a friend
-        if next_piece_in_line.color == my_color:
-            return False
-
-        # If next piece type cannot move to my square by definition
-        if isinstance(next_piece_in_line, (King, Knight, Pawn)):
+    def _is_king_stepping_into_check(self, move: Move) -> bool:
+        """
+        Determines if a king's move lands on a square attacked by the opponent.
+        """
+        if not isinstance(move.piece, King):
             return False
 
-        if isinstance(next_piece_in_line, Rook) and common_line_type in [LineType.ROW, LineType.COLUMN]:
-            return True
-
-        if isinstance(next_piece_in_line, Bishop) \
-                and common_line_type in [LineType.DIAGONAL_RIGHT_UP, LineType.DIAGONAL_RIGHT_DOWN]:
-            return True
-
-        if isinstance(next_piece_in_line, Queen):
+        position_final = move.square_final.position
+        if position_final in self.get_king_safety(move.piece.color).x_ray_positions:
             return True
 
-        raise ValueError("Something went wrong. A piece must be either a King, Knight, Pawn, Rook, Bishop, or Queen.")
+        opponent_color = Color.BLACK if move.piece.color is Color.WHITE else Color.WHITE
+        return self.board_manager.is_square_attacked(position_final, opponent_color)
+
+    def get_king_safety(self, color: Color) -> KingSafety:
+        """
+        Returns the checkers of the king of the specified color and the pieces pinned to it.
+        It is computed once per position and reused by all validations until the board changes.
+        """
+        cached = self._king_safety_cache.get(color)
+        if cached is not None and cached[0] == self.board_manager.version:
+            return cached[1]
+
+        king_safety = self._compute_king_safety(color)
+        self._king_safety_cache[color] = (self.board_manager.version, king_safety)
+        return king_safety
+
+    def _compute_king_safety(self, color: Color) -> KingSafety:
+        """
+        Finds the checkers and the pinned pieces in a single walk outwards from the king along its lines,
+        plus its knight and pawn squares.
+        """
+        my_king = self.board_manager.white_king if color is Color.WHITE else self.board_manager.black_king
+        king_position = my_king.square.position
+        checkers = []
+        check_block_positions = set()
+        pins = {}
+        x_ray_positions = set()
+
+        for direction in ROOK_DIRECTIONS + BISHOP_DIRECTIONS:
+            line_piece_types = (Rook, Queen) if direction in ROOK_DIRECTIONS else (Bishop, Queen)
+            line_positions = []
+            shield = None  # the first friendly piece along the line
+
+            for position in DIRECTION_RAYS[king_position][direction]:
+                line_positions.append(position)
+                occupant = self.board_manager.get_square(*position).occupant
+                if occupant is None:
+                    continue
+
+                if occupant.color is color:
+                    if shield is not None:
+                        break  # two friendly pieces along the line, none of them is pinned
+                    shield = occupant
+                    continue
+
+                if isinstance(occupant, line_piece_types):
+                    if shield is None:
+                        checkers.append(occupant)
+                        check_block_positions.update(line_positions)
+                        x_ray_positions.update(DIRECTION_RAYS[king_position][(-direction[0], -direction[1])][:1])
+                    else:
+                        pins[shield] = frozenset(line_positions)
+                break
+
+        # Pawn attacks are symmetric to the attacks of my pawn standing on the king's square
+        for positions, piece_type in ((KNIGHT_RAYS[king_position].positions, Knight),
+                                      (PAWN_ATTACKS[color][king_position], Pawn)):
+            for position in positions:
+                occupant = self.board_manager.get_square(*position).occupant
+                if isinstance(occupant, piece_type) and occupant.color is not color:
+                    checkers.append(occupant)
+                    check_block_positions.add(position)
+
+        return KingSafety(checkers, check_block_positions, pins, x_ray_positions)
 
     @staticmethod
     def _is_landing_on_friend(move: Move) -> bool:
@@ -249,10 +317,11 @@ class MoveValidation:
     def _is_legal(self, move: Move) -> bool:
         """
         Returns true if the move is legal.
-        # TODO: remove this definition and put _is_revealing_check and _is_landing_on_friend under process_move
-        Legal Move: Includes Unobstructed Moves that don't reveal the king to a check and don't land on a friendly piece.
+        Legal Move: Includes Unobstructed Moves that don't leave or put the own king under check
+        and don't land on a friendly piece. Castling and en passant are not generated, so never checked here.
         """
-        return not (self._is_revealing_check(move) or self._is_landing_on_friend(move))
+        return not (self._is_landing_on_friend(move) or self._is_revealing_check(move)
+                    or self._is_ignoring_check(move) or self._is_king_stepping_into_check(move))
 
     def _is_step(self, move: Move) -> bool:
         """
@@ -314,6 +383,24 @@ class MoveFactory:
         self.validation.process_move(move, allow_move_while_pinned)  # this sets the scope of the move
         return move  # this can return Invalid moves
 
+    def create_legal(self, piece: ChessPiece, position_final: tuple[int, int]) -> Move:
+        """
+        Returns the move of a piece to a final position already known to be legal, e.g. from a cache of legal moves,
+        without validating it again. Its scope is a capture if the final square is occupied, a step otherwise.
+        """
+        square_final = self.board_manager.get_square(*position_final)
+        return Move(piece, MoveScope.CAPTURE if square_final.occupant is not None else MoveScope.STEP, square_final)
+
+    def create_from_code(self, code: int) -> Move:
+        """
+        Returns the move of a compact move code on the current board, with the correct scope.
+        """
+        position_initial, position_final = decode_move_positions(code)
+        piece = self.board_manager.get_square(*position_initial).occupant
+        if piece is None or position_final not in piece.get_hypothetical_moves_final_positions():
+            raise ValueError("The move code does not match a move of a piece on the board.")
+        return self.create(piece, position_final)
+
     def create_threatening_move(self, piece: ChessPiece, position_final: tuple[int, int]) -> Optional[Move]:
         """
         This method is used as a helper method to get the squares threatened by a piece when checking for a check.
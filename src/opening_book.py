@@ -0,0 +1,184 @@
+# opening_book.py
+"""
+An opening book keyed by the Zobrist key of positions, built offline from a PGN corpus and searched
+by bisection over a memory map. Run directly: python opening_book.py --help
+
+Layout, all integers little-endian:
+    header      magic 'CHOB', format version (u16), padding (u16), entry count (u64)
+    entries     one per (position, move) pair, sorted by position key then move code:
+                    Zobrist key (u64), compact move code (u16, see 'move.encode_move'),
+                    weight (u16, the number of games the move was played in, capped)
+
+A lookup reads about log2(entries) keys straight from the mapped file, so probing the book allocates
+nothing beyond the returned moves, whatever its size.
+"""
+import mmap
+import struct
+import sys
+from argparse import ArgumentParser
+from bisect import bisect_left
+from typing import Iterable, Optional
+from game_manager import GameManager
+from move import decode_move_positions
+from pgn import read_pgn_games, find_move_by_san
+from fen import position_to_algebraic
+from config import *
+
+BOOK_MAGIC = b'CHOB'
+BOOK_VERSION = 1
+BOOK_HEADER = struct.Struct('<4sHHQ')
+BOOK_ENTRY = struct.Struct('<QHH')
+BOOK_KEY = struct.Struct('<Q')
+MAX_BOOK_WEIGHT = (1 << 16) - 1
+DEFAULT_BOOK_PLIES = 16
+
+
+class _EntryKeys:
+    """
+    A read-only sequence view of the position keys of the book entries, for 'bisect'.
+    """
+    __slots__ = ('_map', '_count')
+
+    def __init__(self, book_map: mmap.mmap, count: int):
+        self._map = book_map
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> int:
+        return BOOK_KEY.unpack_from(self._map, BOOK_HEADER.size + index * BOOK_ENTRY.size)[0]
+
+
+class OpeningBook:
+    """
+    Reads a book file through a memory map. It is read-only, so one book may be shared by any number of games.
+    """
+    def __init__(self, path: str):
+        self._file = open(path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self.entry_count = BOOK_HEADER.unpack_from(self._map, 0)
+        if magic != BOOK_MAGIC:
+            raise ValueError(f"'{path}' is not an opening book.")
+        if version != BOOK_VERSION:
+            raise ValueError(f"Unsupported opening book version {version}.")
+        self._keys = _EntryKeys(self._map, self.entry_count)
+
+    def __len__(self) -> int:
+        return self.entry_count
+
+    def __contains__(self, position_key: int) -> bool:
+        index = bisect_left(self._keys, position_key)
+        return index < self.entry_count and self._keys[index] == position_key
+
+    def get_moves(self, position_key: int) -> list[tuple[int, int]]:
+        """
+        Returns the (move code, weight) pairs of the book moves of a position, empty if it is not in the book.
+        """
+        moves = []
+        index = bisect_left(self._keys, position_key)
+        while index < self.entry_count:
+            key, move_code, weight = BOOK_ENTRY.unpack_from(self._map, BOOK_HEADER.size + index * BOOK_ENTRY.size)
+            if key != position_key:
+                break
+            moves.append((move_code, weight))
+            index += 1
+        return moves
+
+    def get_best_move_code(self, position_key: int) -> Optional[int]:
+        """
+        Returns the code of the most played book move of a position, or None if it is not in the book.
+        Ties go to the lowest move code, so that replies are deterministic.
+        """
+        moves = self.get_moves(position_key)
+        if not moves:
+            return None
+        return max(moves, key=lambda move: (move[1], -move[0]))[0]
+
+    def close(self) -> None:
+        self._keys = None
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> 'OpeningBook':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def collect_book_moves(lines: Iterable[str], max_plies: int = DEFAULT_BOOK_PLIES) -> dict[tuple[int, int], int]:
+    """
+    Counts the moves played in the first 'max_plies' plies of the PGN games, by (position key, move code).
+    Games starting from a custom position are skipped, and a game stops counting at its first move
+    that cannot be resolved or played.
+    """
+    counts: dict[tuple[int, int], int] = {}
+    for pgn_game in read_pgn_games(lines):
+        if pgn_game.fen is not None:
+            continue
+        game_manager = GameManager()
+        for san in pgn_game.moves[:max_plies]:
+            try:
+                move = find_move_by_san(game_manager.controller, game_manager.current_player_color, san)
+                book_key = (game_manager.controller.zobrist_key, move.code)
+                game_manager.execute_update_validate_on_move(move)
+            except ValueError:
+                break
+            counts[book_key] = counts.get(book_key, 0) + 1
+    return counts
+
+
+def write_book(path: str, counts: dict[tuple[int, int], int], min_count: int = 1) -> int:
+    """
+    Writes the moves played at least 'min_count' times to a book file, sorted for bisection.
+    Returns the number of entries written.
+    """
+    entries = sorted((key, move_code, min(count, MAX_BOOK_WEIGHT))
+                     for (key, move_code), count in counts.items() if count >= min_count)
+    with open(path, 'wb') as file:
+        file.write(BOOK_HEADER.pack(BOOK_MAGIC, BOOK_VERSION, 0, len(entries)))
+        for entry in entries:
+            file.write(BOOK_ENTRY.pack(*entry))
+    return len(entries)
+
+
+def build_book(pgn_paths: list[str], book_path: str, max_plies: int = DEFAULT_BOOK_PLIES, min_count: int = 1) -> int:
+    """
+    Builds a book file from PGN files. Returns the number of entries written.
+    """
+    counts: dict[tuple[int, int], int] = {}
+    for pgn_path in pgn_paths:
+        with open(pgn_path, encoding='utf-8') as pgn_file:
+            for book_key, count in collect_book_moves(pgn_file, max_plies).items():
+                counts[book_key] = counts.get(book_key, 0) + count
+    return write_book(book_path, counts, min_count)
+
+
+def main():
+    parser = ArgumentParser(description="Builds an opening book from PGN files, or probes a book.")
+    subparsers = parser.add_subparsers(dest='task', required=True)
+    build_parser = subparsers.add_parser('build', help="build a book from PGN files")
+    build_parser.add_argument('book', help="book file to write")
+    build_parser.add_argument('pgn', nargs='+', help="PGN files of the games")
+    build_parser.add_argument('--max-plies', type=int, default=DEFAULT_BOOK_PLIES,
+                              help="number of plies read from the start of each game")
+    build_parser.add_argument('--min-count', type=int, default=1, help="number of games a move must be played in")
+    probe_parser = subparsers.add_parser('probe', help="list the book moves of a position")
+    probe_parser.add_argument('book', help="book file to read")
+    probe_parser.add_argument('--fen', default=None, help="position to probe, the initial position by default")
+    args = parser.parse_args()
+
+    if args.task == 'build':
+        entries = build_book(args.pgn, args.book, args.max_plies, args.min_count)
+        print(f"{entries} book entries written to '{args.book}'", file=sys.stderr)
+    else:
+        with OpeningBook(args.book) as book:
+            key = GameManager(fen=args.fen).controller.zobrist_key
+            for move_code, weight in sorted(book.get_moves(key), key=lambda move: -move[1]):
+                print(''.join(position_to_algebraic(position) for position in decode_move_positions(move_code)),
+                      weight)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# parallel.py
+"""
+Parallel perft and search, splitting the work by root move across a pool of processes.
+Run directly: python parallel.py --help
+
+Work is shipped to the workers in compact form, the FEN string of the root position and the 16-bit code
+of the root move, and each worker rebuilds the position on its own board. Results come back as plain
+integers and are merged in the order of the root moves, so the outcome does not depend on the scheduling.
+"""
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from typing import Optional
+from fen import START_FEN, position_to_algebraic
+from move import decode_move_positions
+from perft import PerftResult, create_controller, perft
+from search import MATE_SCORE, MAX_PLY, SearchEngine, SearchResult
+from config import *
+
+
+def _opponent(color: Color) -> Color:
+    return Color.BLACK if color is Color.WHITE else Color.WHITE
+
+
+def get_root_move_codes(fen: str) -> list[int]:
+    """
+    Returns the codes of the legal moves of the side to move in the FEN position, in generation order.
+    """
+    controller, color = create_controller(fen)
+    return [move.code for move in controller.generate_legal_moves(color)]
+
+
+def _perft_root_move(fen: str, move_code: int, depth: int) -> int:
+    """
+    Worker: returns the perft node count below a root move.
+    """
+    controller, color = create_controller(fen)
+    controller.make_move(controller.move_factory.create_from_code(move_code))
+    return perft(controller, _opponent(color), depth - 1)
+
+
+def parallel_divide(depth: int, fen: Optional[str] = None, workers: Optional[int] = None) \
+        -> dict[tuple[tuple[int, int], tuple[int, int]], int]:
+    """
+    Returns the perft node count split per root move, keyed by the (initial, final) positions of the move.
+    'workers' defaults to the number of processors.
+    """
+    if depth < 1:
+        raise ValueError("'depth' must be at least 1 to divide by root moves.")
+
+    fen = fen if fen is not None else START_FEN
+    move_codes = get_root_move_codes(fen)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        counts = executor.map(_perft_root_move, [fen] * len(move_codes), move_codes, [depth] * len(move_codes))
+        return {decode_move_positions(code): nodes for code, nodes in zip(move_codes, counts)}
+
+
+def parallel_perft(depth: int, fen: Optional[str] = None, workers: Optional[int] = None) -> PerftResult:
+    """
+    Runs a timed perft split by root move across processes.
+    """
+    start = perf_counter()
+    nodes = sum(parallel_divide(depth, fen, workers).values()) if depth > 0 else 1
+    return PerftResult(depth, nodes, perf_counter() - start)
+
+
+def _search_root_move(fen: str, move_code: int, depth: int) -> tuple[int, int]:
+    """
+    Worker: searches the position after a root move to 'depth' - 1 plies.
+    Returns the score from the point of view of the root side to move, and the number of nodes searched.
+    """
+    controller, color = create_controller(fen)
+    controller.make_move(controller.move_factory.create_from_code(move_code))
+    result = SearchEngine(controller).search(_opponent(color), max_depth=depth - 1)
+
+    # Mate scores count plies from the root of the search, which is one ply below the root of the split
+    score = -result.score
+    if score >= MATE_SCORE - MAX_PLY:
+        score -= 1
+    elif score <= -MATE_SCORE + MAX_PLY:
+        score += 1
+    return score, result.nodes + 1
+
+
+def parallel_search(depth: int, fen: Optional[str] = None, workers: Optional[int] = None) -> SearchResult:
+    """
+    Searches the best move of the side to move to a fixed depth, each root move in its own task.
+    Root moves share no bounds nor table, so each one is searched with a full window: this trades the
+    pruning of a sequential search for parallelism. Ties go to the first root move in generation order.
+    """
+    if depth < 2:
+        raise ValueError("'depth' must be at least 2 to split the search by root moves.")
+
+    start = perf_counter()
+    fen = fen if fen is not None else START_FEN
+    move_codes = get_root_move_codes(fen)
+    if not move_codes:
+        controller, color = create_controller(fen)
+        score = -MATE_SCORE if controller.is_king_threatened(color) else 0
+        return SearchResult(None, score, 0, 0, perf_counter() - start)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(_search_root_move, [fen] * len(move_codes), move_codes,
+                                    [depth] * len(move_codes)))
+
+    best_index = max(range(len(move_codes)), key=lambda index: (results[index][0], -index))
+    return SearchResult(decode_move_positions(move_codes[best_index]), results[best_index][0], depth,
+                        sum(nodes for _, nodes in results), perf_counter() - start)
+
+
+def main():
+    parser = ArgumentParser(description="Runs perft or a fixed-depth search split by root move across processes.")
+    parser.add_argument('task', choices=['perft', 'divide', 'search'])
+    parser.add_argument('depth', type=int, help="depth of the move tree, in plies")
+    parser.add_argument('--fen', default=None, help="position to start from, the initial position by default")
+    parser.add_argument('--workers', type=int, default=None, help="number of processes, all processors by default")
+    args = parser.parse_args()
+
+    if args.task == 'perft':
+        result = parallel_perft(args.depth, args.fen, args.workers)
+        print(f"depth {result.depth}: {result.nodes} nodes in {result.seconds:.2f}s, "
+              f"{result.nodes_per_second:.0f} nodes/s")
+    elif args.task == 'divide':
+        counts = parallel_divide(args.depth, args.fen, args.workers)
+        for (position_initial, position_final), nodes in sorted(counts.items()):
+            print(f"{position_to_algebraic(position_initial)}{position_to_algebraic(position_final)}: {nodes}")
+        print(f"\nmoves: {len(counts)}, nodes: {sum(counts.values())}")
+    else:
+        result = parallel_search(args.depth, args.fen, args.workers)
+        move = ''.join(position_to_algebraic(position) for position in result.best_move) if result.best_move \
+            else 'none'
+        print(f"best move {move}, score {result.score}, depth {result.depth}: "
+              f"{result.nodes} nodes in {result.seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
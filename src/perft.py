@@ -0,0 +1,151 @@
+# perft.py
+"""
+Perft: counts the leaf nodes of the legal move tree to a fixed depth.
+It is used both to catch rule regressions, against known node counts, and to track move generation throughput.
+Run directly: python perft.py --help
+
+Note the rules as implemented by this project: there is no castling nor en passant,
+and pawns are promoted to queens only. Reference counts are only listed where these make no difference.
+"""
+from argparse import ArgumentParser
+from time import perf_counter
+from typing import Optional
+from game_controller import GameController
+from fen import START_FEN, parse_fen, position_to_algebraic
+from config import *
+
+# (name, FEN, {depth: expected node count})
+PERFT_SUITE = [
+    ("initial position", START_FEN, {1: 20, 2: 400, 3: 8902, 4: 197281}),
+    # Published count at depth 3 is 2812, of which 2 en passant captures at the leaves
+    ("rook and pawns endgame", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", {1: 14, 2: 191, 3: 2810}),
+]
+
+
+class PerftResult:
+    def __init__(self, depth: int, nodes: int, seconds: float):
+        self.depth = depth
+        self.nodes = nodes
+        self.seconds = seconds
+
+    @property
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.seconds if self.seconds > 0 else float('inf')
+
+
+def create_controller(fen: Optional[str] = None,
+                      backend_type: BoardBackendType = BoardBackendType.SQUARE_LIST) -> tuple[GameController, Color]:
+    """
+    Returns a controller set up at the FEN position (or the initial position if None), and the color to move.
+    """
+    if fen is None:
+        return GameController(backend_type), Color.WHITE
+    fen_position = parse_fen(fen)
+    controller = GameController(backend_type, fen_position.layout)
+    controller.castling_rights = fen_position.castling_rights
+    controller.en_passant_position = fen_position.en_passant_position
+    controller.refresh_zobrist_key(fen_position.side_to_move)
+    return controller, fen_position.side_to_move
+
+
+def _opponent(color: Color) -> Color:
+    return Color.BLACK if color is Color.WHITE else Color.WHITE
+
+
+def perft(controller: GameController, color: Color, depth: int) -> int:
+    """
+    Returns the number of leaf nodes of the legal move tree of the specified depth, with 'color' to move.
+    The tree is walked by making and unmaking moves on the live board, which is left as it was found.
+    """
+    if depth == 0:
+        return 1
+
+    legal_moves = controller.generate_legal_moves(color)
+    if depth == 1:
+        return len(legal_moves)  # bulk counting, leaves are not made
+
+    nodes = 0
+    for move in legal_moves:
+        undo = controller.make_move(move)
+        nodes += perft(controller, _opponent(color), depth - 1)
+        controller.unmake_move(undo)
+    return nodes
+
+
+def divide(controller: GameController, color: Color, depth: int) -> dict[tuple[tuple[int, int], tuple[int, int]], int]:
+    """
+    Returns the perft node count split per root move, keyed by the (initial, final) positions of the move.
+    """
+    if depth < 1:
+        raise ValueError("'depth' must be at least 1 to divide by root moves.")
+
+    counts = {}
+    for move in controller.generate_legal_moves(color):
+        undo = controller.make_move(move)
+        counts[(move.square_initial.position, move.square_final.position)] = \
+            perft(controller, _opponent(color), depth - 1)
+        controller.unmake_move(undo)
+    return counts
+
+
+def run_perft(depth: int, fen: Optional[str] = None,
+              backend_type: BoardBackendType = BoardBackendType.SQUARE_LIST) -> PerftResult:
+    """
+    Runs a timed perft from the FEN position, or from the initial position if None.
+    """
+    controller, color = create_controller(fen, backend_type)
+    start = perf_counter()
+    nodes = perft(controller, color, depth)
+    return PerftResult(depth, nodes, perf_counter() - start)
+
+
+def run_suite(max_depth: int, backend_type: BoardBackendType = BoardBackendType.SQUARE_LIST) \
+        -> list[tuple[str, PerftResult, int]]:
+    """
+    Runs every reference position of the suite up to 'max_depth'.
+    Returns (name, result, expected node count) per position and depth.
+    """
+    results = []
+    for name, fen, expected_counts in PERFT_SUITE:
+        for depth, expected_nodes in sorted(expected_counts.items()):
+            if depth <= max_depth:
+                results.append((name, run_perft(depth, fen, backend_type), expected_nodes))
+    return results
+
+
+def main():
+    parser = ArgumentParser(description="Counts the leaf nodes of the legal move tree to a fixed depth.")
+    parser.add_argument('depth', type=int, help="depth of the move tree, in plies")
+    parser.add_argument('--fen', default=None, help="position to start from, the initial position by default")
+    parser.add_argument('--divide', action='store_true', help="split the node count per root move")
+    parser.add_argument('--suite', action='store_true', help="check the reference positions up to the depth")
+    parser.add_argument('--backend', choices=[backend.name.lower() for backend in BoardBackendType],
+                        default=BoardBackendType.SQUARE_LIST.name.lower(), help="board backend")
+    args = parser.parse_args()
+    backend_type = BoardBackendType[args.backend.upper()]
+
+    if args.suite:
+        results = run_suite(args.depth, backend_type)
+        for name, result, expected_nodes in results:
+            status = "ok" if result.nodes == expected_nodes else f"FAILED, expected {expected_nodes}"
+            print(f"{name}, depth {result.depth}: {result.nodes} nodes, "
+                  f"{result.nodes_per_second:.0f} nodes/s -> {status}")
+        if any(result.nodes != expected_nodes for _, result, expected_nodes in results):
+            raise SystemExit(1)
+        return
+
+    if args.divide:
+        controller, color = create_controller(args.fen, backend_type)
+        counts = divide(controller, color, args.depth)
+        for (position_initial, position_final), nodes in sorted(counts.items()):
+            print(f"{position_to_algebraic(position_initial)}{position_to_algebraic(position_final)}: {nodes}")
+        print(f"\nmoves: {len(counts)}, nodes: {sum(counts.values())}")
+        return
+
+    result = run_perft(args.depth, args.fen, backend_type)
+    print(f"depth {result.depth}: {result.nodes} nodes in {result.seconds:.2f}s, "
+          f"{result.nodes_per_second:.0f} nodes/s")
+
+
+if __name__ == "__main__":
+    main()
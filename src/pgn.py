@@ -0,0 +1,123 @@
+# pgn.py
+"""
+Portable Game Notation (PGN) support: lazy reading of games from lines of text,
+and resolution of Standard Algebraic Notation (SAN) moves against a position.
+
+Note the rules as implemented by this project: there is no castling nor en passant,
+and pawns are promoted to queens only. Games relying on them fail to resolve at that move.
+"""
+import re
+from typing import Iterable, Iterator, Optional
+from game_controller import GameController
+from move import Move
+from fen import FEN_PIECE_TYPES, FILES, algebraic_to_position
+from config import *
+
+GAME_RESULTS = {'1-0', '0-1', '1/2-1/2', '*'}
+TAG_PATTERN = re.compile(r'^\[(\w+)\s+"(.*)"\]\s*$')
+SAN_PATTERN = re.compile(r'^([NBRQK])?([a-h])?([1-8])?(x)?([a-h][1-8])(?:=?([NBRQ]))?[+#]?[!?]*$')
+MOVE_NUMBER_PATTERN = re.compile(r'^\d+\.+')
+
+
+class PgnGame:
+    """
+    The tag pairs and the SAN moves of the main line of a game.
+    """
+    def __init__(self, tags: dict[str, str], moves: list[str]):
+        self.tags = tags
+        self.moves = moves
+
+    @property
+    def fen(self) -> Optional[str]:
+        """
+        The FEN of the starting position of the game, or None if it starts from the initial position.
+        """
+        return self.tags.get('FEN')
+
+
+def _strip_annotations(line: str, depth: int, in_comment: bool) -> tuple[str, int, bool]:
+    """
+    Removes the comments and variations from a line of movetext.
+    Returns the remaining text, the nesting depth of variations and whether a brace comment is still open,
+    as both may run on to the next lines.
+    """
+    kept = []
+    for char in line:
+        if in_comment:
+            in_comment = char != '}'
+        elif char == '{':
+            in_comment = True
+        elif char == ';':
+            break  # a comment running to the end of the line
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth = max(depth - 1, 0)
+        elif depth == 0:
+            kept.append(char)
+    return ''.join(kept), depth, in_comment
+
+
+def read_pgn_games(lines: Iterable[str]) -> Iterator[PgnGame]:
+    """
+    Yields the games of PGN text one at a time, reading the lines lazily; only the current game is held.
+    A game ends at its result token, or at the tags of the next game.
+    """
+    tags: dict[str, str] = {}
+    moves: list[str] = []
+    depth, in_comment = 0, False
+
+    for line in lines:
+        stripped = line.strip()
+        if not in_comment and depth == 0:
+            tag_match = TAG_PATTERN.match(stripped)
+            if tag_match:
+                if moves:  # a game without a result token
+                    yield PgnGame(tags, moves)
+                    tags, moves = {}, []
+                tags[tag_match.group(1)] = tag_match.group(2)
+                continue
+            if stripped.startswith('%'):
+                continue  # an escaped line
+
+        text, depth, in_comment = _strip_annotations(stripped, depth, in_comment)
+        for token in text.split():
+            if token in GAME_RESULTS:
+                yield PgnGame(tags, moves)
+                tags, moves = {}, []
+                continue
+            token = MOVE_NUMBER_PATTERN.sub('', token)
+            if token and not token.startswith('$'):  # '$' starts a numeric annotation glyph
+                moves.append(token)
+
+    if tags or moves:
+        yield PgnGame(tags, moves)
+
+
+def find_move_by_san(controller: GameController, color: Color, san: str) -> Move:
+    """
+    Returns the legal move of 'color' written 'san' in the current position.
+    Raises ValueError if the notation is invalid, unsupported, or does not match exactly one legal move.
+    """
+    if san.startswith('O-O') or san.startswith('0-0'):
+        raise ValueError(f"Castling is not supported: '{san}'")
+
+    san_match = SAN_PATTERN.match(san)
+    if san_match is None:
+        raise ValueError(f"Invalid SAN move: '{san}'")
+    piece_symbol, from_file, from_rank, _, target, promotion = san_match.groups()
+    if promotion is not None and promotion != 'Q':
+        raise ValueError(f"Only promotions to a queen are supported: '{san}'")
+
+    piece_type = FEN_PIECE_TYPES[piece_symbol.lower()] if piece_symbol else PieceType.PAWN
+    target_position = algebraic_to_position(target)
+    from_col = FILES.index(from_file) if from_file else None
+    from_row = int(from_rank) - 1 if from_rank else None
+
+    candidates = [move for move in controller.generate_legal_moves(color)
+                  if move.piece.piece_type is piece_type and move.square_final.position == target_position
+                  and from_col in (None, move.square_initial.position[1])
+                  and from_row in (None, move.square_initial.position[0])]
+    if len(candidates) != 1:
+        raise ValueError(f"SAN move '{san}' matches {len(candidates)} legal moves")
+    return candidates[0]
@@ -0,0 +1,202 @@
+# position_encoding.py
+"""
+Array encodings of 'GameManager' positions for machine learning datasets, and a writer appending them to a
+memory-mapped .npy file. Requires NumPy.
+
+Plane encoding, (18, 8, 8) uint8 indexed [plane, row, col]:
+    0-11    one plane per piece type and color, 'color.value * 6 + piece_type.order', as in 'batch_movegen'
+    12      all ones if white is to move
+    13-16   all ones per castling right held, in the order of 'CastlingRight'
+    17      one on the en passant square, if any
+
+Packed encoding, 34 bytes:
+    0-31    two squares per byte, square 'row * 8 + col' in the low nibble of byte 'index // 2' if it is even,
+            in the high nibble otherwise; a nibble holds 0 for an empty square, else 1 + the piece plane
+    32      bit 0 set if white is to move, bits 1-4 set per castling right held
+    33      column + 1 of the en passant square, 0 if none
+"""
+import numpy as np
+from typing import Optional
+from config import *
+
+PIECE_PLANE_COUNT = 2 * len(PieceType)
+SIDE_TO_MOVE_PLANE = PIECE_PLANE_COUNT
+CASTLING_PLANES = {right: SIDE_TO_MOVE_PLANE + 1 + index for index, right in enumerate(CastlingRight)}
+EN_PASSANT_PLANE = SIDE_TO_MOVE_PLANE + 1 + len(CastlingRight)
+PLANE_COUNT = EN_PASSANT_PLANE + 1
+PLANES_SHAPE = (PLANE_COUNT, BOARD_SIZE, BOARD_SIZE)
+
+PACKED_SIZE = BOARD_SIZE * BOARD_SIZE // 2 + 2
+FLAGS_BYTE = PACKED_SIZE - 2
+EN_PASSANT_BYTE = PACKED_SIZE - 1
+
+
+def get_piece_plane(piece_type: PieceType, color: Color) -> int:
+    return color.value * len(PieceType) + piece_type.order
+
+
+def _get_piece_arrays(game_manager: 'GameManager') -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns the planes, rows and columns of the pieces on the board, looping over the pieces rather than squares.
+    """
+    pieces = game_manager.board_manager.white_pieces | game_manager.board_manager.black_pieces
+    planes, rows, cols = [], [], []
+    for piece in pieces:
+        row, col = piece.square.position
+        planes.append(get_piece_plane(piece.piece_type, piece.color))
+        rows.append(row)
+        cols.append(col)
+    return np.array(planes, dtype=np.intp), np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)
+
+
+def encode_planes(game_manager: 'GameManager', out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Returns the plane encoding of the current position of a game.
+    If 'out' is given, e.g. a row of a memory-mapped dataset, the planes are written into it in place.
+    """
+    planes = np.zeros(PLANES_SHAPE, dtype=np.uint8) if out is None else out
+    if out is not None:
+        planes.fill(0)
+
+    piece_planes, rows, cols = _get_piece_arrays(game_manager)
+    planes[piece_planes, rows, cols] = 1
+
+    controller = game_manager.controller
+    if game_manager.current_player_color is Color.WHITE:
+        planes[SIDE_TO_MOVE_PLANE] = 1
+    for right in controller.castling_rights:
+        planes[CASTLING_PLANES[right]] = 1
+    if controller.en_passant_position is not None:
+        planes[EN_PASSANT_PLANE][controller.en_passant_position] = 1
+    return planes
+
+
+def encode_packed(game_manager: 'GameManager', out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Returns the packed encoding of the current position of a game, as (34,) uint8.
+    If 'out' is given, the bytes are written into it in place.
+    """
+    packed = np.zeros(PACKED_SIZE, dtype=np.uint8) if out is None else out
+    if out is not None:
+        packed.fill(0)
+
+    piece_planes, rows, cols = _get_piece_arrays(game_manager)
+    indices = rows * BOARD_SIZE + cols
+    nibbles = (piece_planes + 1) << (4 * (indices % 2))
+    np.add.at(packed, indices // 2, nibbles.astype(np.uint8))  # two squares may share a byte
+
+    controller = game_manager.controller
+    flags = int(game_manager.current_player_color is Color.WHITE)
+    for right in controller.castling_rights:
+        flags |= 1 << (CASTLING_PLANES[right] - SIDE_TO_MOVE_PLANE)
+    packed[FLAGS_BYTE] = flags
+    if controller.en_passant_position is not None:
+        packed[EN_PASSANT_BYTE] = controller.en_passant_position[1] + 1
+    return packed
+
+
+def packed_to_planes(packed: np.ndarray) -> np.ndarray:
+    """
+    Unpacks an (N, 34) batch of packed encodings into (N, 18, 8, 8) planes, without looping over squares.
+    The en passant square is on the row passed over by the last double step, which depends on the side to move.
+    """
+    packed = np.asarray(packed, dtype=np.uint8).reshape(-1, PACKED_SIZE)
+    count = len(packed)
+    planes = np.zeros((count,) + PLANES_SHAPE, dtype=np.uint8)
+
+    board_bytes = packed[:, :FLAGS_BYTE]
+    nibbles = np.stack([board_bytes & 0x0F, board_bytes >> 4], axis=2).reshape(count, BOARD_SIZE, BOARD_SIZE)
+    batch, rows, cols = np.nonzero(nibbles)
+    planes[batch, nibbles[batch, rows, cols].astype(np.intp) - 1, rows, cols] = 1
+
+    flags = packed[:, FLAGS_BYTE]
+    for plane in range(SIDE_TO_MOVE_PLANE, EN_PASSANT_PLANE):
+        planes[:, plane] = ((flags >> (plane - SIDE_TO_MOVE_PLANE)) & 1)[:, None, None]
+
+    batch = np.nonzero(packed[:, EN_PASSANT_BYTE])[0]
+    white_to_move = (flags[batch] & 1).astype(bool)
+    en_passant_rows = np.where(white_to_move, BOARD_SIZE - 3, 2)
+    planes[batch, EN_PASSANT_PLANE, en_passant_rows, packed[batch, EN_PASSANT_BYTE].astype(np.intp) - 1] = 1
+    return planes
+
+
+class PositionWriter:
+    """
+    Appends encoded positions to a memory-mapped .npy file, growing it as needed.
+    The file holds an (N, 18, 8, 8) or (N, 34) uint8 array readable with 'np.load(path, mmap_mode="r")'
+    once the writer is closed.
+
+    The .npy header is written with a fixed size, so that it can be rewritten in place whenever the number
+    of rows changes; rows themselves are written once, straight into the mapped file.
+    """
+    HEADER_SIZE = 128  # magic string, version, header length and the padded header, a multiple of 64 bytes
+
+    def __init__(self, path: str, packed: bool = False, initial_capacity: int = 1024):
+        self.path = path
+        self.encode = encode_packed if packed else encode_planes
+        self.row_shape = (PACKED_SIZE,) if packed else PLANES_SHAPE
+        self.row_size = int(np.prod(self.row_shape))
+        self.count = 0
+        self.capacity = 0
+        self._array: Optional[np.memmap] = None
+
+        with open(path, 'wb'):
+            pass
+        self._resize(max(initial_capacity, 1))
+
+    def _write_header(self, rows: int) -> None:
+        header = repr({'descr': np.dtype(np.uint8).str, 'fortran_order': False, 'shape': (rows,) + self.row_shape})
+        prefix = b'\x93NUMPY\x01\x00' + (self.HEADER_SIZE - 10).to_bytes(2, 'little')
+        with open(self.path, 'r+b') as file:
+            file.write(prefix + header.ljust(self.HEADER_SIZE - len(prefix) - 1).encode('latin1') + b'\n')
+
+    def _resize(self, capacity: int) -> None:
+        """
+        Resizes the file to hold 'capacity' rows, and maps it again.
+        """
+        if self._array is not None:
+            self._array.flush()
+            self._array = None
+        with open(self.path, 'r+b') as file:
+            file.truncate(self.HEADER_SIZE + capacity * self.row_size)
+        self._write_header(capacity)
+        self.capacity = capacity
+        self._array = np.memmap(self.path, dtype=np.uint8, mode='r+', offset=self.HEADER_SIZE,
+                                shape=(capacity,) + self.row_shape)
+
+    def append(self, game_manager: 'GameManager') -> None:
+        """
+        Encodes the current position of a game straight into the next row of the file.
+        """
+        if self.count == self.capacity:
+            self._resize(2 * self.capacity)
+        self.encode(game_manager, out=self._array[self.count])
+        self.count += 1
+
+    def append_batch(self, rows: np.ndarray) -> None:
+        """
+        Appends already encoded positions, an array of rows of the writer's encoding.
+        """
+        rows = np.asarray(rows, dtype=np.uint8).reshape((-1,) + self.row_shape)
+        if self.count + len(rows) > self.capacity:
+            self._resize(max(2 * self.capacity, self.count + len(rows)))
+        self._array[self.count:self.count + len(rows)] = rows
+        self.count += len(rows)
+
+    def close(self) -> None:
+        """
+        Shrinks the file to the rows written. The writer may not be used afterwards.
+        """
+        if self._array is None:
+            return
+        self._array.flush()
+        self._array = None
+        with open(self.path, 'r+b') as file:
+            file.truncate(self.HEADER_SIZE + self.count * self.row_size)
+        self._write_header(self.count)
+
+    def __enter__(self) -> 'PositionWriter':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
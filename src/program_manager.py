@@ -1,11 +1,63 @@
 # program_manager.py
 from game_manager import GameManager
+from search import SearchEngine, TranspositionTable
+from opening_book import OpeningBook
+from tablebase import Tablebase
+from move import decode_move_positions
 from config import *
+from typing import Optional
+from collections import OrderedDict
+
+
+# Number of (position, color) entries kept by the legal moves cache of a program manager
+LEGAL_MOVES_CACHE_SIZE = 64
 
 
 class ProgramManager:
-    def __init__(self):
-        self._game_manager = GameManager()
+    def __init__(self, fen: Optional[str] = None, opening_book: Optional[OpeningBook] = None,
+                 tablebase: Optional[Tablebase] = None, search_table: Optional[TranspositionTable] = None,
+                 legal_moves_cache_size: int = LEGAL_MOVES_CACHE_SIZE):
+        """
+        Starts a game from the initial position, or from the position of a FEN string if specified.
+        The opening book and the tablebase, if any, are consulted before searching for the best move,
+        and may be shared by games. So may the transposition table of the search, otherwise the game gets its own.
+        """
+        self._game_manager = GameManager(fen=fen, tablebase=tablebase)
+        self._opening_book = opening_book
+        self._search_table = search_table
+        self._search_engine: Optional[SearchEngine] = None  # created on the first search
+        self._legal_moves_cache_size = legal_moves_cache_size
+        # (Zobrist key, color) -> legal moves final positions by current position, from the least to the most
+        # recently used. A changed board has another key, so entries never need to be invalidated explicitly
+        self._legal_moves_cache: OrderedDict[tuple[int, Color], dict[tuple[int, int], frozenset[tuple[int, int]]]] \
+            = OrderedDict()
+
+    def _get_cached_legal_moves(self, color: Color) -> dict[tuple[int, int], frozenset[tuple[int, int]]]:
+        """
+        Returns the legal moves final positions of all pieces of the specified color, by their current position.
+        They are generated in one pass on the first query in a position, and served from the cache afterwards.
+        """
+        cache_key = (self._game_manager.controller.zobrist_key, color)
+        legal_moves_positions = self._legal_moves_cache.get(cache_key)
+        if legal_moves_positions is not None:
+            self._legal_moves_cache.move_to_end(cache_key)
+            return legal_moves_positions
+
+        collected: dict[tuple[int, int], set[tuple[int, int]]] = {}
+        for move in self._game_manager.controller.generate_legal_moves(color):
+            collected.setdefault(move.square_initial.position, set()).add(move.square_final.position)
+        legal_moves_positions = {position: frozenset(final_positions)
+                                 for position, final_positions in collected.items()}
+
+        self._legal_moves_cache[cache_key] = legal_moves_positions
+        if len(self._legal_moves_cache) > self._legal_moves_cache_size:
+            self._legal_moves_cache.popitem(last=False)
+        return legal_moves_positions
+
+    def _get_search_engine(self) -> SearchEngine:
+        if self._search_engine is None:
+            self._search_engine = SearchEngine(self._game_manager.controller, table=self._search_table)
+        return self._search_engine
 
     def get_board_state(self) -> list[list[(PieceType, Color) or (None, None)]]:
         """
@@ -22,24 +74,37 @@ class ProgramManager:
         if not piece:
             assert piece is not None, "There is no piece on the specified square."
             return set()
-        legal_moves = self._game_manager.controller.get_legal_moves(piece)
-        legal_moves_final_positions = {move.square_final.position
-                                       for move_scope_set in legal_moves.values()
-                                       for move in move_scope_set if move.is_legal}
-        return legal_moves_final_positions
+        return set(self._get_cached_legal_moves(piece.color).get(position, ()))
+
+    def generate_legal_moves(self, color: Color) -> dict[tuple[int, int], set[tuple[int, int]]]:
+        """
+        Returns the legal moves final positions of all pieces of the specified color, by their current position.
+        """
+        return {position: set(final_positions)
+                for position, final_positions in self._get_cached_legal_moves(color).items()}
 
     def execute_move_by_position(self, piece_current_position: tuple[int, int],
-                                 piece_final_position: tuple[int, int]) -> None:
+                                 piece_final_position: tuple[int, int]) -> list[tuple[int, int]]:
         """
         Executes a move on the board by the current position of the piece, and its wanted final position.
+        Returns the positions of the squares changed by the move.
         """
         square_current = self._game_manager.board_manager.get_square(*piece_current_position)
         piece = square_current.occupant
         assert piece is not None, "There is no piece on the specified square."
 
-        move = self._game_manager.controller.move_factory.create(piece, piece_final_position)
+        move_factory = self._game_manager.controller.move_factory
+        cached_legal_moves = self._legal_moves_cache.get((self._game_manager.controller.zobrist_key, piece.color))
+        if cached_legal_moves is not None:
+            # The move was validated when the cache entry was filled, e.g. while highlighting the piece's moves
+            if piece_final_position not in cached_legal_moves.get(piece_current_position, ()):
+                raise ValueError("Illegal move.")
+            move = move_factory.create_legal(piece, piece_final_position)
+        else:
+            move = move_factory.create(piece, piece_final_position)
+
         if move and move.is_legal:
-            self._game_manager.execute_update_validate_on_move(move)
+            return self._game_manager.execute_update_validate_on_move(move)
         else:
             raise ValueError("Illegal move.")
 
@@ -51,3 +116,43 @@ class ProgramManager:
 
     def get_check_status(self) -> CheckStatus:
         return self._game_manager.check_status
+
+    def get_checking_positions(self) -> list[tuple[int, int]]:
+        return [piece.square.position for piece in self._game_manager.checkers]
+
+    def get_position_hash(self) -> int:
+        return self._game_manager.controller.zobrist_key
+
+    def get_book_move(self) -> tuple[tuple[int, int], tuple[int, int]] or None:
+        """
+        Returns the most played book move of the current position, as (current, final) positions.
+        Returns None if there is no book, or the position is not in it.
+        """
+        if self._opening_book is None:
+            return None
+        move_code = self._opening_book.get_best_move_code(self._game_manager.controller.zobrist_key)
+        if move_code is None:
+            return None
+
+        # Guards against a collision of position keys, however unlikely
+        position_current, position_final = decode_move_positions(move_code)
+        legal_moves = self._get_cached_legal_moves(self._game_manager.current_player_color)
+        if position_final not in legal_moves.get(position_current, ()):
+            return None
+        return position_current, position_final
+
+    def get_best_move(self, time_ms: int) -> tuple[tuple[int, int], tuple[int, int]] or None:
+        """
+        Returns the best move for the current player, as (current, final) positions: the book move if the position
+        is in the opening book, the tablebase move if it is in the tablebase, otherwise the best move found by
+        a search within the time budget.
+        Returns None if the current player has no legal move.
+        """
+        book_move = self.get_book_move()
+        if book_move is not None:
+            return book_move
+        tablebase_move = self._game_manager.get_tablebase_move()
+        if tablebase_move is not None:
+            return tablebase_move
+        result = self._get_search_engine().search(self._game_manager.current_player_color, time_ms=time_ms)
+        return result.best_move
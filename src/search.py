@@ -0,0 +1,272 @@
+# search.py
+"""
+An alpha-beta search engine built on 'GameController', to play against.
+It deepens iteratively within a time or node budget, reuses results across iterations and moves through a
+fixed-size transposition table keyed by the position's Zobrist key, and orders moves by the table's best move,
+captures (most valuable victim, least valuable attacker first) and killer moves.
+"""
+from enum import Enum
+from time import perf_counter
+from typing import Optional
+from game_controller import GameController
+from move import Move, decode_move_positions
+from config import *
+
+PIECE_VALUES = {PieceType.PAWN: 100, PieceType.KNIGHT: 320, PieceType.BISHOP: 330,
+                PieceType.ROOK: 500, PieceType.QUEEN: 900, PieceType.KING: 0}
+MATE_SCORE = 100000
+MAX_PLY = 64
+INFINITY = MATE_SCORE + MAX_PLY + 1
+
+# Small positional bonus per square, larger at the center of the board
+CENTER_BONUS = [[int(2 * (3.5 - max(abs(row - 3.5), abs(col - 3.5)))) * 5 for col in range(BOARD_SIZE)]
+                for row in range(BOARD_SIZE)]
+
+
+class ScoreBound(Enum):
+    """
+    Enum representing how a score stored in the transposition table relates to the exact score of its position.
+    """
+    EXACT = 0
+    LOWER = 1  # the search failed high, the exact score is at least the stored score
+    UPPER = 2  # the search failed low, the exact score is at most the stored score
+
+
+class TranspositionTable:
+    """
+    A fixed-size table of search results indexed by the low bits of the position's Zobrist key.
+    Each slot holds a single entry (key, depth, score, bound, best move code, generation).
+    An entry is replaced by a search of at least its depth, or by any search of a newer generation.
+    """
+    def __init__(self, size_log2: int = 16):
+        self.mask = (1 << size_log2) - 1
+        self.entries: list[Optional[tuple]] = [None] * (1 << size_log2)
+        self.generation = 0
+
+    def new_search(self) -> None:
+        """
+        Marks the entries stored so far as older than those of the upcoming search.
+        """
+        self.generation += 1
+
+    def probe(self, key: int) -> Optional[tuple]:
+        entry = self.entries[key & self.mask]
+        return entry if entry is not None and entry[0] == key else None
+
+    def store(self, key: int, depth: int, score: int, bound: ScoreBound, best_move: Optional[int]) -> None:
+        index = key & self.mask
+        entry = self.entries[index]
+        if entry is None or entry[5] != self.generation or depth >= entry[1]:
+            self.entries[index] = (key, depth, score, bound, best_move, self.generation)
+
+
+class SearchResult:
+    def __init__(self, best_move: Optional[tuple[tuple[int, int], tuple[int, int]]], score: int, depth: int,
+                 nodes: int, seconds: float):
+        self.best_move = best_move  # (initial position, final position) or None if there is no legal move
+        self.score = score  # in centipawns, from the point of view of the side to move
+        self.depth = depth  # of the last completed iteration
+        self.nodes = nodes
+        self.seconds = seconds
+
+
+class _SearchAborted(Exception):
+    """
+    Raised inside the search once its budget is exhausted.
+    """
+    pass
+
+
+def _opponent(color: Color) -> Color:
+    return Color.BLACK if color is Color.WHITE else Color.WHITE
+
+
+class SearchEngine:
+    def __init__(self, controller: GameController, table_size_log2: int = 16,
+                 table: Optional[TranspositionTable] = None):
+        """
+        'table' may be shared by engines searching different games, as entries are keyed by the whole position;
+        the engine gets its own table of 2^table_size_log2 slots otherwise.
+        """
+        self.controller = controller
+        self.table = table if table is not None else TranspositionTable(table_size_log2)
+        self.killer_moves: list[list[int]] = [[] for _ in range(MAX_PLY)]
+        self.nodes = 0
+        self._deadline: Optional[float] = None
+        self._max_nodes: Optional[int] = None
+        self._root_best_move: Optional[int] = None
+
+    def evaluate(self, color: Color) -> int:
+        """
+        Returns the static evaluation of the position, material plus placement, from the point of view of 'color'.
+        """
+        score = 0
+        for pieces, sign in ((self.controller.board_manager.white_pieces, 1),
+                             (self.controller.board_manager.black_pieces, -1)):
+            for piece in pieces:
+                row, col = piece.square.position
+                value = PIECE_VALUES[piece.piece_type]
+                if piece.piece_type is PieceType.PAWN:
+                    value += 5 * (row - 1 if piece.color is Color.WHITE else 6 - row)
+                elif piece.piece_type is not PieceType.KING:
+                    value += CENTER_BONUS[row][col]
+                score += sign * value
+        return score if color is Color.WHITE else -score
+
+    def search(self, color: Color, time_ms: Optional[int] = None, max_nodes: Optional[int] = None,
+               max_depth: int = MAX_PLY) -> SearchResult:
+        """
+        Searches the best move for 'color' by iterative deepening, until the time or node budget runs out.
+        The result of the last completed iteration is returned; the board is left as it was found.
+        """
+        start = perf_counter()
+        self._deadline = start + time_ms / 1000 if time_ms is not None else None
+        self._max_nodes = max_nodes
+        self.nodes = 0
+        self.killer_moves = [[] for _ in range(MAX_PLY)]
+        self.table.new_search()
+
+        root_moves = self.controller.generate_legal_moves(color)
+        if not root_moves:
+            score = -MATE_SCORE if self.controller.is_king_threatened(color) else 0
+            return SearchResult(None, score, 0, 0, perf_counter() - start)
+
+        best_move, best_score, completed_depth = self._order_moves(root_moves, None, 0)[0].code, 0, 0
+        for depth in range(1, min(max_depth, MAX_PLY - 1) + 1):
+            try:
+                best_score = self._negamax(color, depth, -INFINITY, INFINITY, 0)
+            except _SearchAborted:
+                break
+            best_move, completed_depth = self._root_best_move, depth
+            if abs(best_score) >= MATE_SCORE - MAX_PLY:
+                break  # a forced mate was found, deeper iterations cannot improve it
+
+        return SearchResult(decode_move_positions(best_move), best_score, completed_depth, self.nodes,
+                            perf_counter() - start)
+
+    def _count_node(self) -> None:
+        self.nodes += 1
+        if self._max_nodes is not None and self.nodes >= self._max_nodes:
+            raise _SearchAborted()
+        if self._deadline is not None and self.nodes % 16 == 0 and perf_counter() >= self._deadline:
+            raise _SearchAborted()
+
+    def _order_moves(self, moves: list[Move], table_move: Optional[int], ply: int) -> list[Move]:
+        """
+        Orders moves by: the transposition table's best move, captures by MVV-LVA, killer moves, then the rest.
+        """
+        killers = self.killer_moves[ply]
+
+        def order(move: Move) -> int:
+            key = move.code
+            if key == table_move:
+                return -10 * INFINITY
+            if move.captured_piece is not None:
+                victim_value = PIECE_VALUES[move.captured_piece.piece_type]
+                return -INFINITY - 10 * victim_value + PIECE_VALUES[move.piece.piece_type]
+            if key in killers:
+                return -INFINITY // 2 + killers.index(key)
+            return 0
+
+        return sorted(moves, key=order)
+
+    def _store_killer(self, move: Move, ply: int) -> None:
+        key = move.code
+        killers = self.killer_moves[ply]
+        if key not in killers:
+            killers.insert(0, key)
+            del killers[2:]
+
+    @staticmethod
+    def _score_to_table(score: int, ply: int) -> int:
+        """
+        Mate scores are stored relative to the stored position rather than to the root.
+        """
+        if score >= MATE_SCORE - MAX_PLY:
+            return score + ply
+        if score <= -MATE_SCORE + MAX_PLY:
+            return score - ply
+        return score
+
+    @staticmethod
+    def _score_from_table(score: int, ply: int) -> int:
+        if score >= MATE_SCORE - MAX_PLY:
+            return score - ply
+        if score <= -MATE_SCORE + MAX_PLY:
+            return score + ply
+        return score
+
+    def _negamax(self, color: Color, depth: int, alpha: int, beta: int, ply: int) -> int:
+        self._count_node()
+        key = self.controller.zobrist_key
+
+        entry = self.table.probe(key)
+        table_move = None
+        if entry is not None:
+            table_move = entry[4]
+            if entry[1] >= depth and ply > 0:
+                score, bound = self._score_from_table(entry[2], ply), entry[3]
+                if bound is ScoreBound.EXACT \
+                        or (bound is ScoreBound.LOWER and score >= beta) \
+                        or (bound is ScoreBound.UPPER and score <= alpha):
+                    return score
+
+        if depth <= 0 or ply >= MAX_PLY - 1:
+            return self._quiescence(color, alpha, beta, ply)
+
+        moves = self.controller.generate_legal_moves(color)
+        if not moves:
+            return -MATE_SCORE + ply if self.controller.is_king_threatened(color) else 0
+
+        original_alpha = alpha
+        best_score, best_move = -INFINITY, None
+        for move in self._order_moves(moves, table_move, ply):
+            undo = self.controller.make_move(move)
+            try:
+                score = -self._negamax(_opponent(color), depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                self.controller.unmake_move(undo)
+
+            if score > best_score:
+                best_score, best_move = score, move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                if move.captured_piece is None:
+                    self._store_killer(move, ply)
+                break
+
+        if best_score <= original_alpha:
+            bound = ScoreBound.UPPER
+        elif best_score >= beta:
+            bound = ScoreBound.LOWER
+        else:
+            bound = ScoreBound.EXACT
+        self.table.store(key, depth, self._score_to_table(best_score, ply), bound, best_move.code)
+        if ply == 0:
+            self._root_best_move = best_move.code
+        return best_score
+
+    def _quiescence(self, color: Color, alpha: int, beta: int, ply: int) -> int:
+        """
+        Searches captures only until the position is quiet, so that the static evaluation is not taken mid-exchange.
+        """
+        self._count_node()
+        stand_pat = self.evaluate(color)
+        if stand_pat >= beta or ply >= MAX_PLY - 1:
+            return stand_pat
+        alpha = max(alpha, stand_pat)
+
+        captures = [move for move in self.controller.generate_legal_moves(color) if move.captured_piece is not None]
+        for move in self._order_moves(captures, None, ply):
+            undo = self.controller.make_move(move)
+            try:
+                score = -self._quiescence(_opponent(color), -beta, -alpha, ply + 1)
+            finally:
+                self.controller.unmake_move(undo)
+
+            if score >= beta:
+                return score
+            alpha = max(alpha, score)
+
+        return alpha
@@ -0,0 +1,162 @@
+# server.py
+"""
+An asyncio network front-end serving the games of a 'SessionManager' over TCP, in JSON lines.
+Run directly: python server.py --help
+
+Each request is a JSON object on its own line:
+    {"id": 1, "method": "execute_move_by_position", "session": "<session ID>",
+     "params": {"piece_current_position": [1, 4], "piece_final_position": [3, 4]}}
+and is answered by a line holding the same ID and either a result or an error message:
+    {"id": 1, "result": [[1, 4], [3, 4]]}
+    {"id": 1, "error": "Illegal move."}
+
+Requests may be pipelined: a client may send any number of requests without waiting for their responses.
+The requests of one connection are handled in order, so their responses come back in the same order.
+Positions are [row, col] pairs, and enums are sent by their names.
+"""
+import asyncio
+import json
+from argparse import ArgumentParser
+from enum import Enum
+from typing import Any, Optional
+from session_manager import SessionManager
+from opening_book import OpeningBook
+from config import *
+
+DEFAULT_PORT = 8765
+
+# Method name -> names of its parameters, in the order of the 'APIManager' method arguments
+API_METHODS: dict[str, tuple[str, ...]] = {
+    'get_board_state': (),
+    'get_legal_moves_positions_by_position': ('position',),
+    'generate_legal_moves': ('color',),
+    'execute_move_by_position': ('piece_current_position', 'piece_final_position'),
+    'get_game_status': (),
+    'get_current_player': (),
+    'get_check_status': (),
+    'get_checking_positions': (),
+    'get_position_hash': (),
+    'get_book_move': (),
+}
+POSITION_PARAMS = {'position', 'piece_current_position', 'piece_final_position'}
+
+
+def to_json_value(value: Any) -> Any:
+    """
+    Converts an API result to JSON-compatible values: enums to names, tuples and sets to lists.
+    """
+    if isinstance(value, Enum):
+        return value.name
+    if isinstance(value, dict):
+        return [[to_json_value(key), to_json_value(item)] for key, item in value.items()]
+    if isinstance(value, (set, frozenset)):
+        return sorted(to_json_value(item) for item in value)
+    if isinstance(value, (list, tuple)):
+        return [to_json_value(item) for item in value]
+    return value
+
+
+def _parse_param(name: str, value: Any) -> Any:
+    if name in POSITION_PARAMS:
+        if not isinstance(value, list) or len(value) != 2 or \
+                any(not isinstance(coordinate, int) or isinstance(coordinate, bool) for coordinate in value):
+            raise ValueError(f"Position must be a [row, col] pair of integers, not {json.dumps(value)}.")
+        row, col = value
+        if not (0 <= row < BOARD_SIZE and 0 <= col < BOARD_SIZE):
+            raise ValueError(f"Position {[row, col]} is off the board.")
+        return row, col
+    if name == 'color':
+        return Color[value]
+    return value
+
+
+class ChessServer:
+    def __init__(self, session_manager: Optional[SessionManager] = None):
+        self.session_manager = session_manager if session_manager is not None else SessionManager()
+        self.requests_handled = 0
+
+    def handle_request(self, request: dict) -> Any:
+        """
+        Runs a single decoded request, and returns its JSON-compatible result.
+        Raises KeyError for an unknown session, ValueError or TypeError if the request is invalid or the move illegal.
+        """
+        method = request.get('method')
+        params = request.get('params') or {}
+
+        if method == 'create_session':
+            return self.session_manager.create_session(params.get('fen'))
+        if method == 'close_session':
+            self.session_manager.close_session(request.get('session'))
+            return None
+        if method not in API_METHODS:
+            raise ValueError(f"Unknown method '{method}'.")
+
+        missing_params = [name for name in API_METHODS[method] if name not in params]
+        if missing_params:
+            raise ValueError(f"Missing parameters: {', '.join(missing_params)}.")
+
+        api_manager = self.session_manager.get_api_manager(request.get('session'))
+        args = [_parse_param(name, params[name]) for name in API_METHODS[method]]
+        return to_json_value(getattr(api_manager, method)(*args))
+
+    def handle_line(self, line: bytes) -> bytes:
+        """
+        Answers a single request line with a response line. Errors are reported to the client, never raised.
+        """
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            response = {'id': request_id, 'result': self.handle_request(request)}
+        except KeyError as e:
+            response = {'id': request_id, 'error': str(e.args[0]) if e.args else type(e).__name__}
+        except (LookupError, ValueError, TypeError, AssertionError, AttributeError) as e:
+            response = {'id': request_id, 'error': str(e) or type(e).__name__}
+        self.requests_handled += 1
+        return json.dumps(response, separators=(',', ':')).encode() + b'\n'
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while line := await reader.readline():
+                if line.strip():
+                    writer.write(self.handle_line(line))
+                    await writer.drain()  # returns at once unless the client stopped reading its responses
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = '127.0.0.1', port: int = DEFAULT_PORT) -> asyncio.Server:
+        """
+        Starts listening, and returns the server. Port 0 picks a free port.
+        """
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+async def serve(host: str, port: int, session_manager: SessionManager) -> None:
+    server = await ChessServer(session_manager).start(host, port)
+    print(f"Serving on {', '.join(str(socket.getsockname()) for socket in server.sockets)}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = ArgumentParser(description="Serves chess games over TCP, in JSON lines.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--max-sessions', type=int, default=10000)
+    parser.add_argument('--idle-timeout-s', type=float, default=1800)
+    parser.add_argument('--book', default=None, help="opening book file, see opening_book.py")
+    args = parser.parse_args()
+
+    opening_book = OpeningBook(args.book) if args.book else None
+    session_manager = SessionManager(max_sessions=args.max_sessions, idle_timeout_s=args.idle_timeout_s,
+                                     opening_book=opening_book)
+    try:
+        asyncio.run(serve(args.host, args.port, session_manager))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
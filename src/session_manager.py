@@ -0,0 +1,127 @@
+# session_manager.py
+"""
+Hosts many concurrent games in one process, each behind its own 'APIManager' and identified by a session ID.
+Sessions idle for longer than a timeout are evicted, and once the session or memory cap is reached,
+the least recently used session makes room for a new one.
+
+The memory cap counts every session at the cost of a game that has been searched and queried for legal moves.
+To keep that cost small, all sessions share one transposition table, a fixed cost outside of the cap,
+and keep a small cache of legal moves.
+"""
+from collections import OrderedDict
+from time import monotonic
+from typing import Callable, Optional
+from uuid import uuid4
+from api_manager import APIManager
+from program_manager import ProgramManager
+from search import TranspositionTable
+from opening_book import OpeningBook
+
+# Memory held by a hosted game: 'benchmark.measure_memory_per_session' measures about 42 KiB after 40 plies,
+# growing by about 0.05 KiB per ply, so this leaves headroom for games of 160 plies
+GAME_MEMORY_ESTIMATE_KIB = 48
+# Number of positions whose legal moves are cached per hosted game
+SESSION_LEGAL_MOVES_CACHE_SIZE = 4
+# Slots of the transposition table shared by the searches of all hosted games, about 12 MiB once full
+SESSION_SEARCH_TABLE_SIZE_LOG2 = 16
+
+
+class GameSession:
+    """
+    A hosted game and the time of its last access.
+    """
+    __slots__ = ('api_manager', 'last_access')
+
+    def __init__(self, api_manager: APIManager, last_access: float):
+        self.api_manager = api_manager
+        self.last_access = last_access
+
+
+class SessionManager:
+    """
+    Creates, looks up and evicts games by session ID.
+    It is not thread-safe, it is meant to be driven from a single thread or event loop.
+    """
+
+    def __init__(self, max_sessions: int = 10000, idle_timeout_s: Optional[float] = 1800,
+                 max_memory_kib: Optional[int] = None, clock: Callable[[], float] = monotonic,
+                 opening_book: Optional[OpeningBook] = None):
+        """
+        'max_memory_kib' caps the estimated memory of all hosted games, lowering the session cap if needed.
+        'opening_book' is shared by all games, it is memory-mapped so it adds nothing to the memory of a game.
+        """
+        if max_memory_kib is not None:
+            max_sessions = min(max_sessions, max_memory_kib // GAME_MEMORY_ESTIMATE_KIB)
+        if max_sessions < 1:
+            raise ValueError("The session manager must be able to host at least one session.")
+
+        self.max_sessions = max_sessions
+        self.idle_timeout_s = idle_timeout_s
+        self._clock = clock
+        self.opening_book = opening_book
+        self.search_table = TranspositionTable(SESSION_SEARCH_TABLE_SIZE_LOG2)
+        # Session ID -> session, from the least to the most recently used
+        self._sessions: OrderedDict[str, GameSession] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def create_session(self, fen: Optional[str] = None) -> str:
+        """
+        Starts a game from the initial position, or from the position of a FEN string if specified.
+        Returns the ID of its session.
+        """
+        # Raises before any eviction if the FEN is invalid
+        api_manager = APIManager(ProgramManager(fen, self.opening_book, search_table=self.search_table,
+                                                legal_moves_cache_size=SESSION_LEGAL_MOVES_CACHE_SIZE))
+
+        self.evict_idle_sessions()
+        while len(self._sessions) >= self.max_sessions:
+            self._sessions.popitem(last=False)
+
+        session_id = uuid4().hex
+        self._sessions[session_id] = GameSession(api_manager, self._clock())
+        return session_id
+
+    def get_api_manager(self, session_id: str) -> APIManager:
+        """
+        Returns the API of the game of a session, and marks the session as used.
+        Raises KeyError if there is no such session, or if it expired.
+        """
+        session = self._sessions.get(session_id)
+        now = self._clock()
+        if session is None or self._is_expired(session, now):
+            self._sessions.pop(session_id, None)
+            raise KeyError(f"No active session with ID '{session_id}'.")
+
+        session.last_access = now
+        self._sessions.move_to_end(session_id)
+        return session.api_manager
+
+    def close_session(self, session_id: str) -> None:
+        """
+        Ends the game of a session. Closing an unknown session is a no-op.
+        """
+        self._sessions.pop(session_id, None)
+
+    def _is_expired(self, session: GameSession, now: float) -> bool:
+        return self.idle_timeout_s is not None and now - session.last_access > self.idle_timeout_s
+
+    def evict_idle_sessions(self) -> list[str]:
+        """
+        Evicts the sessions idle for longer than the timeout, and returns their IDs.
+        Sessions are ordered by last access, so the scan stops at the first session still active.
+        """
+        now = self._clock()
+        evicted = []
+        for session_id, session in self._sessions.items():
+            if not self._is_expired(session, now):
+                break
+            evicted.append(session_id)
+
+        for session_id in evicted:
+            del self._sessions[session_id]
+        return evicted
@@ -3,15 +3,22 @@ from config import *
 from typing import Optional
 
 
+def _get_square_color(position: tuple[int, int]) -> Color:
+    """
+    Returns the color of the board square at the position.
+    """
+    row, col = position
+    return Color.BLACK if (row + col) % 2 == 0 else Color.WHITE
+
+
+# Immutable square metadata, position -> (position, color), computed once and shared by the squares of all boards
+SQUARE_METADATA: dict[tuple[int, int], tuple[tuple[int, int], Color]] = {
+    (row, col): ((row, col), _get_square_color((row, col))) for row in range(BOARD_SIZE) for col in range(BOARD_SIZE)}
+
+
 class Square:
+    __slots__ = ('occupant', 'position', 'color')
+
     def __init__(self, position: tuple[int, int]):
         self.occupant: Optional['ChessPiece'] = None
-        self.position = position
-        self.color = self._get_square_color()
-
-    def _get_square_color(self) -> Color:
-        """
-        Returns the color of the board square.
-        """
-        row, col = self.position
-        return Color.BLACK if (row + col) % 2 == 0 else Color.WHITE
+        self.position, self.color = SQUARE_METADATA[position]
@@ -0,0 +1,598 @@
+# tablebase.py
+"""
+Endgame tablebases for positions of up to four pieces, kings included, generated offline by retrograde analysis
+with the move rules of this project, and probed in constant time. Run directly: python tablebase.py --help
+
+A table covers one material signature, e.g. 'KRKP' for a white king and rook against a black king and pawn,
+and holds one byte per index, 'side to move * 64^n + the squares of the n pieces in base 64', the kings first:
+    0           draw
+    odd d       the side to move mates in d plies
+    even d + 2  the side to move is mated in d plies
+    255         no such position: two pieces on a square, a pawn on a back row, or the side not to move in check
+Distances count plies to mate with best play by both sides, through captures and promotions into smaller tables.
+The fifty-move rule is not taken into account; castling and en passant do not exist in the rules.
+
+Tables are generated only for the signatures where white has the stronger material. Positions of the other
+signatures are probed in the table of their mirror, with the board flipped and the colors swapped.
+
+Layout of a table file: magic 'CHTB', format version (u16), padding (u16), signature (8 bytes, ASCII, padded
+with zeros), then the values. Tables are memory-mapped when probed.
+"""
+import mmap
+import os
+import struct
+import sys
+from argparse import ArgumentParser
+from array import array
+from enum import Enum
+from itertools import chain, product
+from typing import Callable, Iterable, Iterator, Optional
+from attack_tables import KNIGHT_RAYS, KING_RAYS, BISHOP_RAYS, ROOK_RAYS, QUEEN_RAYS, PAWN_RAYS, PAWN_ATTACKS
+from fen import FEN_PIECE_TYPES, FEN_PIECE_SYMBOLS, parse_fen, position_to_algebraic
+from config import *
+
+TABLE_MAGIC = b'CHTB'
+TABLE_VERSION = 1
+TABLE_HEADER = struct.Struct('<4sHH8s')
+TABLE_EXTENSION = '.tb'
+DEFAULT_TABLEBASE_DIRECTORY = 'tablebases'
+MAX_TABLEBASE_PIECES = 4
+
+DRAW_VALUE = 0
+INVALID_VALUE = 255
+MAX_DISTANCE = 253
+SQUARE_COUNT = BOARD_SIZE * BOARD_SIZE
+# Letters of the non-king pieces in the order they are listed in a signature, the strongest first
+SIGNATURE_LETTERS = 'QRBNP'
+PIECE_LETTERS = {piece_type: symbol.upper() for piece_type, symbol in FEN_PIECE_SYMBOLS.items()}
+
+
+class TablebaseOutcome(Enum):
+    """
+    The result of a position with best play, for the side to move.
+    """
+    LOSS = -1
+    DRAW = 0
+    WIN = 1
+
+
+class TablebaseResult:
+    __slots__ = ('outcome', 'plies')
+
+    def __init__(self, outcome: TablebaseOutcome, plies: int):
+        self.outcome = outcome
+        self.plies = plies  # plies to mate with best play, 0 for a draw
+
+    def __repr__(self) -> str:
+        return f"TablebaseResult({self.outcome.name}, {self.plies})"
+
+
+def _to_square(position: tuple[int, int]) -> int:
+    return position[0] * BOARD_SIZE + position[1]
+
+
+def _to_position(square: int) -> tuple[int, int]:
+    return divmod(square, BOARD_SIZE)
+
+
+def _mirror_square(square: int) -> int:
+    row, col = _to_position(square)
+    return (BOARD_SIZE - 1 - row) * BOARD_SIZE + col
+
+
+def _opponent(color: Color) -> Color:
+    return Color.BLACK if color is Color.WHITE else Color.WHITE
+
+
+def _mask(squares: Iterable[int]) -> int:
+    return sum(1 << square for square in squares)
+
+
+# The attack tables of the game, indexed by square rather than position
+PIECE_RAYS = {piece_type: [tuple(tuple(_to_square(position) for position in ray)
+                                 for ray in table[_to_position(square)].rays) for square in range(SQUARE_COUNT)]
+              for piece_type, table in ((PieceType.KING, KING_RAYS), (PieceType.KNIGHT, KNIGHT_RAYS),
+                                        (PieceType.BISHOP, BISHOP_RAYS), (PieceType.ROOK, ROOK_RAYS),
+                                        (PieceType.QUEEN, QUEEN_RAYS))}
+LEAPER_MASKS = {piece_type: [_mask(chain.from_iterable(rays)) for rays in PIECE_RAYS[piece_type]]
+                for piece_type in (PieceType.KING, PieceType.KNIGHT)}
+PAWN_CAPTURES = {color: [tuple(_to_square(position) for position in PAWN_ATTACKS[color][_to_position(square)])
+                         for square in range(SQUARE_COUNT)] for color in Color}
+PAWN_ATTACK_MASKS = {color: [_mask(captures) for captures in PAWN_CAPTURES[color]] for color in Color}
+PAWN_PUSHES = {color: [tuple(_to_square(position) for ray in PAWN_RAYS[color][_to_position(square)].rays
+                             for position in ray if position[1] == square % BOARD_SIZE)
+                       for square in range(SQUARE_COUNT)] for color in Color}
+
+
+def _build_pawn_origins(color: Color) -> list[tuple[int, ...]]:
+    """
+    Returns, for each square, the squares a pawn pushed to it may come from, the nearest first.
+    """
+    origins = [[] for _ in range(SQUARE_COUNT)]
+    for origin, targets in enumerate(PAWN_PUSHES[color]):
+        for target in targets:
+            origins[target].append(origin)
+    return [tuple(sorted(square_origins, key=lambda origin: abs(origin - square)))
+            for square, square_origins in enumerate(origins)]
+
+
+PAWN_ORIGINS = {color: _build_pawn_origins(color) for color in Color}
+
+
+def _build_between_masks(piece_type: PieceType) -> dict[int, int]:
+    """
+    Returns, for each (square, target) pair along the rays of a slider as 'square * 64 + target',
+    the mask of the squares strictly between them.
+    """
+    between_masks = {}
+    for square, rays in enumerate(PIECE_RAYS[piece_type]):
+        for ray in rays:
+            between = 0
+            for target in ray:
+                between_masks[square * SQUARE_COUNT + target] = between
+                between |= 1 << target
+    return between_masks
+
+
+SLIDER_BETWEEN_MASKS = {piece_type: _build_between_masks(piece_type)
+                        for piece_type in (PieceType.BISHOP, PieceType.ROOK, PieceType.QUEEN)}
+
+
+def _is_attacked(target: int, slots: list[tuple[PieceType, Color]], squares: list[int], occupancy: int,
+                 attacker_color: Color) -> bool:
+    """
+    Returns True if a piece of 'attacker_color' attacks the target square. Captured pieces have square -1.
+    """
+    for (piece_type, color), square in zip(slots, squares):
+        if color is not attacker_color or square < 0:
+            continue
+        if piece_type is PieceType.PAWN:
+            if PAWN_ATTACK_MASKS[color][square] >> target & 1:
+                return True
+        elif piece_type in LEAPER_MASKS:
+            if LEAPER_MASKS[piece_type][square] >> target & 1:
+                return True
+        else:
+            between = SLIDER_BETWEEN_MASKS[piece_type].get(square * SQUARE_COUNT + target)
+            if between is not None and not between & occupancy:
+                return True
+    return False
+
+
+def _generate_piece_targets(piece_type: PieceType, color: Color, square: int, occupants: dict[int, int],
+                            slots: list[tuple[PieceType, Color]]) -> Iterator[tuple[int, int]]:
+    """
+    Yields the (target square, captured slot or -1) of the moves of a piece, not checking the safety of its king.
+    """
+    if piece_type is PieceType.PAWN:
+        for target in PAWN_PUSHES[color][square]:
+            if target in occupants:
+                break
+            yield target, -1
+        for target in PAWN_CAPTURES[color][square]:
+            captured = occupants.get(target)
+            if captured is not None and slots[captured][1] is not color and slots[captured][0] is not PieceType.KING:
+                yield target, captured
+        return
+
+    for ray in PIECE_RAYS[piece_type][square]:
+        for target in ray:
+            captured = occupants.get(target)
+            if captured is None:
+                yield target, -1
+                continue
+            if slots[captured][1] is not color and slots[captured][0] is not PieceType.KING:
+                yield target, captured
+            break
+
+
+def _generate_legal_moves(slots: list[tuple[PieceType, Color]], squares: list[int],
+                          side_to_move: Color) -> list[tuple[int, int, int]]:
+    """
+    Returns the legal moves of the side to move as (slot, target square, captured slot or -1).
+    A pawn reaching a back row is promoted to a queen.
+    """
+    occupants = {square: slot for slot, square in enumerate(squares) if square >= 0}
+    occupancy = _mask(occupants)
+    king_slot = slots.index((PieceType.KING, side_to_move))
+    opponent = _opponent(side_to_move)
+    moves = []
+    for slot, (piece_type, color) in enumerate(slots):
+        square = squares[slot]
+        if color is not side_to_move or square < 0:
+            continue
+        for target, captured in _generate_piece_targets(piece_type, color, square, occupants, slots):
+            moved_squares = list(squares)
+            moved_squares[slot] = target
+            if captured >= 0:
+                moved_squares[captured] = -1
+            moved_occupancy = occupancy & ~(1 << square) | 1 << target
+            if not _is_attacked(moved_squares[king_slot], slots, moved_squares, moved_occupancy, opponent):
+                moves.append((slot, target, captured))
+    return moves
+
+
+def _is_changing_material(slots: list[tuple[PieceType, Color]], slot: int, target: int, captured: int) -> bool:
+    return captured >= 0 or (slots[slot][0] is PieceType.PAWN and target // BOARD_SIZE in (0, BOARD_SIZE - 1))
+
+
+def _make_child(slots: list[tuple[PieceType, Color]], squares: list[int], slot: int, target: int,
+                captured: int) -> list[tuple[PieceType, Color, int]]:
+    """
+    Returns the pieces of the position after a move, as (piece type, color, square).
+    """
+    pieces = []
+    for index, ((piece_type, color), square) in enumerate(zip(slots, squares)):
+        if index == captured:
+            continue
+        if index == slot:
+            square = target
+            if piece_type is PieceType.PAWN and target // BOARD_SIZE in (0, BOARD_SIZE - 1):
+                piece_type = PieceType.QUEEN
+        pieces.append((piece_type, color, square))
+    return pieces
+
+
+def get_signature(pieces: Iterable[tuple[PieceType, Color]]) -> str:
+    """
+    Returns the material signature of pieces, e.g. 'KRKP': the white king and pieces, then the black ones,
+    the strongest first.
+    """
+    letters = {Color.WHITE: [], Color.BLACK: []}
+    for piece_type, color in pieces:
+        if piece_type is not PieceType.KING:
+            letters[color].append(PIECE_LETTERS[piece_type])
+    return ''.join('K' + ''.join(sorted(letters[color], key=SIGNATURE_LETTERS.index)) for color in Color)
+
+
+def get_signature_slots(signature: str) -> list[tuple[PieceType, Color]]:
+    """
+    Returns the pieces of a signature in the order of the squares of a table index: the kings, then the white
+    pieces and the black pieces in the order of the signature.
+    Raises ValueError if the signature is invalid.
+    """
+    black_start = signature.find('K', 1)
+    white_letters, black_letters = signature[1:black_start], signature[black_start + 1:]
+    if not signature.startswith('K') or black_start < 0 or \
+            any(letter not in SIGNATURE_LETTERS for letter in white_letters + black_letters):
+        raise ValueError(f"Invalid material signature '{signature}'.")
+
+    slots = [(PieceType.KING, Color.WHITE), (PieceType.KING, Color.BLACK)]
+    slots += [(FEN_PIECE_TYPES[letter.lower()], Color.WHITE) for letter in white_letters]
+    slots += [(FEN_PIECE_TYPES[letter.lower()], Color.BLACK) for letter in black_letters]
+    if get_signature(slots) != signature:
+        raise ValueError(f"Pieces of signature '{signature}' must be listed as in '{get_signature(slots)}'.")
+    return slots
+
+
+def _get_side_strength(side: str) -> tuple[int, list[int]]:
+    return len(side), sorted((-SIGNATURE_LETTERS.index(letter) for letter in side[1:]), reverse=True)
+
+
+def get_canonical_signature(signature: str) -> tuple[str, bool]:
+    """
+    Returns the signature of the table holding the positions of a signature, and whether they are mirrored in it.
+    """
+    black_start = signature.find('K', 1)
+    white_side, black_side = signature[:black_start], signature[black_start:]
+    if _get_side_strength(white_side) >= _get_side_strength(black_side):
+        return signature, False
+    return black_side + white_side, True
+
+
+def _get_dependencies(slots: list[tuple[PieceType, Color]]) -> set[str]:
+    """
+    Returns the canonical signatures that the captures and promotions of a signature lead to.
+    """
+    children = []
+    for index, (piece_type, color) in enumerate(slots):
+        if piece_type is PieceType.KING:
+            continue
+        children.append(slots[:index] + slots[index + 1:])
+        if piece_type is PieceType.PAWN:
+            promoted = slots[:index] + [(PieceType.QUEEN, color)] + slots[index + 1:]
+            children.append(promoted)
+            children.extend(promoted[:captured] + promoted[captured + 1:]
+                            for captured, (captured_type, captured_color) in enumerate(promoted)
+                            if captured_color is not color and captured_type is not PieceType.KING)
+    return {get_canonical_signature(get_signature(child))[0] for child in children} - {'KK'}
+
+
+def _encode_distance(distance: int, is_win: bool) -> int:
+    if distance > MAX_DISTANCE:
+        raise ValueError(f"A distance to mate of {distance} plies does not fit in a table.")
+    return distance if is_win else distance + 2
+
+
+def _decode_value(value: int) -> TablebaseResult:
+    if value == DRAW_VALUE:
+        return TablebaseResult(TablebaseOutcome.DRAW, 0)
+    if value % 2:
+        return TablebaseResult(TablebaseOutcome.WIN, value)
+    return TablebaseResult(TablebaseOutcome.LOSS, value - 2)
+
+
+def _get_move_rank(child_value: int) -> tuple[int, int]:
+    """
+    Ranks a move by the value of the position it leads to, for the opponent: the fastest win first,
+    then draws, then the slowest loss.
+    """
+    child = _decode_value(child_value)
+    if child.outcome is TablebaseOutcome.LOSS:
+        return 2, -child.plies
+    if child.outcome is TablebaseOutcome.DRAW:
+        return 1, 0
+    return 0, child.plies
+
+
+def _generate_origins(slots: list[tuple[PieceType, Color]], squares: tuple[int, ...],
+                      mover: Color) -> Iterator[tuple[int, int]]:
+    """
+    Yields the (slot, initial square) of the moves of 'mover' that may have led to a position without
+    changing its material: no capture and no promotion.
+    """
+    occupied = set(squares)
+    for slot, (piece_type, color) in enumerate(slots):
+        if color is not mover:
+            continue
+        rays = (PAWN_ORIGINS[color][squares[slot]],) if piece_type is PieceType.PAWN \
+            else PIECE_RAYS[piece_type][squares[slot]]
+        for ray in rays:
+            for origin in ray:
+                if origin in occupied:
+                    break
+                yield slot, origin
+
+
+def _is_valid_position(slots: list[tuple[PieceType, Color]], squares: tuple[int, ...], side_to_move: Color) -> bool:
+    if len(set(squares)) != len(squares):
+        return False
+    for (piece_type, _), square in zip(slots, squares):
+        if piece_type is PieceType.PAWN and square // BOARD_SIZE in (0, BOARD_SIZE - 1):
+            return False
+    waiting_king = squares[1] if side_to_move is Color.WHITE else squares[0]
+    return not _is_attacked(waiting_king, slots, list(squares), _mask(squares), side_to_move)
+
+
+def generate_table_values(slots: list[tuple[PieceType, Color]],
+                          probe_value: Callable[[list[tuple[PieceType, Color, int]], Color], Optional[int]]) \
+        -> bytearray:
+    """
+    Solves every position of a signature by retrograde analysis, and returns the values of its table.
+    'probe_value' returns the value of a position of a smaller signature reached by a capture or a promotion.
+
+    The positions are first scanned once: mates are found, legal moves are counted, and the moves leaving the
+    signature are valued from the smaller tables. Then, distance after distance, each position solved at a
+    distance resolves the positions that may have led to it, found by moving pieces backwards: a parent of a
+    lost position wins at the next distance, and a parent all of whose moves lead to won positions loses at the
+    distance of the last of them. Positions never solved are draws.
+    """
+    piece_count = len(slots)
+    side_size = SQUARE_COUNT ** piece_count
+    place_values = [SQUARE_COUNT ** (piece_count - 1 - slot) for slot in range(piece_count)]
+    values = bytearray(2 * side_size)
+    move_counts = bytearray(2 * side_size)  # legal moves not yet known to lead to a position won by the opponent
+    solved: dict[int, array] = {}  # distance -> indices of the positions solved at that distance
+    lost_children: dict[int, array] = {}  # distance -> parents of a position lost at that distance, out of the table
+    won_children: dict[int, array] = {}  # distance -> parents of a position won at that distance, out of the table
+
+    for side_index, side_to_move in enumerate(Color):
+        king_square_slot = 0 if side_to_move is Color.WHITE else 1
+        for offset, squares in enumerate(product(range(SQUARE_COUNT), repeat=piece_count)):
+            index = side_index * side_size + offset
+            if not _is_valid_position(slots, squares, side_to_move):
+                values[index] = INVALID_VALUE
+                continue
+
+            moves = _generate_legal_moves(slots, list(squares), side_to_move)
+            if not moves:
+                if _is_attacked(squares[king_square_slot], slots, list(squares), _mask(squares),
+                                _opponent(side_to_move)):
+                    values[index] = _encode_distance(0, is_win=False)
+                    solved.setdefault(0, array('q')).append(index)
+                continue  # a stalemate is a draw
+            move_counts[index] = len(moves)
+
+            for slot, target, captured in moves:
+                if not _is_changing_material(slots, slot, target, captured):
+                    continue  # found back by moving the pieces of the solved positions backwards
+                child_value = probe_value(_make_child(slots, list(squares), slot, target, captured),
+                                          _opponent(side_to_move))
+                if child_value is None:
+                    raise ValueError("A table that the signature depends on is missing.")
+                if child_value != DRAW_VALUE:
+                    child = _decode_value(child_value)
+                    children = won_children if child.outcome is TablebaseOutcome.WIN else lost_children
+                    children.setdefault(child.plies, array('q')).append(index)
+
+    def resolve(parent: int, is_child_won: bool, distance: int) -> None:
+        if values[parent] != DRAW_VALUE:
+            return  # already solved, or invalid
+        if not is_child_won:
+            values[parent] = _encode_distance(distance + 1, is_win=True)
+        else:
+            move_counts[parent] -= 1
+            if move_counts[parent]:
+                return
+            values[parent] = _encode_distance(distance + 1, is_win=False)
+        solved.setdefault(distance + 1, array('q')).append(parent)
+
+    distance = 0
+    while distance <= max(chain(solved, lost_children, won_children), default=-1):
+        for parent in lost_children.pop(distance, ()):
+            resolve(parent, False, distance)
+        for parent in won_children.pop(distance, ()):
+            resolve(parent, True, distance)
+        for index in solved.pop(distance, ()):
+            side_index, offset = divmod(index, side_size)
+            squares = tuple(offset // place_value % SQUARE_COUNT for place_value in place_values)
+            is_won = values[index] % 2 == 1
+            parent_side_base = (1 - side_index) * side_size
+            for slot, origin in _generate_origins(slots, squares, Color.BLACK if side_index == 0 else Color.WHITE):
+                resolve(parent_side_base + offset + (origin - squares[slot]) * place_values[slot], is_won, distance)
+        distance += 1
+    return values
+
+
+class Tablebase:
+    """
+    The tables of a directory, loaded on their first probe. Tables missing from the directory are probed as unknown.
+    """
+    def __init__(self, directory: str = DEFAULT_TABLEBASE_DIRECTORY):
+        self.directory = directory
+        self._tables: dict[str, Optional[memoryview]] = {}  # signature -> values, None if the table is missing
+        self._maps: list[mmap.mmap] = []
+
+    def _get_path(self, signature: str) -> str:
+        return os.path.join(self.directory, signature + TABLE_EXTENSION)
+
+    def _load_table(self, signature: str) -> Optional[memoryview]:
+        path = self._get_path(signature)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as file:
+            table_map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, stored_signature = TABLE_HEADER.unpack_from(table_map, 0)
+        if magic != TABLE_MAGIC or version != TABLE_VERSION or stored_signature.rstrip(b'\0') != signature.encode():
+            table_map.close()
+            raise ValueError(f"'{path}' is not a table of signature '{signature}'.")
+        self._maps.append(table_map)
+        return memoryview(table_map)[TABLE_HEADER.size:]
+
+    def _get_values(self, signature: str) -> Optional[memoryview]:
+        if signature not in self._tables:
+            self._tables[signature] = self._load_table(signature)
+        return self._tables[signature]
+
+    def _probe_value(self, pieces: list[tuple[PieceType, Color, int]], side_to_move: Color) -> Optional[int]:
+        """
+        Returns the table value of a position given by its pieces as (piece type, color, square),
+        or None if it has too many pieces or its table is missing.
+        """
+        if len(pieces) > MAX_TABLEBASE_PIECES:
+            return None
+        signature, is_mirrored = get_canonical_signature(get_signature((piece[0], piece[1]) for piece in pieces))
+        if signature == 'KK':
+            return DRAW_VALUE
+        if is_mirrored:
+            pieces = [(piece_type, _opponent(color), _mirror_square(square)) for piece_type, color, square in pieces]
+            side_to_move = _opponent(side_to_move)
+        values = self._get_values(signature)
+        if values is None:
+            return None
+
+        remaining = list(pieces)
+        index = 0 if side_to_move is Color.WHITE else 1
+        for piece_type, color in get_signature_slots(signature):
+            piece = next(piece for piece in remaining if piece[0] is piece_type and piece[1] is color)
+            remaining.remove(piece)
+            index = index * SQUARE_COUNT + piece[2]
+        return values[index]
+
+    def probe(self, pieces: Iterable[tuple[PieceType, Color, tuple[int, int]]],
+              side_to_move: Color) -> Optional[TablebaseResult]:
+        """
+        Returns the result with best play of a position given by its pieces as (piece type, color, position),
+        for the side to move. Returns None if the position is not in the tablebase, or is not a legal position.
+        """
+        value = self._probe_value([(piece_type, color, _to_square(position)) for piece_type, color, position in pieces],
+                                  side_to_move)
+        if value is None or value == INVALID_VALUE:
+            return None
+        return _decode_value(value)
+
+    def get_best_move(self, pieces: Iterable[tuple[PieceType, Color, tuple[int, int]]],
+                      side_to_move: Color) -> Optional[tuple[tuple[int, int], tuple[int, int]]]:
+        """
+        Returns a move keeping the result of a position with best play, as (current, final) positions:
+        the fastest mate if winning, the slowest if losing. Returns None if the position or any position
+        after a move is not in the tablebase, or if there is no legal move.
+        """
+        pieces = [(piece_type, color, _to_square(position)) for piece_type, color, position in pieces]
+        value = self._probe_value(pieces, side_to_move)
+        if value is None or value == INVALID_VALUE:
+            return None
+
+        slots = [(piece_type, color) for piece_type, color, _ in pieces]
+        squares = [square for _, _, square in pieces]
+        best_move, best_rank = None, None
+        for slot, target, captured in _generate_legal_moves(slots, squares, side_to_move):
+            child_value = self._probe_value(_make_child(slots, squares, slot, target, captured),
+                                            _opponent(side_to_move))
+            if child_value is None:
+                return None
+            rank = _get_move_rank(child_value)
+            if best_rank is None or rank > best_rank:
+                best_move, best_rank = (_to_position(squares[slot]), _to_position(target)), rank
+        return best_move
+
+    def generate(self, signature: str, log: Optional[Callable[[str], None]] = None) -> None:
+        """
+        Generates the table of a signature into the directory, after those it depends on.
+        Tables already in the directory are kept.
+        """
+        signature = get_canonical_signature(signature)[0]
+        slots = get_signature_slots(signature)
+        if len(slots) > MAX_TABLEBASE_PIECES:
+            raise ValueError(f"Tables hold at most {MAX_TABLEBASE_PIECES} pieces, kings included.")
+        if signature == 'KK' or self._get_values(signature) is not None:
+            return
+
+        for dependency in sorted(_get_dependencies(slots)):
+            self.generate(dependency, log)
+        if log is not None:
+            log(f"generating {signature}")
+        values = generate_table_values(slots, self._probe_value)
+
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._get_path(signature), 'wb') as file:
+            file.write(TABLE_HEADER.pack(TABLE_MAGIC, TABLE_VERSION, 0, signature.encode()))
+            file.write(values)
+        self._tables[signature] = memoryview(values)
+
+    def close(self) -> None:
+        for values in self._tables.values():
+            if values is not None:
+                values.release()
+        self._tables.clear()
+        for table_map in self._maps:
+            table_map.close()
+        self._maps.clear()
+
+    def __enter__(self) -> 'Tablebase':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def main():
+    parser = ArgumentParser(description="Generates endgame tables by retrograde analysis, or probes them.")
+    parser.add_argument('--directory', default=DEFAULT_TABLEBASE_DIRECTORY, help="directory of the table files")
+    subparsers = parser.add_subparsers(dest='task', required=True)
+    generate_parser = subparsers.add_parser('generate', help="generate the tables of signatures, e.g. KQK KRK KPK")
+    generate_parser.add_argument('signatures', nargs='+')
+    probe_parser = subparsers.add_parser('probe', help="probe the result and best move of a position")
+    probe_parser.add_argument('fen')
+    args = parser.parse_args()
+
+    with Tablebase(args.directory) as tablebase:
+        if args.task == 'generate':
+            for signature in args.signatures:
+                tablebase.generate(signature, log=lambda message: print(message, file=sys.stderr))
+            return
+
+        fen_position = parse_fen(args.fen)
+        pieces = [(piece_type, color, position) for piece_type, color, positions in fen_position.layout
+                  for position in positions]
+        result = tablebase.probe(pieces, fen_position.side_to_move)
+        if result is None:
+            print("not in the tablebase")
+            return
+        move = tablebase.get_best_move(pieces, fen_position.side_to_move)
+        print(f"{result.outcome.name.lower()} in {result.plies} plies" if result.plies else "draw",
+              ''.join(position_to_algebraic(position) for position in move) if move else '')
+
+
+if __name__ == "__main__":
+    main()
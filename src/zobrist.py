@@ -0,0 +1,48 @@
+# zobrist.py
+"""
+Zobrist hashing: a 64-bit key identifying a position, built by XOR-ing one random key per feature of the position.
+A position's key covers the pieces on the board, the side to move and the castling rights. The en passant square
+is left out: en passant captures do not exist in the rules, so the square never changes the moves of a position,
+and keying on it would tell apart positions that repeat. Making a move updates the key by XOR-ing only the features
+it changes.
+"""
+from random import Random
+from config import *
+from square import Square
+
+_random = Random(0x5EED)  # a fixed seed keeps the keys, and so the positions' keys, stable across runs
+
+
+def _random_key() -> int:
+    return _random.getrandbits(64)
+
+
+PIECE_KEYS: dict[tuple[PieceType, Color], list[list[int]]] = {
+    (piece_type, color): [[_random_key() for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
+    for piece_type in PieceType for color in Color}
+BLACK_TO_MOVE_KEY = _random_key()
+CASTLING_KEYS: dict[CastlingRight, int] = {right: _random_key() for right in CastlingRight}
+
+
+def get_piece_key(piece: 'ChessPiece', position: tuple[int, int]) -> int:
+    return PIECE_KEYS[(piece.piece_type, piece.color)][position[0]][position[1]]
+
+
+def get_castling_key(castling_rights: frozenset[CastlingRight]) -> int:
+    key = 0
+    for right in castling_rights:
+        key ^= CASTLING_KEYS[right]
+    return key
+
+
+def compute_zobrist_key(board: list[list[Square]], side_to_move: Color,
+                        castling_rights: frozenset[CastlingRight]) -> int:
+    """
+    Computes the key of a position from scratch.
+    """
+    key = BLACK_TO_MOVE_KEY if side_to_move is Color.BLACK else 0
+    for row in board:
+        for square in row:
+            if square.occupant is not None:
+                key ^= get_piece_key(square.occupant, square.position)
+    return key ^ get_castling_key(castling_rights)
@@ -0,0 +1,8 @@
+# conftest.py
+"""
+Makes the flat modules of 'src' importable by the tests, as when running from 'src'.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
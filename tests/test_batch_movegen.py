@@ -0,0 +1,29 @@
+# test_batch_movegen.py
+from random import Random
+import pytest
+from game_manager import GameManager
+
+pytest.importorskip('numpy')
+from batch_movegen import validate_against_game_controller  # noqa: E402
+
+
+def sample_random_fens(games: int, plies: int, seed: int) -> list[str]:
+    """
+    Returns the positions met along random games, seeded so that the sample is fixed.
+    """
+    rng = Random(seed)
+    fens = []
+    for _ in range(games):
+        game_manager = GameManager()
+        for _ in range(plies):
+            fens.append(game_manager.to_fen())
+            moves = game_manager.controller.generate_legal_moves(game_manager.current_player_color)
+            if not moves:
+                break
+            game_manager.execute_update_validate_on_move(rng.choice(sorted(moves, key=lambda move: move.code)))
+    return fens
+
+
+def test_batch_moves_match_game_controller():
+    fens = sample_random_fens(games=8, plies=60, seed=0)
+    assert validate_against_game_controller(fens) == []
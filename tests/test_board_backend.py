@@ -0,0 +1,30 @@
+# test_board_backend.py
+from random import Random
+import pytest
+from game_manager import GameManager
+from perft import PERFT_SUITE, create_controller, perft
+from config import *
+
+
+@pytest.mark.parametrize('backend_type', list(BoardBackendType))
+@pytest.mark.parametrize('name, fen, expected_counts', PERFT_SUITE)
+def test_perft_counts(backend_type, name, fen, expected_counts):
+    controller, color = create_controller(fen, backend_type)
+    assert perft(controller, color, 3) == expected_counts[3]
+
+
+@pytest.mark.parametrize('backend_type', [backend_type for backend_type in BoardBackendType
+                                          if backend_type is not BoardBackendType.SQUARE_LIST])
+def test_legal_moves_match_square_list_backend(backend_type):
+    reference = GameManager(BoardBackendType.SQUARE_LIST)
+    game_manager = GameManager(backend_type)
+    rng = Random(0)
+    for _ in range(80):
+        color = reference.current_player_color
+        expected_codes = sorted(move.code for move in reference.controller.generate_legal_moves(color))
+        assert sorted(move.code for move in game_manager.controller.generate_legal_moves(color)) == expected_codes
+        if not expected_codes:
+            break
+        code = rng.choice(expected_codes)
+        for manager in (reference, game_manager):
+            manager.execute_update_validate_on_move(manager.controller.move_factory.create_from_code(code))
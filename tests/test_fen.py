@@ -0,0 +1,18 @@
+# test_fen.py
+import pytest
+from fen import parse_fen, parse_fen_placement
+from config import *
+
+
+@pytest.mark.parametrize('placement', ['k7/8/8/8/8/8/8/K6P', 'k6p/8/8/8/8/8/8/K7', 'kP6/8/8/8/8/8/8/K7'])
+def test_pawn_on_back_rank_is_rejected(placement):
+    with pytest.raises(ValueError, match='pawn on the first or last rank'):
+        parse_fen_placement(placement)
+
+
+def test_pawns_next_to_back_ranks_are_accepted():
+    layout = parse_fen_placement('k7/P7/8/8/8/8/7p/K7')
+    assert (PieceType.PAWN, Color.WHITE, [(6, 0)]) in layout
+    assert (PieceType.PAWN, Color.BLACK, [(1, 7)]) in layout
+    with pytest.raises(ValueError):
+        parse_fen('k7/8/8/8/8/8/8/K6P w - - 0 1')
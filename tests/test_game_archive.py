@@ -0,0 +1,26 @@
+# test_game_archive.py
+from game_archive import GameArchiveReader, write_archive
+from game_manager import GameManager
+from test_game_manager import play_san_moves
+from config import *
+
+
+def test_replay_round_trip(tmp_path):
+    promotion_game = GameManager(fen='4k3/P7/8/8/8/8/7p/4K3 w - - 0 1')
+    play_san_moves(promotion_game, ['a8=Q+', 'Kd7', 'Qb7+', 'Kd6'])
+    opening_game = GameManager()
+    play_san_moves(opening_game, ['e4', 'e5', 'Nf3'])
+    path = str(tmp_path / 'games.bin')
+    assert write_archive(path, [promotion_game, opening_game]) == 2
+
+    with GameArchiveReader(path) as reader:
+        assert len(reader) == 2
+        assert reader.get_initial_fen(0) == '4k3/P7/8/8/8/8/7p/4K3 w - - 0 1'
+        assert reader.get_initial_fen(1) is None
+        assert reader.get_move_codes(0) == tuple(promotion_game.history)
+        assert reader.get_history_tags(0)[0] is HistoryTag.PROMOTION
+        assert reader.get_status(1) is GameStatus.ACTIVE
+
+        assert reader.replay(0).to_fen() == promotion_game.to_fen()
+        assert reader.replay(1).to_fen() == opening_game.to_fen()
+        assert reader.replay(0, 1).to_fen() == 'Q3k3/8/8/8/8/8/7p/4K3 b - - 0 1'
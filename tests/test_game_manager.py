@@ -0,0 +1,19 @@
+# test_game_manager.py
+from game_manager import GameManager
+from pgn import find_move_by_san
+from config import *
+
+
+def play_san_moves(game_manager: GameManager, moves: list[str]) -> None:
+    for san in moves:
+        game_manager.execute_update_validate_on_move(
+            find_move_by_san(game_manager.controller, game_manager.current_player_color, san))
+
+
+def test_threefold_repetition_after_double_pawn_step():
+    game_manager = GameManager()
+    play_san_moves(game_manager, ['e4', 'Nf6', 'Nf3', 'Ng8', 'Ng1', 'Nf6', 'Nf3', 'Ng8'])
+    assert game_manager.get_game_status() is GameStatus.ACTIVE
+
+    play_san_moves(game_manager, ['Ng1'])  # the position after 1.e4 occurs for the third time
+    assert game_manager.get_game_status() is GameStatus.THREEFOLD_REPETITION
@@ -0,0 +1,25 @@
+# test_opening_book.py
+from opening_book import OpeningBook, collect_book_moves, write_book
+from program_manager import ProgramManager
+from game_manager import GameManager
+
+TRANSPOSED_GAMES = """
+[Event "a"]
+
+1. d4 e6 2. c4 Nf6 *
+
+[Event "b"]
+
+1. c4 e6 2. d4 Nf6 *
+"""
+TRANSPOSED_FEN = 'rnbqkbnr/pppp1ppp/4p3/8/2PP4/8/PP2PPPP/RNBQKBNR b KQkq - 0 2'
+
+
+def test_transpositions_share_book_entries(tmp_path):
+    path = str(tmp_path / 'book.bin')
+    write_book(path, collect_book_moves(TRANSPOSED_GAMES.splitlines()))
+
+    with OpeningBook(path) as book:
+        moves = book.get_moves(GameManager(fen=TRANSPOSED_FEN).controller.zobrist_key)
+        assert [weight for _, weight in moves] == [2]
+        assert ProgramManager(TRANSPOSED_FEN, opening_book=book).get_book_move() == ((7, 6), (5, 5))
@@ -0,0 +1,29 @@
+# test_position_encoding.py
+from random import Random
+import pytest
+from game_manager import GameManager
+
+np = pytest.importorskip('numpy')
+from position_encoding import (PLANES_SHAPE, PACKED_SIZE, EN_PASSANT_PLANE,  # noqa: E402
+                               PositionWriter, packed_to_planes)
+
+
+def test_packed_rows_unpack_to_planes(tmp_path):
+    planes_path, packed_path = str(tmp_path / 'planes.npy'), str(tmp_path / 'packed.npy')
+    rng = Random(0)
+    with PositionWriter(planes_path, initial_capacity=8) as planes_writer, \
+            PositionWriter(packed_path, packed=True, initial_capacity=8) as packed_writer:
+        for _ in range(4):
+            game_manager = GameManager()
+            for _ in range(40):
+                planes_writer.append(game_manager)
+                packed_writer.append(game_manager)
+                moves = game_manager.controller.generate_legal_moves(game_manager.current_player_color)
+                if not moves:
+                    break
+                game_manager.execute_update_validate_on_move(rng.choice(sorted(moves, key=lambda move: move.code)))
+
+    planes, packed = np.load(planes_path), np.load(packed_path)
+    assert planes.shape == (len(packed),) + PLANES_SHAPE and packed.shape[1:] == (PACKED_SIZE,)
+    assert planes[:, EN_PASSANT_PLANE].any()  # the sample holds en passant squares, set after double steps
+    assert np.array_equal(packed_to_planes(packed), planes)
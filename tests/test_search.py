@@ -0,0 +1,18 @@
+# test_search.py
+from perft import create_controller
+from search import SearchEngine, MATE_SCORE, MAX_PLY
+
+
+def test_finds_mate_in_one():
+    controller, color = create_controller('6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1')
+    result = SearchEngine(controller).search(color, max_depth=3)
+    assert result.best_move == ((0, 0), (7, 0))  # Ra8#
+    assert result.score >= MATE_SCORE - MAX_PLY
+
+
+def test_respects_node_budget():
+    controller, color = create_controller()
+    result = SearchEngine(controller).search(color, max_nodes=500)
+    assert result.nodes <= 500
+    assert result.best_move is not None
+    assert controller.zobrist_key == create_controller()[0].zobrist_key  # the board is left as it was found
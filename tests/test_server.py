@@ -0,0 +1,37 @@
+# test_server.py
+import json
+import pytest
+from server import ChessServer
+
+
+def send(server: ChessServer, request: dict) -> dict:
+    return json.loads(server.handle_line(json.dumps(request).encode()))
+
+
+@pytest.mark.parametrize('position', [[9, 4], [0, 99], [-7, 4], [4, -1]])
+def test_off_board_position_is_an_error_response(position):
+    server = ChessServer()
+    session = send(server, {'id': 1, 'method': 'create_session'})['result']
+
+    response = send(server, {'id': 2, 'method': 'get_legal_moves_positions_by_position', 'session': session,
+                             'params': {'position': position}})
+    assert response == {'id': 2, 'error': f"Position {position} is off the board."}
+
+
+def test_on_board_position_is_answered():
+    server = ChessServer()
+    session = send(server, {'id': 1, 'method': 'create_session'})['result']
+
+    response = send(server, {'id': 2, 'method': 'get_legal_moves_positions_by_position', 'session': session,
+                             'params': {'position': [1, 4]}})
+    assert response == {'id': 2, 'result': [[2, 4], [3, 4]]}
+
+
+@pytest.mark.parametrize('position', [[1], [], [1, 2, 3], 5, 'e4', None, [1.5, 2], [True, 0], ['1', '4']])
+def test_malformed_position_is_an_error_response(position):
+    server = ChessServer()
+    session = send(server, {'id': 1, 'method': 'create_session'})['result']
+
+    response = send(server, {'id': 2, 'method': 'get_legal_moves_positions_by_position', 'session': session,
+                             'params': {'position': position}})
+    assert response['id'] == 2 and 'must be a [row, col] pair' in response['error']
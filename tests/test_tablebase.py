@@ -0,0 +1,41 @@
+# test_tablebase.py
+import pytest
+from game_manager import GameManager
+from tablebase import Tablebase, TablebaseOutcome
+from config import *
+
+
+@pytest.fixture(scope='module')
+def tablebase(tmp_path_factory):
+    with Tablebase(str(tmp_path_factory.mktemp('tablebases'))) as tablebase:
+        tablebase.generate('KQK')
+        yield tablebase
+
+
+def probe(tablebase: Tablebase, fen: str) -> tuple[TablebaseOutcome, int]:
+    result = GameManager(fen=fen, tablebase=tablebase).probe_tablebase()
+    return result.outcome, result.plies
+
+
+@pytest.mark.parametrize('fen, expected', [
+    ('7k/8/6K1/8/8/8/Q7/8 w - - 0 1', (TablebaseOutcome.WIN, 1)),  # Qa8# or Qg7#
+    ('7k/6Q1/6K1/8/8/8/8/8 b - - 0 1', (TablebaseOutcome.LOSS, 0)),  # checkmated
+    ('7k/5Q2/6K1/8/8/8/8/8 b - - 0 1', (TablebaseOutcome.DRAW, 0)),  # stalemated
+    ('8/8/8/8/8/2k5/1q6/K7 w - - 0 1', (TablebaseOutcome.LOSS, 0)),  # mated by the black queen, mirrored
+])
+def test_probe_known_distances(tablebase, fen, expected):
+    assert probe(tablebase, fen) == expected
+
+
+def test_mirrored_probe_matches(tablebase):
+    # The same position with colors swapped and the board flipped
+    assert probe(tablebase, '8/8/8/8/2k5/8/8/K6q w - - 0 1') == probe(tablebase, 'k6Q/8/8/2K5/8/8/8/8 b - - 0 1') \
+        == (TablebaseOutcome.LOSS, 6)
+
+
+def test_best_move_mates_fastest(tablebase):
+    game_manager = GameManager(fen='7k/8/6K1/8/8/8/Q7/8 w - - 0 1', tablebase=tablebase)
+    position, position_final = game_manager.get_tablebase_move()
+    piece = game_manager.board_manager.get_square(*position).occupant
+    game_manager.execute_update_validate_on_move(game_manager.controller.move_factory.create(piece, position_final))
+    assert game_manager.get_game_status() is GameStatus.WHITE_WIN